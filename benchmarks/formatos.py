@@ -0,0 +1,80 @@
+"""Custo por campo dos formatadores de utils.formatos.
+
+Mede cada formatador isolado e o custo adicional de um campo formatado em
+relação a um campo sem formato, dentro do resolver + renderizar de um
+template compilado.
+
+Uso:
+    python benchmarks/formatos.py [--repeat 20000] [--campos 20]
+"""
+
+import argparse
+import timeit
+from types import SimpleNamespace
+
+from contratrix_api.utils.campos import compilar
+from contratrix_api.utils.formatos import FORMATOS
+
+EXEMPLOS = {
+    'cpf': '12345678901',
+    'cnpj': '12345678000195',
+    'cpf_cnpj': '12345678000195',
+    'cep': '01310100',
+    'brl_centavos': '150050',
+    'brl_extenso': '150050',
+    'extenso': '1234567',
+    'data': '2025-02-01',
+    'data_extenso': '2025-02-01',
+    'endereco': {
+        'cep': '01310100',
+        'rua': 'Av. Paulista',
+        'numero': '1000',
+        'complemento': 'Apto 5',
+        'bairro': 'Bela Vista',
+        'cidade': 'São Paulo',
+        'uf': 'SP',
+        'pais': 'Brasil',
+    },
+}
+
+
+def _gerar(campos: int, formato: str | None):
+    definicoes = [{'name': f'c{i}', 'formato': formato} for i in range(campos)]
+    html = ''.join(f'<p>{{{{c{i}}}}}</p>' for i in range(campos))
+    plano = compilar(definicoes, html)
+    dados = {f'c{i}': EXEMPLOS.get(formato, 'valor') for i in range(campos)}
+    perfil = SimpleNamespace()
+
+    return lambda: plano.renderizar(plano.resolver(perfil, None, dados))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20000)
+    parser.add_argument('--campos', type=int, default=20)
+    args = parser.parse_args()
+
+    base = timeit.timeit(_gerar(args.campos, None), number=args.repeat // 10)
+    base = base / (args.repeat // 10) / args.campos * 1e6
+
+    print(f'campo sem formato: {base:.3f} us (resolver + renderizar)\n')
+    print(
+        f'{"formato":14} {"isolado":>10} {"no template":>13} '
+        f'{"adicional":>11}  (us/campo)'
+    )
+
+    for nome, formatar in FORMATOS.items():
+        valor = EXEMPLOS[nome]
+        isolado = timeit.timeit(lambda: formatar(valor), number=args.repeat)
+        isolado = isolado / args.repeat * 1e6
+
+        total = timeit.timeit(
+            _gerar(args.campos, nome), number=args.repeat // 10
+        )
+        total = total / (args.repeat // 10) / args.campos * 1e6
+
+        print(f'{nome:14} {isolado:10.3f} {total:13.3f} {total - base:11.3f}')
+
+
+if __name__ == '__main__':
+    main()
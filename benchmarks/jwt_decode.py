@@ -0,0 +1,90 @@
+"""Custo de jwt.decode por algoritmo e do acerto no TokenCache.
+
+Compara HS256, RS256, ES256 e EdDSA com chaves já carregadas (objetos do
+cryptography, como em security.get_jwt_keys) e com a chave em PEM, que o
+PyJWT precisa converter a cada chamada.
+
+Uso:
+    python benchmarks/jwt_decode.py [--repeat 2000]
+"""
+
+import argparse
+import secrets
+import timeit
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+
+from contratrix_api.utils.token_cache import TokenCache
+
+
+def _pem(private_key):
+    privada = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    publica = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return privada, publica
+
+
+def _chaves():
+    segredo = secrets.token_hex(32)
+    return {
+        'HS256': (segredo, segredo),
+        'RS256': _pem(rsa.generate_private_key(65537, 2048)),
+        'ES256': _pem(ec.generate_private_key(ec.SECP256R1())),
+        'EdDSA': _pem(ed25519.Ed25519PrivateKey.generate()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    claims = {
+        'sub': 'usuario@contratrix.com',
+        'uid': str(uuid4()),
+        'role': 'user',
+        'tv': 0,
+        'exp': datetime.now(tz=timezone.utc) + timedelta(minutes=30),
+    }
+
+    print(
+        f'{"algoritmo":10} {"PEM":>10} {"pré-carregada":>14} {"cache":>8}'
+        '  (us/decode)'
+    )
+
+    for nome, (privada, publica) in _chaves().items():
+        algoritmo = get_default_algorithms()[nome]
+        token = jwt.encode(claims, privada, algorithm=nome)
+        chave = algoritmo.prepare_key(publica)
+
+        cache = TokenCache(1024)
+        cache.put(token, jwt.decode(token, chave, algorithms=[nome]))
+
+        tempos = [
+            timeit.timeit(
+                lambda: jwt.decode(token, publica, algorithms=[nome]),
+                number=args.repeat,
+            ),
+            timeit.timeit(
+                lambda: jwt.decode(token, chave, algorithms=[nome]),
+                number=args.repeat,
+            ),
+            timeit.timeit(lambda: cache.get(token), number=args.repeat),
+        ]
+        pem, carregada, acerto = (t / args.repeat * 1e6 for t in tempos)
+        print(f'{nome:10} {pem:10.1f} {carregada:14.1f} {acerto:8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Mede logins/s do Argon2 com os parâmetros configurados.
+
+Roda verify_password em 1..N threads (o Argon2 libera o GIL) e reporta o
+throughput total e por core, para dimensionar PASSWORD_HASH_WORKERS e os
+custos ARGON2_TIME_COST / ARGON2_MEMORY_COST.
+
+Uso:
+    python benchmarks/password_hashing.py [--segundos 3] [--time-cost 3]
+        [--memory-cost 65536] [--parallelism 4]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+
+def _medir(context: PasswordHash, hash_: str, threads: int, segundos: float):
+    fim = time.perf_counter() + segundos
+
+    def worker():
+        n = 0
+        while time.perf_counter() < fim:
+            context.verify('senha-do-usuario', hash_)
+            n += 1
+        return n
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        total = sum(executor.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segundos', type=float, default=3)
+    parser.add_argument('--time-cost', type=int, default=3)
+    parser.add_argument('--memory-cost', type=int, default=65536)
+    parser.add_argument('--parallelism', type=int, default=4)
+    args = parser.parse_args()
+
+    context = PasswordHash((
+        Argon2Hasher(
+            time_cost=args.time_cost,
+            memory_cost=args.memory_cost,
+            parallelism=args.parallelism,
+        ),
+    ))
+    hash_ = context.hash('senha-do-usuario')
+    cores = os.cpu_count() or 1
+
+    print(
+        f'argon2id t={args.time_cost} m={args.memory_cost}KiB '
+        f'p={args.parallelism}, {cores} cores'
+    )
+
+    threads = 1
+    while threads <= cores:
+        por_segundo = _medir(context, hash_, threads, args.segundos)
+        print(
+            f'  {threads:3d} threads  {por_segundo:8.1f} logins/s  '
+            f'{por_segundo / threads:8.1f} logins/s por thread  '
+            f'{1000 * threads / por_segundo:7.1f} ms/login'
+        )
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Compara JSONResponse x ORJSONResponse e o tamanho com/sem gzip.
+
+Monta payloads equivalentes aos de GET /documentos/{id} e
+GET /templates/{id} (HTML grande dentro do JSON) e mede o tempo de
+render de cada classe de resposta e os bytes trafegados.
+
+Uso:
+    python benchmarks/serialization.py [--html-kb 200] [--repeat 200]
+"""
+
+import argparse
+import gzip
+import timeit
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from contratrix_api.schemas import DocumentoPublic, TemplatePublic
+
+PARAGRAFO = (
+    '<p>CLÁUSULA {n} - O CONTRATADO se obriga a prestar os serviços '
+    'descritos neste instrumento com zelo e diligência, observando os '
+    'prazos acordados entre as partes.</p>\n'
+)
+
+
+def _html(kb: int) -> str:
+    partes, tamanho, n = [], 0, 1
+    while tamanho < kb * 1024:
+        parte = PARAGRAFO.format(n=n)
+        partes.append(parte)
+        tamanho += len(parte)
+        n += 1
+    return ''.join(partes)
+
+
+def _payloads(kb: int) -> dict:
+    agora = datetime.now()
+    html = _html(kb)
+
+    documento = DocumentoPublic(
+        id=uuid4(),
+        nome_documento='Contrato de prestação de serviços',
+        tipo='contrato',
+        modo='express',
+        documento_text=html,
+        pdf_url='https://pub-bucket.r2.dev/contrato.pdf',
+        status='draft',
+        user_id=uuid4(),
+        cliente_id=uuid4(),
+        template_id=uuid4(),
+        created_at=agora,
+        updated_at=agora,
+    )
+    template = TemplatePublic(
+        id=uuid4(),
+        nome='Prestação de serviços',
+        tipo='contrato',
+        campos=[
+            {'name': f'campo_{i}', 'label': f'Campo {i}'} for i in range(30)
+        ],
+        template_url='template.docx',
+        template_html=html,
+        status='active',
+        created_at=agora,
+        updated_at=agora,
+    )
+
+    # Mesmo caminho do FastAPI: o response_model vira dados JSON-compatíveis
+    # e só então a classe de resposta serializa
+    return {
+        '/documentos/{id}': jsonable_encoder(documento),
+        '/templates/{id}': jsonable_encoder(template),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--html-kb', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    for rota, conteudo in _payloads(args.html_kb).items():
+        print(rota)
+        for classe in (JSONResponse, ORJSONResponse):
+            resposta = classe(conteudo)
+            segundos = timeit.timeit(
+                lambda: classe(conteudo), number=args.repeat
+            )
+            corpo = resposta.body
+            print(
+                f'  {classe.__name__:15} '
+                f'{segundos / args.repeat * 1e6:9.1f} us/render  '
+                f'{len(corpo):9d} bytes  '
+                f'{len(gzip.compress(corpo, compresslevel=6)):8d} bytes gzip'
+            )
+
+
+if __name__ == '__main__':
+    main()
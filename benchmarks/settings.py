@@ -0,0 +1,62 @@
+"""Custo de construir Settings e tempo de startup do processo.
+
+Compara Settings() (relê e valida o .env a cada chamada) com
+get_settings() (instância única) e mede o import a frio de
+contratrix_api.app, em subprocessos, até a app estar pronta.
+
+Uso (com o .env no diretório atual):
+    python benchmarks/settings.py [--repeat 2000] [--startups 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import timeit
+
+from contratrix_api import settings
+
+STARTUP = (
+    'import time; inicio = time.perf_counter(); '
+    'import contratrix_api.app; '
+    'print(time.perf_counter() - inicio)'
+)
+
+
+def _startup(vezes: int) -> list[float]:
+    tempos = []
+    for _ in range(vezes):
+        saida = subprocess.run(
+            [sys.executable, '-c', STARTUP],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--startups', type=int, default=15)
+    args = parser.parse_args()
+
+    construir = timeit.timeit(settings.Settings, number=args.repeat)
+    print(f'Settings():     {construir / args.repeat * 1e6:9.1f} us/chamada')
+
+    get_settings = getattr(settings, 'get_settings', None)
+    if get_settings is not None:
+        get_settings()
+        cache = timeit.timeit(get_settings, number=args.repeat)
+        print(f'get_settings(): {cache / args.repeat * 1e6:9.3f} us/chamada')
+
+    tempos = _startup(args.startups)
+    print(
+        f'import da app:  {statistics.median(tempos) * 1000:9.1f} ms '
+        f'(mediana de {args.startups}, min {min(tempos) * 1000:.1f} ms)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,167 @@
+from contextlib import asynccontextmanager
+from functools import partial
 from http import HTTPStatus
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from contratrix_api.routers import (
     auth,
-    prestador,
-    users,
+    checkout,
     clientes,
-    templates,
     contratos,
-    planos,
     cupons,
+    health,
+    metrics,
+    planos,
+    prestador,
+    templates,
     transacoes,
-    checkout,
-    webhook
+    users,
+    webhook,
 )
 from contratrix_api.schemas import Message
+from contratrix_api.security import get_jwt_keys, get_password_context
+from contratrix_api.settings import get_settings
+from contratrix_api.utils import agendador, cache_bus, refresh_tokens
+from contratrix_api.utils.admissao import AdmissaoMiddleware, get_monitor
+from contratrix_api.utils.expirar_planos import expirar_planos
+from contratrix_api.utils.outbox import OutboxDispatcher
+from contratrix_api.utils.pagarme import close_pagarme
+from contratrix_api.utils.rate_limit import purgar_buckets
+from contratrix_api.utils.reset_tokens import purgar_tokens
+from contratrix_api.utils.storage import get_s3_client
+from contratrix_api.utils.warmup import (
+    abrir_conexoes,
+    aquecimento,
+    carregar_catalogos,
+    importar_modulos,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    dispatcher = None
+    monitor = None
+
+    if settings.ADMISSAO_ENABLED:
+        monitor = get_monitor()
+        monitor.start()
+
+    if settings.CACHE_BUS_ENABLED:
+        cache_bus.start_listener()
+
+    if settings.OUTBOX_ENABLED:
+        dispatcher = OutboxDispatcher()
+        dispatcher.start()
 
-app = FastAPI()
+    if settings.TAREFAS_ENABLED:
+        agendador.registrar(
+            'expirar_planos',
+            partial(
+                expirar_planos, batch_size=settings.EXPIRAR_PLANOS_BATCH_SIZE
+            ),
+            settings.EXPIRAR_PLANOS_INTERVAL_SECONDS,
+        )
+        agendador.registrar(
+            'purgar_reset_tokens',
+            partial(
+                purgar_tokens,
+                batch_size=settings.PURGAR_RESET_TOKENS_BATCH_SIZE,
+            ),
+            settings.PURGAR_RESET_TOKENS_INTERVAL_SECONDS,
+        )
+        agendador.registrar(
+            'purgar_refresh_tokens',
+            partial(
+                refresh_tokens.purgar_tokens,
+                batch_size=settings.PURGAR_REFRESH_TOKENS_BATCH_SIZE,
+            ),
+            settings.PURGAR_REFRESH_TOKENS_INTERVAL_SECONDS,
+        )
+        # Buckets em memória se limitam sozinhos (MemoriaBackend.max_chaves)
+        if settings.RATE_LIMIT_BACKEND == 'postgres':
+            agendador.registrar(
+                'purgar_rate_limit',
+                partial(
+                    purgar_buckets,
+                    batch_size=settings.PURGAR_RATE_LIMIT_BATCH_SIZE,
+                ),
+                settings.PURGAR_RATE_LIMIT_INTERVAL_SECONDS,
+            )
 
-origins = [
-    "*"
-]
+        for tarefa in agendador.tarefas.values():
+            tarefa.start()
+
+    if settings.WARMUP_ENABLED:
+        aquecimento.registrar(
+            'conexoes_db',
+            partial(abrir_conexoes, settings.WARMUP_DB_CONNECTIONS),
+        )
+        aquecimento.registrar('storage', get_s3_client)
+        aquecimento.registrar(
+            'catalogos',
+            partial(
+                carregar_catalogos,
+                templates.catalogo_templates,
+                planos.catalogo_planos,
+            ),
+        )
+        aquecimento.registrar(
+            'chaves', lambda: (get_jwt_keys(), get_password_context())
+        )
+        # No modo fila quem gera PDF é o render worker: a API não carrega
+        # o pypandoc
+        if settings.RENDER_MODE != 'fila':
+            aquecimento.registrar(
+                'imports', partial(importar_modulos, settings.WARMUP_IMPORTS)
+            )
+        aquecimento.start()
+    else:
+        aquecimento.pronto = True
+
+    yield
+
+    await aquecimento.stop()
+
+    for tarefa in agendador.tarefas.values():
+        await tarefa.stop()
+
+    if dispatcher is not None:
+        await dispatcher.stop()
+
+    cache_bus.stop_listener()
+    await close_pagarme()
+
+    if monitor is not None:
+        await monitor.stop()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Descarta carga antes de chegar às rotas; fica dentro do CORS para
+# que o 503 chegue ao navegador com os headers de CORS
+app.add_middleware(AdmissaoMiddleware)
+
+origins = ['*']
 
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=['*'],
+    allow_headers=['*'],
 )
 
+# Comprime respostas grandes (HTML de documentos e templates); respostas
+# pequenas não compensam o custo de compressão
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -47,6 +174,8 @@ app.include_router(cupons.router)
 app.include_router(transacoes.router)
 app.include_router(checkout.router)
 app.include_router(webhook.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
@@ -56,21 +185,31 @@ def read_root():
 
 @app.exception_handler(HTTPException)
 async def custom_http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
-        content={"message": str(exc.detail)},
-        status_code=exc.status_code
+    return ORJSONResponse(
+        content={'message': str(exc.detail)},
+        status_code=exc.status_code,
+        headers=exc.headers,
     )
 
+
 @app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    return JSONResponse(
-        content={"message": "Erro na validação das informações. Tente novamente mais tarde."},
-        status_code=422
+async def validation_exception_handler(
+    request: Request, exc: RequestValidationError
+):
+    return ORJSONResponse(
+        content={
+            'message': 'Erro na validação das informações. '
+            'Tente novamente mais tarde.'
+        },
+        status_code=422,
     )
 
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
-        content={"message": "Erro interno no servidor. Tente novamente mais tarde."}
-    )
\ No newline at end of file
+        content={
+            'message': 'Erro interno no servidor. Tente novamente mais tarde.'
+        },
+    )
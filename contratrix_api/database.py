@@ -1,24 +1,34 @@
+from functools import lru_cache
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Session, sessionmaker
+
+from contratrix_api.settings import get_settings
 
-from contratrix_api.settings import Settings
 
-# Criação da engine com configuração de pool
-engine = create_engine(
-    Settings().DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=280       
-)
+# Criação da engine com configuração de pool (feita no primeiro uso,
+# para que importar a aplicação não dependa do .env)
+@lru_cache
+def get_engine():
+    return create_engine(
+        get_settings().DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_recycle=280,
+    )
+
 
 # Criação do factory de sessões
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@lru_cache
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
 
 # Função para ser usada com Depends no FastAPI
 def get_session() -> Session:
-    session = SessionLocal()
+    session = get_sessionmaker()()
     try:
         yield session
     finally:
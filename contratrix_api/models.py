@@ -2,7 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, TypedDict
 
-from sqlalchemy import ForeignKey, String, func, Column, ARRAY, String, ForeignKey, Column
+from sqlalchemy import ForeignKey, String, func, Column, ARRAY, String, ForeignKey, Column, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TEXT
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 import uuid
@@ -15,6 +15,21 @@ table_registry = registry()
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __table_args__ = (
+        # Busca do job de expiração (utils/expirar_planos.py)
+        Index(
+            'ix_users_fim_plano_ativos',
+            'fim_plano',
+            postgresql_where="status IN ('active', 'ativo')",
+        ),
+        # Mapa de versões de token carregado por security.versao_token
+        Index(
+            'ix_users_token_version_revogados',
+            'id',
+            'token_version',
+            postgresql_where='token_version > 0',
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -44,6 +59,8 @@ class User:
     )
 
     plano_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('planos.id'), nullable=True)
+    # Incrementado para revogar todos os access tokens do usuário
+    token_version: Mapped[int] = mapped_column(default=0, server_default='0')
     reset_tokens = relationship('PasswordResetToken', init=False, back_populates='user', cascade="all, delete-orphan")
     clientes = relationship('Cliente', backref='user', cascade="all, delete-orphan")
 
@@ -133,7 +150,7 @@ class Template:
     tipo: Mapped[str]
     campos: Mapped[List[str]] = mapped_column(JSONB, nullable=False)
     template_url: Mapped[str] = mapped_column(nullable=True)
-    template_html: Mapped[str] = mapped_column(nullable=True)
+    template_html: Mapped[str] = mapped_column(nullable=True, deferred=True)
     status: Mapped[str] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
@@ -158,7 +175,7 @@ class Documentos:
     nome_documento: Mapped[str] = mapped_column(nullable=True)
     tipo: Mapped[str] = mapped_column(nullable=False)
     modo: Mapped[str] = mapped_column(nullable=False)
-    documento_text: Mapped[str] = mapped_column(TEXT, nullable=True)
+    documento_text: Mapped[str] = mapped_column(TEXT, nullable=True, deferred=True)
     pdf_url: Mapped[str] = mapped_column(nullable=True)
     status: Mapped[str] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(
@@ -172,6 +189,11 @@ class Documentos:
     cliente_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('clientes.id'), nullable=True)
     template_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('templates.id'))
 
+    # HTML gerado guardado fora da tabela (ver utils/storage.py)
+    html_key: Mapped[str] = mapped_column(nullable=True, default=None)
+    html_size: Mapped[int] = mapped_column(nullable=True, default=None)
+    html_sha256: Mapped[str] = mapped_column(nullable=True, default=None)
+
 
 @table_registry.mapped_as_dataclass
 class Planos:
@@ -226,6 +248,83 @@ class Transacoes:
     plano_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('planos.id'))
     cupom_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("cupons.id"), nullable=True)
     documento_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('documentos.id'), nullable=True)
+    checkout_url: Mapped[str | None] = mapped_column(nullable=True, default=None)
+
+
+@table_registry.mapped_as_dataclass
+class OutboxPagamento:
+    # Chamadas ao gateway gravadas na mesma transação do checkout e
+    # enviadas depois pelo dispatcher (utils/outbox.py)
+    __tablename__ = 'outbox_pagamentos'
+    __table_args__ = (
+        Index(
+            'ix_outbox_pagamentos_pendentes',
+            'proxima_tentativa_em',
+            postgresql_where="status = 'pendente'",
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        nullable=False,
+        init=False
+    )
+    transacao_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('transacoes.id'), unique=True
+    )
+    operacao: Mapped[str]
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[str] = mapped_column(default='pendente')
+    tentativas: Mapped[int] = mapped_column(default=0, server_default='0')
+    ultimo_erro: Mapped[str | None] = mapped_column(nullable=True, default=None)
+    proxima_tentativa_em: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now(), onupdate=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RenderJob:
+    # PDFs a gerar pelo render worker (contratrix_api/render_worker.py)
+    # quando a API roda com RENDER_MODE='fila'
+    __tablename__ = 'render_jobs'
+    __table_args__ = (
+        Index(
+            'ix_render_jobs_pendentes',
+            'proxima_tentativa_em',
+            postgresql_where="status = 'pendente'",
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        nullable=False,
+        init=False
+    )
+    documento_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('documentos.id'), unique=True
+    )
+    status: Mapped[str] = mapped_column(default='pendente')
+    tentativas: Mapped[int] = mapped_column(default=0, server_default='0')
+    ultimo_erro: Mapped[str | None] = mapped_column(nullable=True, default=None)
+    proxima_tentativa_em: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now(), onupdate=func.now()
+    )
 
 
 @table_registry.mapped_as_dataclass
@@ -256,11 +355,25 @@ class Cupom:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    usados: Mapped[int] = mapped_column(default=0, server_default='0')
+
+
+# Busca de cupom por código normalizado (utils/cupons.py). Único entre os
+# cupons não excluídos: 'abc' e 'ABC' seriam o mesmo cupom na busca
+Index(
+    'ux_cupons_code_upper',
+    func.upper(Cupom.code),
+    unique=True,
+    postgresql_where="status <> 'deleted'",
+)
 
 
 @table_registry.mapped_as_dataclass
 class CupomUsage:
     __tablename__ = 'cupom_usado'
+    __table_args__ = (
+        UniqueConstraint('cupom_id', 'user_id', name='uq_cupom_usado_cupom_user'),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -283,9 +396,45 @@ class CupomUsage:
     )
 
 
+@table_registry.mapped_as_dataclass
+class RefreshToken:
+    # Só o sha256 do token fica gravado. Tokens rotacionados a partir do
+    # mesmo login compartilham family_id, que é revogada inteira se um
+    # token já usado voltar a ser apresentado.
+    __tablename__ = 'refresh_tokens'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        nullable=False,
+        init=False
+    )
+    token_hash: Mapped[str] = mapped_column(unique=True)
+    family_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('users.id'), index=True)
+    expires_at: Mapped[datetime] = mapped_column(index=True)
+    used_at: Mapped[datetime | None] = mapped_column(nullable=True, default=None)
+    revoked_at: Mapped[datetime | None] = mapped_column(nullable=True, default=None)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
 @table_registry.mapped_as_dataclass
 class PasswordResetToken:
     __tablename__ = 'password_reset_tokens'
+    __table_args__ = (
+        # Verificação em /reset-password e invalidação em /recover-password
+        Index(
+            'ix_password_reset_tokens_pendentes',
+            'user_id',
+            'code',
+            postgresql_where='NOT used',
+        ),
+        # Limpeza periódica (utils/reset_tokens.py)
+        Index('ix_password_reset_tokens_expires_at', 'expires_at'),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -306,4 +455,14 @@ class PasswordResetToken:
     )
 
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey('users.id'))
-    user = relationship('User', back_populates='reset_tokens')
\ No newline at end of file
+    user = relationship('User', back_populates='reset_tokens')
+
+@table_registry.mapped_as_dataclass
+class RateLimitBucket:
+    # Token bucket compartilhado entre instâncias (utils/rate_limit.py):
+    # `atualizado_em` é o epoch do último consumo, usado para a recarga
+    __tablename__ = 'rate_limit_buckets'
+
+    chave: Mapped[str] = mapped_column(primary_key=True)
+    tokens: Mapped[float]
+    atualizado_em: Mapped[float]
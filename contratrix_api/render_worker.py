@@ -0,0 +1,183 @@
+"""Render worker: gera os PDFs enfileirados em render_jobs.
+
+Processo separado da API, para que pandoc/WeasyPrint não disputem CPU e
+memória com os workers HTTP. A API enfileira quando RENDER_MODE='fila'.
+
+Uso:
+    python -m contratrix_api.render_worker [--drenar]
+
+Com --drenar processa o que estiver elegível e sai (scripts e testes).
+"""
+
+import argparse
+import logging
+import signal
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Callable
+
+from contratrix_api.database import get_sessionmaker
+from contratrix_api.settings import get_settings
+from contratrix_api.utils import cache_bus, render, render_jobs
+from contratrix_api.utils.storage import put_documento_pdf
+
+logger = logging.getLogger(__name__)
+
+
+class RenderWorker:
+    """Reserva jobs e renderiza até `concorrencia` PDFs ao mesmo tempo.
+
+    O render roda sem sessão aberta: o HTML é lido, a conexão volta ao
+    pool e só depois o PDF é gerado e publicado. Falhas voltam para a fila
+    com backoff até `max_tentativas`, e então o job fica 'falhou'.
+    """
+
+    def __init__(
+        self,
+        concorrencia: int | None = None,
+        max_tentativas: int | None = None,
+        intervalo: float | None = None,
+        renderizar: Callable[[str], bytes] | None = None,
+    ):
+        settings = get_settings()
+        self._concorrencia = concorrencia or settings.RENDER_WORKER_CONCURRENCY
+        self._max_tentativas = (
+            max_tentativas or settings.RENDER_WORKER_MAX_TENTATIVAS
+        )
+        self._intervalo = intervalo or settings.RENDER_WORKER_POLL_SECONDS
+        self._renderizar = renderizar
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._concorrencia, thread_name_prefix='render'
+        )
+        self._em_voo: set[Future] = set()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self.concluidos = 0
+        self.falhas = 0
+
+    def acordar(self, chave: str = cache_bus.TODOS):
+        # Chamado pela thread do cache bus quando um job é enfileirado
+        self._acordar.set()
+
+    def _em_andamento(self) -> set[Future]:
+        with self._lock:
+            return set(self._em_voo)
+
+    def _liberar(self, future: Future):
+        with self._lock:
+            self._em_voo.discard(future)
+
+    def processar_lote(self) -> int:
+        em_voo = self._em_andamento()
+        vagas = self._concorrencia - len(em_voo)
+
+        if vagas <= 0:
+            # Sem vaga: espera um render terminar e sinaliza que há trabalho
+            wait(em_voo, return_when=FIRST_COMPLETED)
+            return self._concorrencia
+
+        with get_sessionmaker()() as session:
+            jobs = render_jobs.reservar_lote(session, vagas)
+
+        for job in jobs:
+            future = self._executor.submit(self._processar, job)
+            with self._lock:
+                self._em_voo.add(future)
+            future.add_done_callback(self._liberar)
+
+        return len(jobs)
+
+    def _processar(self, job: render_jobs.Job):
+        try:
+            with get_sessionmaker()() as session:
+                html, nome = render_jobs.carregar_html(session, job)
+
+            renderizar = self._renderizar or render.html_para_pdf
+            pdf = renderizar(html)
+            pdf_url = put_documento_pdf(render.nome_pdf(nome), pdf)
+        except Exception as e:
+            logger.exception(
+                f'Erro ao renderizar o documento {job.documento_id}'
+            )
+            with self._lock:
+                self.falhas += 1
+
+            with get_sessionmaker()() as session:
+                if job.tentativas >= self._max_tentativas:
+                    render_jobs.falhar(session, job, repr(e))
+                else:
+                    render_jobs.reagendar(session, job, repr(e))
+            return
+
+        with get_sessionmaker()() as session:
+            render_jobs.concluir(session, job, pdf_url)
+        with self._lock:
+            self.concluidos += 1
+
+    def drenar(self):
+        while self.processar_lote():
+            pass
+
+        wait(self._em_andamento())
+
+    def executar(self):
+        while not self._parar.is_set():
+            try:
+                reservados = self.processar_lote()
+            except Exception:
+                logger.exception('Erro ao ler render_jobs')
+                reservados = 0
+
+            if reservados == 0:
+                self._acordar.wait(timeout=self._intervalo)
+                self._acordar.clear()
+
+        wait(self._em_andamento())
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drenar', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    worker = RenderWorker()
+
+    try:
+        if args.drenar:
+            worker.drenar()
+            return
+
+        # SIGTERM (deploy/scale-in) termina os renders em andamento e sai
+        signal.signal(signal.SIGTERM, lambda *_: worker.parar())
+        signal.signal(signal.SIGINT, lambda *_: worker.parar())
+
+        if get_settings().CACHE_BUS_ENABLED:
+            cache_bus.subscribe('render', worker.acordar)
+            cache_bus.start_listener()
+
+        worker.executar()
+    finally:
+        cache_bus.stop_listener()
+        worker.shutdown()
+        logger.info(
+            f'Render worker encerrado: {worker.concluidos} concluídos, '
+            f'{worker.falhas} falhas'
+        )
+
+
+if __name__ == '__main__':
+    main()
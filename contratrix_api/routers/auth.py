@@ -3,18 +3,20 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from contratrix_api.database import get_session
 from contratrix_api.models import User
-from contratrix_api.schemas import Token
+from contratrix_api.schemas import RefreshTokenSchema, Token
 from contratrix_api.security import (
+    access_token_claims,
     create_access_token,
-    create_refresh_token,
-    get_current_user,
-    verify_password,
+    verify_and_update_password,
 )
+from contratrix_api.utils import refresh_tokens
+from contratrix_api.utils.rate_limit import limite_por_ip
 
 router = APIRouter(prefix='/auth', tags=['Auth'])
 
@@ -22,9 +24,17 @@ OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 Session = Annotated[Session, Depends(get_session)]
 
 
-@router.post('/token', response_model=Token)
-def login_for_access_token(form_data: OAuth2Form, session: Session):
-    user = session.scalar(select(User).where(User.email == form_data.username))
+@router.post(
+    '/token',
+    response_model=Token,
+    dependencies=[Depends(limite_por_ip('login'))],
+)
+async def login_for_access_token(form_data: OAuth2Form, session: Session):
+    # Async para que o Argon2 rode no executor dedicado (security.py) sem
+    # ocupar uma thread do threadpool enquanto espera
+    user = await run_in_threadpool(
+        session.scalar, select(User).where(User.email == form_data.username)
+    )
 
     if not user:
         raise HTTPException(
@@ -32,21 +42,76 @@ def login_for_access_token(form_data: OAuth2Form, session: Session):
             detail='Email ou senha inválido.',
         )
 
-    if not verify_password(form_data.password, user.password):
+    valida, novo_hash = await verify_and_update_password(
+        form_data.password, user.password
+    )
+
+    if not valida:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Email ou senha inválido.',
         )
 
-    access_token = create_access_token(data={'sub': user.email})
+    def emitir_tokens():
+        if novo_hash:
+            # Parâmetros do Argon2 mudaram: regrava o hash com os atuais
+            session.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(password=novo_hash)
+            )
+
+        # Claims montadas antes do commit, que expira o user: lê-las depois
+        # faria um SELECT preguiçoso fora do threadpool
+        claims = access_token_claims(user)
+        refresh_token = refresh_tokens.emitir(session, user.id)
+        session.commit()
+
+        return claims, refresh_token
+
+    claims, refresh_token = await run_in_threadpool(emitir_tokens)
+    access_token = create_access_token(data=claims)
+
+    return {
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'token_type': 'bearer',
+    }
+
 
-    return {'access_token': access_token, 'token_type': 'bearer'}
+@router.post(
+    '/refresh_token',
+    response_model=Token,
+    # Sem autenticação e sem Argon2: o orçamento por IP é próprio, mais
+    # folgado que o do login, para não travar clientes que renovam juntos
+    dependencies=[Depends(limite_por_ip('refresh'))],
+)
+def refresh_access_token(body: RefreshTokenSchema, session: Session):
+    # Troca o refresh token por um novo par sem verificar senha: o Argon2
+    # só roda no login
+    try:
+        user_id, novo_refresh_token = refresh_tokens.rotacionar(
+            session, body.refresh_token
+        )
+    except refresh_tokens.RefreshTokenInvalido:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Refresh token inválido ou expirado.',
+        )
 
+    user = session.get(User, user_id)
+
+    if user is None or user.status == 'deleted':
+        session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Refresh token inválido ou expirado.',
+        )
 
-@router.post('/refresh_token', response_model=Token)
-def refresh_access_token(
-    user: User = Depends(get_current_user),
-):
-    new_access_token = create_refresh_token(data={'sub': user.email})
+    session.commit()
 
-    return {'access_token': new_access_token, 'token_type': 'bearer'}
+    return {
+        'access_token': create_access_token(data=access_token_claims(user)),
+        'refresh_token': novo_refresh_token,
+        'token_type': 'bearer',
+    }
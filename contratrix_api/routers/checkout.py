@@ -5,156 +5,160 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from datetime import datetime
-import pagarme
 
 from contratrix_api.database import get_session
 from contratrix_api.models import User, Planos, Cupom, Transacoes
-from contratrix_api.schemas import Message, CheckoutSchema
-from contratrix_api.security import get_current_user
-from contratrix_api.settings import Settings
+from contratrix_api.schemas import CheckoutSchema, CheckoutPendente
+from contratrix_api.security import Principal, get_current_principal
+from contratrix_api.settings import get_settings
+from contratrix_api.utils.cupons import (
+    CupomIndisponivel,
+    buscar_cupom_ativo,
+    calcular_valor_final,
+    resgatar_cupom,
+    validar_cupom,
+)
+from contratrix_api.utils import outbox
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
 
 router = APIRouter(prefix='/checkout', tags=['Checkout'])
 
 
-@router.post('/avulso', status_code=HTTPStatus.CREATED, response_model=Message)
-def create_cupom(
+def _registrar_checkout(
+    session,
+    principal: Principal,
     checkout: CheckoutSchema,
-    session: Session,
-    user: CurrentUser
+    tipo_transacao: str,
+    operacao: str,
+    montar_payload,
 ):
-
-    user = session.query(User).filter_by(id=checkout.userId).first()
+    # Fluxo comum a /avulso e /assinatura: valida usuário, plano e cupom,
+    # calcula o valor final e grava, em um único commit, a transação
+    # pendente, o resgate do cupom e a chamada ao gateway no outbox. O envio
+    # ao Pagar.me acontece depois, no dispatcher (utils/outbox.py). O
+    # usuário é sempre o autenticado; checkout.userId é ignorado.
+    user = session.get(User, principal.id)
     plano = session.query(Planos).filter_by(id=checkout.planoId).first()
 
     if not user or not plano:
         raise HTTPException(status_code=404, detail="Usuário ou Plano não encontrado")
-    
-    valor_final = plano.preco_cents
 
     cupom = None
 
     if checkout.cupom_code:
-        cupom = session.query(Cupom).filter_by(code=checkout.cupom_code, status="ativo").first()
-        if not cupom:
-            raise HTTPException(status_code=400, detail="Cupom inválido")
-        if not (cupom.inicio <= datetime.utcnow() <= cupom.termino):
-            raise HTTPException(status_code=400, detail="Cupom expirado")
-
-        # aplicar desconto
-        if cupom.tipo_desconto == "percentual":
-            valor_final -= int(valor_final * (cupom.valor_desconto / 100))
-        elif cupom.tipo_desconto == "fixo":
-            valor_final -= cupom.valor_desconto
-
-        if valor_final < 0:
-            valor_final = 0
+        cupom = buscar_cupom_ativo(session, checkout.cupom_code)
+        try:
+            validar_cupom(cupom)
+        except CupomIndisponivel as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
     db_transacao = Transacoes(
-        tipo_transacao="avulso",
-        valor_cents=valor_final,
+        tipo_transacao=tipo_transacao,
+        valor_cents=calcular_valor_final(plano.preco_cents, cupom),
         pagarme_transacao_id="",
         status="pendente",
         user_id=user.id,
         plano_id=plano.id,
-        cupom_id=cupom.id if cupom else None
+        cupom_id=cupom.id if cupom else None,
+        documento_id=None
     )
 
     session.add(db_transacao)
-    session.commit()
-    session.refresh(db_transacao)
-
-    pagarme.authentication_key("SUA_CHAVE_API_PAGARME")
-
-    transaction_data = {
-        "amount": valor_final,
-        "payment_method": "credit_card",
-        "customer": {
-            "external_id": str(user.id),
-            "name": user.nome,
-            "email": user.email,
-            "type": "individual",
-            "country": "br",
-        },
-        "postback_url": "https://seuservidor.com/webhook/pagarme"
+    session.flush()
+
+    if cupom:
+        try:
+            resgatar_cupom(session, cupom.id, user.id)
+        except CupomIndisponivel as e:
+            session.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+    payload = montar_payload(user, plano, db_transacao)
+    # Lido pelo webhook para ativar o plano do usuário
+    payload['metadata'] = {
+        'user_id': str(user.id),
+        'plano_id': str(plano.id),
+        'transacao_id': str(db_transacao.id),
     }
+    payload['postback_url'] = get_settings().PAGARME_POSTBACK_URL
 
-    transaction = pagarme.transaction.create(transaction_data)
+    outbox.registrar(session, db_transacao, operacao, payload)
 
-    # Atualizar transacao com ID da pagarme
-    db_transacao.pagarme_transacao_id = transaction["id"]
-    db_transacao.commit()
+    session.commit()
+    session.refresh(db_transacao)
 
-    return { 'message': transaction.get("checkout_url", "") }
+    return db_transacao
 
 
-@router.post('/assinatura', status_code=HTTPStatus.CREATED, response_model=Message)
-def create_cupom(
+@router.post('/avulso', status_code=HTTPStatus.ACCEPTED, response_model=CheckoutPendente)
+def checkout_avulso(
     checkout: CheckoutSchema,
     session: Session,
     user: CurrentUser
 ):
 
-    user = session.query(User).filter_by(id=checkout.userId).first()
-    plano = session.query(Planos).filter_by(id=checkout.planoId).first()
-
-    if not user or not plano:
-        raise HTTPException(status_code=404, detail="Usuário ou Plano não encontrado")
-    
-    valor_final = plano.preco_cents
-
-    cupom = None
-
-    if checkout.cupom_code:
-        cupom = session.query(Cupom).filter_by(code=checkout.cupom_code, status="ativo").first()
-        if not cupom:
-            raise HTTPException(status_code=400, detail="Cupom inválido")
-        if not (cupom.inicio <= datetime.utcnow() <= cupom.termino):
-            raise HTTPException(status_code=400, detail="Cupom expirado")
+    def transaction_data(user, plano, db_transacao):
+        return {
+            "amount": db_transacao.valor_cents,
+            "payment_method": "credit_card",
+            "customer": {
+                "external_id": str(user.id),
+                "name": user.nome,
+                "email": user.email,
+                "type": "individual",
+                "country": "br",
+            },
+        }
+
+    return _registrar_checkout(
+        session, user, checkout, 'avulso', outbox.OPERACAO_TRANSACAO,
+        transaction_data
+    )
 
-        # aplicar desconto
-        if cupom.tipo_desconto == "percentual":
-            valor_final -= int(valor_final * (cupom.valor_desconto / 100))
-        elif cupom.tipo_desconto == "fixo":
-            valor_final -= cupom.valor_desconto
 
-        if valor_final < 0:
-            valor_final = 0
+@router.post('/assinatura', status_code=HTTPStatus.ACCEPTED, response_model=CheckoutPendente)
+def checkout_assinatura(
+    checkout: CheckoutSchema,
+    session: Session,
+    user: CurrentUser
+):
 
-    db_transacao = Transacoes(
-        tipo_transacao="assinatura",
-        valor_cents=valor_final,
-        pagarme_transacao_id="",
-        status="pendente",
-        user_id=user.id,
-        plano_id=plano.id,
-        cupom_id=cupom.id if cupom else None
+    def subscription_data(user, plano, db_transacao):
+        return {
+            "plan_id": plano.pagarme_planoId,
+            "customer": {
+                "external_id": str(user.id),
+                "name": user.nome,
+                "email": user.email,
+            },
+        }
+
+    return _registrar_checkout(
+        session, user, checkout, 'assinatura', outbox.OPERACAO_ASSINATURA,
+        subscription_data
     )
 
-    session.add(db_transacao)
-    session.commit()
-    session.refresh(db_transacao)
-
-    pagarme.authentication_key("SUA_CHAVE_API_PAGARME")
-
-    subscription_data = {
-        "plan_id": plano.pagarme_planoId,
-        "customer": {
-            "external_id": str(user.id),
-            "name": user.nome,
-            "email": user.email,
-        },
-        "postback_url": "https://seuservidor.com/webhook/pagarme"
-    }
 
-    subscription = pagarme.subscription.create(subscription_data)
+@router.get('/{transacao_id}', status_code=HTTPStatus.OK, response_model=CheckoutPendente)
+def checkout_status(
+    transacao_id: UUID,
+    session: Session,
+    user: CurrentUser
+):
+    # Consultado pelo front até o dispatcher preencher checkout_url
+    db_transacao = session.scalar(
+        select(Transacoes).where(
+            Transacoes.id == transacao_id, Transacoes.user_id == user.id
+        )
+    )
 
-    # Atualizar transacao com ID da pagarme
-    db_transacao.pagarme_transacao_id = subscription["id"]
-    db_transacao.commit()
+    if not db_transacao:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Transação não encontrada.'
+        )
 
-    return { 'message': subscription.get("checkout_url", "") }
\ No newline at end of file
+    return db_transacao
@@ -6,16 +6,15 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import Session, joinedload
 
 from contratrix_api.database import get_session
-from contratrix_api.models import Cliente, User
+from contratrix_api.models import Cliente
 from contratrix_api.schemas import Message, ClienteList, ClientePublic, ClienteUpdate, ClienteSchema, MessageUpload, ClientePaginated
-from contratrix_api.security import get_current_user
+from contratrix_api.security import Principal, get_current_principal
 from contratrix_api.settings import Settings
-import boto3
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
 
 router = APIRouter(prefix='/clientes', tags=['Clientes'])
 
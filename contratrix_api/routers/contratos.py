@@ -1,26 +1,105 @@
+from contextlib import contextmanager
 from http import HTTPStatus
 from typing import Annotated
-from uuid import UUID, uuid4
-from fastapi import APIRouter, Depends, Query, HTTPException
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-import boto3, io, pypandoc, re, requests
 
 from contratrix_api.database import get_session
-from contratrix_api.models import Documentos, Template, Cliente, Prestador, User
-from contratrix_api.schemas import Message, DocumentoSchema, DocumentoPublic, DocumentoPaginated, MessageUpload
-from contratrix_api.security import get_current_user 
-from contratrix_api.settings import Settings
+from contratrix_api.models import Documentos, RenderJob, Template, Cliente, Prestador
+from contratrix_api.schemas import Message, DocumentoSchema, DocumentoPublic, DocumentoPaginated, DocumentoSummary, RenderJobPublic
+from contratrix_api.security import Principal, get_current_principal
+from contratrix_api.settings import Settings, get_settings
+from contratrix_api.utils import render_jobs
+from contratrix_api.utils.campos import CamposInvalidos, planos_templates
+from contratrix_api.utils.http_cache import (
+    CACHE_CONTROL_DOCUMENTOS,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
+from contratrix_api.utils.rate_limit import limitar_renders, limite_por_usuario
+from contratrix_api.utils.render import html_para_pdf, nome_pdf
+from contratrix_api.utils.storage import (
+    delete_documento_html,
+    get_documento_html,
+    html_storage_enabled,
+    put_documento_html,
+    put_documento_pdf,
+)
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
+AppSettings = Annotated[Settings, Depends(get_settings)]
 
 router = APIRouter(prefix='/documentos', tags=['Documentos'])
 
+# Colunas lidas pela listagem: só o que o DocumentoSummary expõe, sem o HTML
+_SUMMARY_COLUMNS = [getattr(Documentos, campo) for campo in DocumentoSummary.model_fields]
+
+
+@contextmanager
+def _store_html(session, db_documento: Documentos, html: str):
+    # No modo de storage externo o HTML vai comprimido para o bucket e a
+    # linha guarda só a chave, o tamanho e o checksum. O commit acontece
+    # dentro do bloco: se ele falhar, o objeto já gravado é removido para
+    # não ficar órfão no bucket.
+    if not html_storage_enabled():
+        yield
+        return
+
+    session.flush()  # garante o id usado na chave
+
+    stored = put_documento_html(db_documento.id, html)
+    db_documento.documento_text = None
+    db_documento.html_key = stored.key
+    db_documento.html_size = stored.size
+    db_documento.html_sha256 = stored.sha256
+
+    try:
+        yield
+    except Exception:
+        delete_documento_html(stored.key)
+        raise
+
+
+def _documento_public(db_documento: Documentos, html: str | None = None) -> DocumentoPublic:
+    if html is None:
+        if db_documento.html_key:
+            html = get_documento_html(db_documento.html_key, db_documento.html_sha256)
+        else:
+            html = db_documento.documento_text
+
+    data = {
+        campo: getattr(db_documento, campo)
+        for campo in DocumentoPublic.model_fields
+        if campo != 'documento_text'
+    }
+
+    return DocumentoPublic(**data, documento_text=html or '')
+
+
+def _gerar_html(template: Template, dados: dict, perfil=None, cliente=None) -> str:
+    try:
+        plano = planos_templates.get(template)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail=f'Template inválido. {e}'
+        )
+
+    try:
+        valores = plano.resolver(perfil, cliente, dados)
+    except CamposInvalidos as e:
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e))
+
+    return plano.renderizar(valores)
 
-@router.post('/gerar', status_code=HTTPStatus.CREATED, response_model=DocumentoPublic)
+
+@router.post('/gerar', status_code=HTTPStatus.CREATED, response_model=DocumentoPublic, dependencies=[Depends(limite_por_usuario('render'))])
 def create_documento(
     documento: DocumentoSchema,
     session: Session,
@@ -40,7 +119,9 @@ def create_documento(
     # Buscar cliente (somente se informado)
     cliente = None
     if documento.cliente_id:
-        cliente = session.query(Cliente).filter(Cliente.id == documento.cliente_id).first()
+        cliente = session.query(Cliente).filter(
+            Cliente.id == documento.cliente_id, Cliente.user_id == user.id
+        ).first()
         if not cliente:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
 
@@ -49,33 +130,9 @@ def create_documento(
     if not perfil:
         raise HTTPException(status_code=400, detail="Usuário sem perfil cadastrado")
 
-    # Carregar o html bruto
-    html_template = template.template
-    data_dict = {}
-
-    for campo in template.campos:
-        valor = ""
-        # prestador
-        if hasattr(perfil, campo):
-            valor = getattr(perfil, campo) or ""
-        # cliente (se houver)
-        elif cliente and hasattr(cliente, campo):
-            valor = getattr(cliente, campo) or ""
-        # payload extra
-        elif documento.dados_contrato and campo in documento.dados_contrato:
-            valor = documento.dados_contrato[campo] or ""
-
-        data_dict[campo] = valor
-
-    if documento.dados_contrato:
-        for campo, valor in documento.dados_contrato.items():
-            if campo not in data_dict:  # não sobrescreve se já veio do perfil/cliente
-                data_dict[campo] = valor or ""
-
-    # Substituir placeholders no HTML
-    html_final = html_template
-    for key, value in data_dict.items():
-        html_final = html_final.replace(f"{{{{{key}}}}}", str(value))
+    # Campos resolvidos (prestador, cliente ou payload) e validados numa
+    # passada pelo plano compilado do template
+    html_final = _gerar_html(template, documento.dados_contrato, perfil, cliente)
 
     if not html_final:
         raise HTTPException(status_code=400, detail="Erro ao gerar HTML do documento")
@@ -94,16 +151,26 @@ def create_documento(
     )
 
     session.add(db_documento)
-    session.commit()
+    with _store_html(session, db_documento, html_final):
+        session.commit()
     session.refresh(db_documento)  # garante que retorna atualizado
-    return db_documento
+    return _documento_public(db_documento, html_final)
 
 
-@router.post("/express", status_code=HTTPStatus.CREATED, response_model=DocumentoPublic)
+@router.post(
+    "/express",
+    status_code=HTTPStatus.CREATED,
+    response_model=DocumentoPublic,
+    # Cada chamada gera um PDF (pandoc + WeasyPrint): além do orçamento por
+    # minuto, limita quantos renders do mesmo usuário rodam ao mesmo tempo
+    dependencies=[Depends(limite_por_usuario('render')), Depends(limitar_renders)],
+)
 def criar_documento_express(
     documento: DocumentoSchema,
+    response: Response,
     session: Session,
-    user: CurrentUser
+    user: CurrentUser,
+    settings: AppSettings
 ):  
     
     # Buscar o template no banco
@@ -111,50 +178,17 @@ def criar_documento_express(
     if not template:
         raise HTTPException(status_code=404, detail="Template não encontrado")
 
-    campos = template.campos
-    html_template = template.template_html  # aqui já é HTML salvo no banco
-
-    # Substituir placeholders {{campo}}
-    for campo in campos:
-        valor = documento.dados_contrato.get(campo["name"], "")
-        html_template = re.sub(rf"{{{{\s*{campo['name']}\s*}}}}", str(valor), html_template)
-
-    # Gerar nome do PDF
-    new_file_name = f"{uuid4()}-{documento.nome_documento.replace(' ', '-')}.pdf"
-
-    # Converter HTML → PDF (usando pypandoc + wkhtmltopdf)
-    pdf_file = f"/tmp/{new_file_name}"
-    pypandoc.convert_text(
-        html_template,
-        to="pdf",
-        format="html",
-        outputfile=pdf_file,
-        extra_args=["--pdf-engine=weasyprint", "--metadata", 'title="Contrato"']
-    )
+    # No modo express todos os valores vêm do payload
+    html_template = _gerar_html(template, documento.dados_contrato)
 
-    # Ler PDF em memória
-    with open(pdf_file, "rb") as f:
-        pdf_buffer = io.BytesIO(f.read())
-        pdf_buffer.seek(0)
-
-    # Upload no Cloudflare R2
-    s3_client = boto3.client(
-        "s3",
-        region_name='auto',
-        endpoint_url=f"https://{Settings().CLOUDFLARE_ACCOUNT_ID}.r2.cloudflarestorage.com",
-        aws_access_key_id=Settings().CLOUDFLARE_ACCESS_KEY_ID,
-        aws_secret_access_key=Settings().CLOUDFLARE_SECRET_ACCESS_KEY,
-    )
+    fila = settings.RENDER_MODE == 'fila'
+    pdf_url = ''
 
-    s3_client.upload_fileobj(
-        pdf_buffer,
-        Settings().BUCKET_NAME_DOCUMENTOS,
-        new_file_name,
-        ExtraArgs={'ContentType': 'application/pdf'}
-    )
-
-    # Montar URL pública (ajuste conforme seu setup de R2 Public Bucket)
-    pdf_url = f"https://pub-{Settings().CLOUDFLARE_BUCKET_ID}.r2.dev/{new_file_name}"
+    if not fila:
+        # Converter HTML → PDF (pandoc + WeasyPrint) e publicar no R2
+        pdf_url = put_documento_pdf(
+            nome_pdf(documento.nome_documento), html_para_pdf(html_template)
+        )
 
     # Persistência no banco
     db_documento = Documentos(
@@ -170,10 +204,18 @@ def criar_documento_express(
     )
 
     session.add(db_documento)
-    session.commit()
+    with _store_html(session, db_documento, html_template):
+        if fila:
+            # O render worker preenche pdf_url depois; o andamento fica em
+            # GET /documentos/{id}/render
+            session.flush()
+            render_jobs.registrar(session, db_documento)
+            response.status_code = HTTPStatus.ACCEPTED
+
+        session.commit()
     session.refresh(db_documento)
 
-    return db_documento
+    return _documento_public(db_documento, html_template)
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=DocumentoPaginated)
@@ -186,7 +228,7 @@ def documentos(  # noqa
     limit: int = Query(10, ge=1, le=100)
 ):
     
-    query = select(Documentos).where(Documentos.user_id == user.id)
+    query = select(*_SUMMARY_COLUMNS).where(Documentos.user_id == user.id)
 
     if nome:
         query = query.filter(Documentos.nome_documento.contains(nome))
@@ -197,7 +239,7 @@ def documentos(  # noqa
     total = session.scalar(select(func.count()).select_from(query.subquery()))
 
     offset = (page - 1) * limit
-    documentos = session.scalars(query.offset(offset).limit(limit)).all()
+    documentos = session.execute(query.offset(offset).limit(limit)).all()
 
     pages = (total + limit - 1) // limit if total else 1
 
@@ -206,12 +248,14 @@ def documentos(  # noqa
         'page': page,
         'size': limit,
         'pages': pages,
-        'documentos': documentos,
+        'documentos': [DocumentoSummary.model_validate(row, from_attributes=True) for row in documentos],
     }
 
 
 @router.get('/{documento_id}', status_code=HTTPStatus.OK, response_model=DocumentoPublic)
 def documento_details(  # noqa
+    request: Request,
+    response: Response,
     session: Session,
     documento_id: UUID,
     user: CurrentUser
@@ -224,8 +268,36 @@ def documento_details(  # noqa
             status_code=HTTPStatus.NOT_FOUND, detail='Documento não encontrado.'
         )
 
+    etag = make_etag('documento', db_documento.id, db_documento.updated_at.isoformat())
+
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_CONTROL_DOCUMENTOS)
+
+    set_cache_headers(response, etag, CACHE_CONTROL_DOCUMENTOS)
+
+    # O HTML (coluna deferred ou objeto no storage) só é lido aqui
+    return _documento_public(db_documento)
+
+
+@router.get('/{documento_id}/render', status_code=HTTPStatus.OK, response_model=RenderJobPublic)
+def documento_render(  # noqa
+    session: Session,
+    documento_id: UUID,
+    user: CurrentUser
+):
+    # Andamento do PDF enfileirado por /documentos/express (RENDER_MODE='fila')
+    row = session.execute(
+        select(RenderJob.status, RenderJob.tentativas, Documentos.pdf_url)
+        .join(Documentos, Documentos.id == RenderJob.documento_id)
+        .where(Documentos.id == documento_id, Documentos.user_id == user.id)
+    ).first()
+
+    if not row:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Render não encontrado.'
+        )
 
-    return db_documento
+    return RenderJobPublic.model_validate(row, from_attributes=True)
 
 
 @router.delete("/{documento_id}", status_code=HTTPStatus.OK, response_model=Message)
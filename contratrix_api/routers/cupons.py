@@ -6,28 +6,56 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from contratrix_api.database import get_session
-from contratrix_api.models import Cupom, User
-from contratrix_api.schemas import Message, CupomPaginated, CupomPublic, CupomUpdate, CupomSchema
-from contratrix_api.security import get_current_user
+from contratrix_api.models import Cupom
+from contratrix_api.routers.planos import catalogo_planos
+from contratrix_api.schemas import Message, CupomPaginated, CupomPublic, CupomUpdate, CupomSchema, CupomValidacao
+from contratrix_api.security import Principal, get_current_principal
 from contratrix_api.settings import Settings
+from contratrix_api.utils import cache_bus
+from contratrix_api.utils.cupons import (
+    CupomIndisponivel,
+    buscar_cupom_ativo,
+    calcular_valor_final,
+    invalidar_cache,
+    normalizar_codigo,
+    validar_cupom,
+)
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
 
 router = APIRouter(prefix='/cupons', tags=['Cupons'])
 
 
+def _verificar_codigo_livre(session, code: str, cupom_id: UUID | None = None):
+    # Mesma regra do índice ux_cupons_code_upper: o código normalizado é
+    # único entre os cupons não excluídos
+    query = select(Cupom.id).where(
+        func.upper(Cupom.code) == code, Cupom.status != 'deleted'
+    )
+    if cupom_id is not None:
+        query = query.where(Cupom.id != cupom_id)
+
+    if session.scalar(query.limit(1)):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Código de cupom em uso.',
+        )
+
+
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=CupomPublic)
 def create_cupom(
     plano: CupomSchema,
     session: Session,
     user: CurrentUser
 ):
+    code = normalizar_codigo(plano.code)
+    _verificar_codigo_livre(session, code)
 
     db_cupom = Cupom(
-        code=plano.code,
+        code=code,
         tipo_desconto=plano.tipo_desconto,
         valor_desconto=plano.valor_desconto,
         aplicavel=plano.aplicavel,
@@ -40,7 +68,10 @@ def create_cupom(
     )
 
     session.add(db_cupom)
+    session.flush()
+    cache_bus.notify(session, 'cupons', db_cupom.id)
     session.commit()
+    invalidar_cache()
     session.refresh(db_cupom)
 
     return db_cupom
@@ -80,6 +111,47 @@ def cupons(  # noqa
     }
 
 
+@router.get('/validar/{code}', status_code=HTTPStatus.OK, response_model=CupomValidacao)
+def validar(
+    code: str,
+    session: Session,
+    user: CurrentUser,
+    plano_id: UUID = Query(None)
+):
+    # Prévia do desconto para o front: usa o mesmo cache e o mesmo cálculo
+    # do checkout, sem resgatar o cupom
+    cupom = buscar_cupom_ativo(session, code)
+
+    try:
+        validar_cupom(cupom)
+    except CupomIndisponivel as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    resposta = CupomValidacao(
+        code=cupom.code,
+        tipo_desconto=cupom.tipo_desconto,
+        valor_desconto=cupom.valor_desconto,
+        aplicavel=cupom.aplicavel,
+        termino=cupom.termino,
+    )
+
+    if plano_id:
+        plano = next(
+            (p for p in catalogo_planos.get(session) if p.id == plano_id), None
+        )
+
+        if not plano:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail='Plano não encontrado.'
+            )
+
+        resposta.plano_id = plano.id
+        resposta.preco_cents = plano.preco_cents
+        resposta.valor_final_cents = calcular_valor_final(plano.preco_cents, cupom)
+
+    return resposta
+
+
 @router.get('/{cupom_id}', status_code=HTTPStatus.OK, response_model=CupomPublic)
 def cupom_details(  # noqa
     session: Session,
@@ -112,10 +184,22 @@ def patch_cupom(
             status_code=HTTPStatus.NOT_FOUND, detail='Cupom não encontrado.'
         )
 
-    for key, value in cupom.model_dump(exclude_unset=True).items():
+    dados = cupom.model_dump(exclude_unset=True)
+    if dados.get('code') is not None:
+        dados['code'] = normalizar_codigo(dados['code'])
+
+    # Trocar o código ou reativar um cupom excluído pode colidir
+    if dados.get('code') or dados.get('status'):
+        code = dados.get('code') or normalizar_codigo(db_cupom.code)
+        if dados.get('status', db_cupom.status) != 'deleted':
+            _verificar_codigo_livre(session, code, db_cupom.id)
+
+    for key, value in dados.items():
         setattr(db_cupom, key, value)
 
+    cache_bus.notify(session, 'cupons', db_cupom.id)
     session.commit()
+    invalidar_cache()
     session.refresh(db_cupom)
 
     return db_cupom
@@ -137,6 +221,8 @@ def delete_cupom(
 
     db_cupom.status = 'deleted'
 
+    cache_bus.notify(session, 'cupons', db_cupom.id)
     session.commit()
+    invalidar_cache()
 
     return {'message': 'Cupom deletado.'}
\ No newline at end of file
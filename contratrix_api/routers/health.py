@@ -0,0 +1,24 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, HTTPException
+
+from contratrix_api.schemas import Message
+from contratrix_api.utils.warmup import aquecimento
+
+router = APIRouter(prefix='/health', tags=['Health'])
+
+
+@router.get('/live', status_code=HTTPStatus.OK, response_model=Message)
+async def live():
+    # Só indica que o processo responde; não depende do banco
+    return {'message': 'ok'}
+
+
+@router.get('/ready', status_code=HTTPStatus.OK, response_model=Message)
+async def ready():
+    if not aquecimento.pronto:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Aquecendo.'
+        )
+
+    return {'message': 'ok'}
@@ -1,43 +1,50 @@
+from dataclasses import asdict
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
 
-from contratrix_api.database import get_session
-from contratrix_api.models import User, Item, Look
-from contratrix_api.schemas import Message, MetricsPublic
-from contratrix_api.security import (get_current_user)
+from contratrix_api.security import (
+    Principal,
+    get_current_principal,
+    get_hash_executor,
+)
+from contratrix_api.settings import get_settings
+from contratrix_api.utils import agendador
+from contratrix_api.utils.admissao import get_monitor
+from contratrix_api.utils.rate_limit import get_limite_render, get_rate_limiter
 
 router = APIRouter(prefix='/metrics', tags=['Metrics'])
-Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
 
 
-@router.get('/', status_code=HTTPStatus.OK, response_model=MetricsPublic)
-def Metrics(  # noqa
-    session: Session,
-    user: CurrentUser
-):  
-
-    if user.role not in ['admin', 'stylist']:
+@router.get('/', status_code=HTTPStatus.OK)
+async def metrics(user: CurrentUser):  # noqa
+    # Métricas operacionais deste processo (cada worker responde pelas suas).
+    # Async: o snapshot lê o limiter do threadpool, que é do event loop
+    if user.role != 'admin':
         raise HTTPException(
-            status_code=HTTPStatus.UNAUTHORIZED, detail='User unauthorized'
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Usuário não autorizado.',
         )
 
-    total_users = session.scalar(select(func.count()).select_from(User))
-    active_users = session.scalar(select(func.count()).select_from(User).where(User.status == 'active'))
-    active_clothes = session.scalar(select(func.count()).select_from(Item).where(Item.status == 'active'))
-    total_looks_generated = session.scalar(select(func.count()).select_from(Look).where(Look.status == 'generated'))
-    total_users_premium = session.scalar(select(func.count()).select_from(User).where(User.status == 'active', User.role == 'user', User.plan == 'premium'))
-    total_premium = session.scalar(select(func.count()).select_from(User).where(User.status == 'active', User.role != 'user', User.plan == 'premium'))
-
-    return { 
-        'total_users': total_users, 
-        'total_active_users': active_users,
-        'total_active_clothes': active_clothes,
-        'total_looks_generated': total_looks_generated,
-        'total_users_premium': total_users_premium,
-        'total_premium': total_premium
+    executor = get_hash_executor()
+    admissao = None
+    if get_settings().ADMISSAO_ENABLED:
+        admissao = get_monitor().snapshot()
+
+    return {
+        'admissao': admissao,
+        'rate_limit': {
+            'negadas': dict(get_rate_limiter().negadas),
+            'renders_negados': get_limite_render().negadas,
+        },
+        'hash_senhas': {
+            'pendentes': executor.pendentes,
+            'rejeitadas': executor.rejeitadas,
+        },
+        'tarefas': {
+            nome: asdict(tarefa.metricas)
+            for nome, tarefa in agendador.tarefas.items()
+        },
     }
@@ -1,24 +1,42 @@
 from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID, uuid4
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from contratrix_api.database import get_session
-from contratrix_api.models import Planos, User
+from contratrix_api.models import Planos
 from contratrix_api.schemas import Message, PlanoPaginated, PlanoPublic, PlanoUpdate, PlanoSchema
-from contratrix_api.security import get_current_user
+from contratrix_api.security import Principal, get_current_principal
 from contratrix_api.settings import Settings
+from contratrix_api.utils import cache_bus
+from contratrix_api.utils.catalog import Catalog, fingerprint, paginate
+from contratrix_api.utils.http_cache import (
+    CACHE_CONTROL_PLANOS,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
 
 router = APIRouter(prefix='/planos', tags=['Planos'])
 
 
+def _carregar_planos(session):
+    query = select(Planos).where(Planos.status != 'deleted').order_by(Planos.nome)
+    return [PlanoPublic.model_validate(plano, from_attributes=True) for plano in session.scalars(query)]
+
+
+catalogo_planos = Catalog(_carregar_planos)
+cache_bus.subscribe('planos', lambda chave: catalogo_planos.invalidate())
+
+
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=PlanoPublic)
 def create_plano(
     plano: PlanoSchema,
@@ -36,14 +54,20 @@ def create_plano(
     )
 
     session.add(db_planos)
+    session.flush()
+    cache_bus.notify(session, 'planos', db_planos.id)
     session.commit()
     session.refresh(db_planos)
 
+    catalogo_planos.invalidate()
+
     return db_planos
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=PlanoPaginated)
 def planos(  # noqa
+    request: Request,
+    response: Response,
     session: Session,
     user: CurrentUser,
     nome: str = Query(None),
@@ -51,29 +75,25 @@ def planos(  # noqa
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100)
 ):
-    
-    query = select(Planos).where(Planos.status != 'deleted')
+
+    planos = catalogo_planos.get(session)
 
     if nome:
-        query = query.filter(Planos.nome.contains(nome))
+        planos = [plano for plano in planos if nome in plano.nome]
 
     if status:
-        query = query.filter(Planos.status.contains(status))
+        planos = [plano for plano in planos if status in plano.status]
 
-    total = session.scalar(select(func.count()).select_from(query.subquery()))
+    # O ETag sai do próprio snapshot: igual em todos os workers para o
+    # mesmo conteúdo e calculado sem ir ao banco
+    etag = make_etag('planos', *fingerprint(planos), nome, status, page, limit)
 
-    offset = (page - 1) * limit
-    planos = session.scalars(query.offset(offset).limit(limit)).all()
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_CONTROL_PLANOS)
 
-    pages = (total + limit - 1) // limit if total else 1
+    set_cache_headers(response, etag, CACHE_CONTROL_PLANOS)
 
-    return {
-        'total': total,
-        'page': page,
-        'size': limit,
-        'pages': pages,
-        'planos': planos,
-    }
+    return paginate(planos, page, limit, 'planos')
 
 
 @router.get('/{plano_id}', status_code=HTTPStatus.OK, response_model=PlanoPublic)
@@ -111,9 +131,12 @@ def patch_plano(
     for key, value in plano.model_dump(exclude_unset=True).items():
         setattr(db_plano, key, value)
 
+    cache_bus.notify(session, 'planos', db_plano.id)
     session.commit()
     session.refresh(db_plano)
 
+    catalogo_planos.invalidate()
+
     return db_plano
 
 
@@ -133,6 +156,9 @@ def delete_plano(
 
     db_plano.status = 'deleted'
 
+    cache_bus.notify(session, 'planos', db_plano.id)
     session.commit()
 
+    catalogo_planos.invalidate()
+
     return {'message': 'Plano deletado.'}
\ No newline at end of file
@@ -1,24 +1,57 @@
 from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID, uuid4
-from fastapi import APIRouter, Depends, Query, HTTPException, File, Form, UploadFile
+from fastapi import APIRouter, Depends, Query, HTTPException, File, Form, UploadFile, Request, Response
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from contratrix_api.database import get_session
-from contratrix_api.models import Template, User
-from contratrix_api.schemas import Message, TemplatePublic, TemplateUpdate, TemplateSchema, TemplatePaginated, MessageUpload
-from contratrix_api.security import get_current_user
-from contratrix_api.settings import Settings
-import boto3
+from contratrix_api.models import Template
+from contratrix_api.schemas import Message, TemplatePublic, TemplateUpdate, TemplateSchema, TemplatePaginated, TemplateSummary, MessageUpload
+from contratrix_api.security import Principal, get_current_principal
+from contratrix_api.settings import Settings, get_settings
+from contratrix_api.utils import cache_bus
+from contratrix_api.utils.campos import compilar
+from contratrix_api.utils.catalog import Catalog, paginate
+from contratrix_api.utils.http_cache import (
+    CACHE_CONTROL_TEMPLATES,
+    etag_matches,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
+from contratrix_api.utils.rate_limit import limite_por_usuario
+from contratrix_api.utils.storage import get_s3_client
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
+AppSettings = Annotated[Settings, Depends(get_settings)]
 
 router = APIRouter(prefix='/templates', tags=['Templates'])
 
+# Colunas lidas pela listagem: só o que o TemplateSummary expõe, sem o HTML
+_SUMMARY_COLUMNS = [getattr(Template, campo) for campo in TemplateSummary.model_fields]
+
+
+def _carregar_templates(session):
+    query = select(*_SUMMARY_COLUMNS).where(Template.status != 'deleted').order_by(Template.nome)
+    return [TemplateSummary.model_validate(row, from_attributes=True) for row in session.execute(query)]
+
+
+catalogo_templates = Catalog(_carregar_templates)
+cache_bus.subscribe('templates', lambda chave: catalogo_templates.invalidate())
+
+
+def _validar_campos(campos: list[dict]):
+    # Mesmo compilador usado ao gerar documentos: um atributo que não existe
+    # no prestador/cliente é recusado aqui, e não na hora de gerar
+    try:
+        compilar(campos, '')
+    except ValueError as e:
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(e))
+
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=TemplatePublic)
 def create_template(
@@ -27,6 +60,7 @@ def create_template(
 ):
     
     campos_dict = [campo.dict() for campo in template.campos]
+    _validar_campos(campos_dict)
     
     db_template = Template(
         nome=template.nome, 
@@ -38,9 +72,13 @@ def create_template(
     )
 
     session.add(db_template)
+    session.flush()
+    cache_bus.notify(session, 'templates', db_template.id)
     session.commit()
     session.refresh(db_template)
 
+    catalogo_templates.invalidate()
+
     return db_template
 
 
@@ -54,37 +92,27 @@ def templates(  # noqa
     limit: int = Query(10, ge=1, le=100)
 ):
     
-    query = select(Template).where(Template.status != 'deleted')
+    templates = catalogo_templates.get(session)
 
     if nome:
-        query = query.filter(Template.nome.contains(nome))
+        templates = [template for template in templates if nome in template.nome]
 
     if tipo:
-        query = query.filter(Template.tipo.contains(tipo))
-
-    total = session.scalar(select(func.count()).select_from(query.subquery()))
+        templates = [template for template in templates if tipo in template.tipo]
 
-    offset = (page - 1) * limit
-    templates = session.scalars(query.offset(offset).limit(limit)).all()
-
-    pages = (total + limit - 1) // limit if total else 1
-
-    return {
-        'total': total,
-        'page': page,
-        'size': limit,
-        'pages': pages,
-        'templates': templates,
-    }
+    return paginate(templates, page, limit, 'templates')
 
 
 @router.get('/{template_id}', status_code=HTTPStatus.OK, response_model=TemplatePublic)
 def template_details(  # noqa
+    request: Request,
+    response: Response,
     session: Session,
     template_id: UUID,
     user: CurrentUser
 ):  
 
+    # template_html é deferred: aqui só as colunas leves são lidas
     db_template = session.query(Template).where(Template.id == template_id).first()
 
     if not db_template:
@@ -92,6 +120,12 @@ def template_details(  # noqa
             status_code=HTTPStatus.NOT_FOUND, detail='Template não encontrado.'
         )
 
+    etag = make_etag('template', db_template.id, db_template.updated_at.isoformat())
+
+    if etag_matches(request, etag):
+        return not_modified(etag, CACHE_CONTROL_TEMPLATES)
+
+    set_cache_headers(response, etag, CACHE_CONTROL_TEMPLATES)
 
     return db_template
 
@@ -111,42 +145,44 @@ def patch_template(
             status_code=HTTPStatus.NOT_FOUND, detail='Template não encontrado.'
         )
 
-    for key, value in template.model_dump(exclude_unset=True).items():
+    dados = template.model_dump(exclude_unset=True)
+    if dados.get('campos') is not None:
+        _validar_campos(dados['campos'])
+
+    for key, value in dados.items():
         setattr(db_template, key, value)
 
+    cache_bus.notify(session, 'templates', db_template.id)
     session.commit()
     session.refresh(db_template)
 
+    catalogo_templates.invalidate()
+
     return db_template
 
 
-@router.post('/upload', status_code=HTTPStatus.OK, response_model=MessageUpload)
+@router.post('/upload', status_code=HTTPStatus.OK, response_model=MessageUpload, dependencies=[Depends(limite_por_usuario('upload'))])
 def post_upload(
     session: Session,
     userCurrent: CurrentUser,
+    settings: AppSettings,
     file: UploadFile = File,
     file_old: str = Form(None)
 ):
 
-    s3_client = boto3.client(
-        "s3",
-        region_name='auto',
-        endpoint_url=f"https://{Settings().CLOUDFLARE_ACCOUNT_ID}.r2.cloudflarestorage.com",
-        aws_access_key_id=f"{Settings().CLOUDFLARE_ACCESS_KEY_ID}",
-        aws_secret_access_key=f"{Settings().CLOUDFLARE_SECRET_ACCESS_KEY}",
-    )
+    s3_client = get_s3_client()
 
     new_file_name = f"{uuid4()}-{file.filename.replace(' ', '-')}"
 
     s3_client.upload_fileobj(
         file.file,
-        f"{Settings().BUCKET_NAME_TEMPLATES}",
+        settings.BUCKET_NAME_TEMPLATES,
         new_file_name
     )
 
     if file_old:
         s3_client.delete_object(
-            Bucket=f"{Settings().BUCKET_NAME_TEMPLATES}",
+            Bucket=settings.BUCKET_NAME_TEMPLATES,
             Key=file_old
         )
 
@@ -169,6 +205,9 @@ def delete_template(
 
     db_template.status = 'deleted'
 
+    cache_bus.notify(session, 'templates', db_template.id)
     session.commit()
 
+    catalogo_templates.invalidate()
+
     return {'message': 'Template deletado.'}
\ No newline at end of file
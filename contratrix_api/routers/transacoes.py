@@ -6,15 +6,15 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from contratrix_api.database import get_session
-from contratrix_api.models import Transacoes, User
+from contratrix_api.models import Transacoes
 from contratrix_api.schemas import Message, TransacaoPaginated, TransacaoPublic, TransacaoUpdate, TransacaoSchema
-from contratrix_api.security import get_current_user
+from contratrix_api.security import Principal, get_current_principal
 from contratrix_api.settings import Settings
 
 router = APIRouter()
 
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
 
 router = APIRouter(prefix='/transacoes', tags=['Transacoes'])
 
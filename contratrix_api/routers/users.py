@@ -7,37 +7,69 @@ from uuid import UUID, uuid4
 from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from contratrix_api.database import get_session
 from contratrix_api.models import User, Prestador, PasswordResetToken
 from contratrix_api.schemas import Message, UserPublic, UserSchema, UserUpdate, UserUpdateAdmin, UserPaginated, UserRecoverPassword, UserUpdatePassword
 from contratrix_api.security import (
-    get_current_user,
-    get_password_hash,
+    Principal,
+    get_current_principal,
+    hash_password,
+    revogar_tokens,
+    versoes_token,
 )
-from contratrix_api.settings import Settings
+from contratrix_api.settings import Settings, get_settings
+from contratrix_api.utils.storage import get_s3_client
 from contratrix_api.utils.email import send_email
+from contratrix_api.utils.rate_limit import limite_por_ip, limite_por_usuario
+from contratrix_api.utils.reset_tokens import (
+    consumir_token,
+    invalidar_tokens,
+    token_pendente,
+)
 
-import boto3
 
 router = APIRouter(prefix='/users', tags=['Users'])
 Session = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_principal)]
+AppSettings = Annotated[Settings, Depends(get_settings)]
 
 
-@router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session: Session):
-    try:
-        db_user = session.scalar(select(User).where(User.email == user.email))
+def _user_public(db_user: User, avatar_prefix: str | None) -> UserPublic:
+    # Monta a resposta a partir da entidade sem alterá-la: a URL pública do
+    # avatar é projetada só no schema. Com avatar_prefix None a foto é omitida.
+    user_public = UserPublic.model_validate(db_user, from_attributes=True)
+
+    if not user_public.user_photo:
+        return user_public
+
+    user_photo = avatar_prefix + user_public.user_photo if avatar_prefix is not None else ''
+
+    return user_public.model_copy(update={'user_photo': user_photo})
+
+
+@router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic, dependencies=[Depends(limite_por_ip('cadastro'))])
+async def create_user(user: UserSchema, session: Session):
+    # E-mail repetido é recusado antes do Argon2, que é a parte cara do
+    # cadastro; o hash roda no executor dedicado e o resto no threadpool
+    await run_in_threadpool(_verificar_email_livre, user.email, session)
+
+    hashed_password = await hash_password(user.password)
+
+    return await run_in_threadpool(_create_user, user, session, hashed_password)
+
 
-        if db_user:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='E-mail em uso. Tente recuperar a senha ou usar outro e-mail',
-            )
+def _verificar_email_livre(email: str, session):
+    if session.scalar(select(User.id).where(User.email == email)):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='E-mail em uso. Tente recuperar a senha ou usar outro e-mail',
+        )
 
-        hashed_password = get_password_hash(user.password)
 
+def _create_user(user: UserSchema, session, hashed_password: str):
+    try:
         termos = {'aceito': user.termos.aceito, 'data_aceite': user.termos.data_aceite.isoformat()}
 
         db_user = User(
@@ -94,7 +126,8 @@ def create_user(user: UserSchema, session: Session):
 @router.get('/me', status_code=HTTPStatus.OK, response_model=UserPublic)
 def user_details(  # noqa
     session: Session,
-    user: CurrentUser
+    user: CurrentUser,
+    settings: AppSettings
 ):
     db_user = session.query(User).filter_by(id=user.id).first()
 
@@ -103,10 +136,7 @@ def user_details(  # noqa
             status_code=HTTPStatus.NOT_FOUND, detail='Usuário não encontrado.'
         )
 
-    if db_user.user_photo and db_user.user_photo.strip().lower() not in ['null', 'none', '']:
-        db_user.user_photo = Settings().CLOUDFLARE_AVATAR + db_user.user_photo
-
-    return db_user
+    return _user_public(db_user, settings.AVATAR_URL_PREFIX)
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=UserPaginated)
@@ -145,10 +175,6 @@ def Users(  # noqa
     offset = (page - 1) * limit
     users = session.scalars(query.offset(offset).limit(limit)).all()
 
-    for user in users:
-        if user.user_photo and user.user_photo.strip().lower() not in ['null', 'none', '']:
-            user.user_photo = ''
-
     pages = (total + limit - 1) // limit if total else 1
 
     return {
@@ -156,7 +182,7 @@ def Users(  # noqa
         'page': page,
         'size': limit,
         'pages': pages,
-        'users': users
+        'users': [_user_public(db_user, None) for db_user in users]
     }
 
 
@@ -164,7 +190,8 @@ def Users(  # noqa
 def user_details(  # noqa
     session: Session,
     user_id: UUID,
-    user: CurrentUser
+    user: CurrentUser,
+    settings: AppSettings
 ):
     db_user = session.query(User).filter_by(id=user_id).first()
 
@@ -179,13 +206,10 @@ def user_details(  # noqa
             detail='Usuário não autorizado.'
         )
 
-    if db_user.user_photo and db_user.user_photo.strip().lower() not in ['null', 'none', '']:
-        if user.role == 'user' and user_id == db_user.id:
-            db_user.user_photo = Settings().CLOUDFLARE_AVATAR + db_user.user_photo
-        else:
-            db_user.user_photo = ''
+    if user.role == 'user' and user_id == db_user.id:
+        return _user_public(db_user, settings.AVATAR_URL_PREFIX)
 
-    return db_user
+    return _user_public(db_user, None)
 
 
 @router.patch('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
@@ -193,7 +217,8 @@ def patch_user(
     user_id: UUID,
     user: UserUpdate,
     session: Session,
-    userCurrent: CurrentUser
+    userCurrent: CurrentUser,
+    settings: AppSettings
 ):
     db_user = session.query(User).filter_by(id=user_id).first()
 
@@ -214,10 +239,7 @@ def patch_user(
     session.commit()
     session.refresh(db_user)
 
-    if db_user.user_photo and db_user.user_photo.strip().lower() not in ['null', 'none', '']:
-        db_user.user_photo = Settings().CLOUDFLARE_AVATAR + db_user.user_photo
-
-    return db_user
+    return _user_public(db_user, settings.AVATAR_URL_PREFIX)
 
 
 @router.patch('/web/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
@@ -225,7 +247,8 @@ def patch_user_admin(
     user_id: UUID,
     user: UserUpdateAdmin,
     session: Session,
-    userCurrent: CurrentUser
+    userCurrent: CurrentUser,
+    settings: AppSettings
 ):
     
     if userCurrent.role != 'admin':
@@ -241,23 +264,28 @@ def patch_user_admin(
             status_code=HTTPStatus.NOT_FOUND, detail='Usuário não encontrado.'
         )
 
-    for key, value in user.model_dump(exclude_unset=True).items():
+    alteracoes = user.model_dump(exclude_unset=True)
+
+    for key, value in alteracoes.items():
         setattr(db_user, key, value)
 
+    # Bloqueio pelo admin derruba as sessões abertas do usuário
+    if 'status' in alteracoes:
+        revogar_tokens(session, db_user.id)
+
     session.commit()
+    versoes_token.invalidate()
     session.refresh(db_user)
 
-    if db_user.user_photo and db_user.user_photo.strip().lower() not in ['null', 'none', '']:
-        db_user.user_photo = Settings().CLOUDFLARE_AVATAR + db_user.user_photo
+    return _user_public(db_user, settings.AVATAR_URL_PREFIX)    
 
-    return db_user    
 
-
-@router.put('/{user_id}/upload', status_code=HTTPStatus.OK, response_model=Message)
+@router.put('/{user_id}/upload', status_code=HTTPStatus.OK, response_model=Message, dependencies=[Depends(limite_por_usuario('upload'))])
 def put_user_upload(
     user_id: UUID,
     session: Session,
     userCurrent: CurrentUser,
+    settings: AppSettings,
     file: UploadFile = File,
     file_old: str = Form(None)
 ):
@@ -273,25 +301,19 @@ def put_user_upload(
             detail='Usuário não encontrado.'
         )
 
-    s3_client = boto3.client(
-        "s3",
-        region_name='auto',
-        endpoint_url=f"https://{Settings().CLOUDFLARE_ACCOUNT_ID}.r2.cloudflarestorage.com",
-        aws_access_key_id=f"{Settings().CLOUDFLARE_ACCESS_KEY_ID}",
-        aws_secret_access_key=f"{Settings().CLOUDFLARE_SECRET_ACCESS_KEY}",
-    )
+    s3_client = get_s3_client()
 
     new_file_name = f"{uuid4()}-{file.filename.replace(' ', '-')}"
 
     s3_client.upload_fileobj(
         file.file,
-        f"{Settings().BUCKET_NAME_AVATAR}",
+        settings.BUCKET_NAME_AVATAR,
         new_file_name
     )
 
     if file_old:
         s3_client.delete_object(
-            Bucket=f"{Settings().BUCKET_NAME_AVATAR}",
+            Bucket=settings.BUCKET_NAME_AVATAR,
             Key=file_old
         )
 
@@ -326,13 +348,15 @@ def delete_user(
     db_user.email = None
     db_user.telefone = None
     db_user.aceite = None
+    revogar_tokens(session, db_user.id)
 
     session.commit()
+    versoes_token.invalidate()
 
     return {'message': 'User deleted'}
 
 
-@router.post('/recover-password', status_code=HTTPStatus.CREATED, response_model=Message)
+@router.post('/recover-password', status_code=HTTPStatus.CREATED, response_model=Message, dependencies=[Depends(limite_por_ip('recuperacao'))])
 def recover_password_user(user: UserRecoverPassword, session: Session):
     reset_code = str(random.randint(100000, 999999))
     expires_at = datetime.utcnow() + timedelta(minutes=10)
@@ -344,10 +368,7 @@ def recover_password_user(user: UserRecoverPassword, session: Session):
             status_code=HTTPStatus.NOT_FOUND, detail='Usuário não encontrado.'
         )
 
-    session.query(PasswordResetToken).filter(
-        PasswordResetToken.user_id == db_user.id,
-        PasswordResetToken.used == False
-    ).update({ "used": True })
+    invalidar_tokens(session, db_user.id)
 
     token = PasswordResetToken(
         code=reset_code,
@@ -363,32 +384,46 @@ def recover_password_user(user: UserRecoverPassword, session: Session):
     return {'message': 'Código de recuperação enviado por email'}
 
 
-@router.post('/reset-password', status_code=HTTPStatus.OK, response_model=Message)
-def reset_password_user(user: UserUpdatePassword, session: Session):
-    db_user = session.query(User).filter_by(email=user.email).first()
+@router.post('/reset-password', status_code=HTTPStatus.OK, response_model=Message, dependencies=[Depends(limite_por_ip('recuperacao'))])
+async def reset_password_user(user: UserUpdatePassword, session: Session):
+    # Usuário e código são conferidos antes do Argon2, como no cadastro:
+    # tentativas com código errado não ocupam o executor de hash
+    user_id = await run_in_threadpool(_verificar_codigo, user, session)
 
-    if not db_user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado.")
+    hashed_password = await hash_password(user.password)
 
-    db_token = (
-        session.query(PasswordResetToken)
-        .filter_by(user_id=db_user.id, code=user.code, used=False)
-        .filter(PasswordResetToken.expires_at > datetime.utcnow())
-        .order_by(PasswordResetToken.created_at.desc())
-        .first()
+    return await run_in_threadpool(
+        _reset_password_user, user, session, user_id, hashed_password
     )
 
-    if not db_token:
+
+def _verificar_codigo(user: UserUpdatePassword, session) -> UUID:
+    user_id = session.scalar(select(User.id).where(User.email == user.email))
+
+    if not user_id:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado.")
+
+    if not token_pendente(session, user_id, user.code):
         raise HTTPException(status_code=400, detail="Código inválido ou expirado.")
 
-    db_user.password = get_password_hash(user.password)
-    session.commit()
+    return user_id
+
+
+def _reset_password_user(
+    user: UserUpdatePassword, session, user_id: UUID, hashed_password: str
+):
+    db_user = session.get(User, user_id)
+
+    # Consumo atômico: duas requisições com o mesmo código passam pela
+    # leitura acima, mas só uma troca a senha
+    if not consumir_token(session, db_user.id, user.code):
+        raise HTTPException(status_code=400, detail="Código inválido ou expirado.")
 
-    session.query(PasswordResetToken).filter(
-        PasswordResetToken.user_id == db_user.id,
-        PasswordResetToken.used == False
-    ).update({ "used": True })
+    # Token consumido, senha nova e revogação das sessões no mesmo commit
+    db_user.password = hashed_password
+    revogar_tokens(session, db_user.id)
     session.commit()
+    versoes_token.invalidate()
 
     #send_email(db_user.name, user.email, 15, { 'name': db_user.name })
 
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Union
+from typing import List, Literal, Optional, Dict, Union
 from uuid import UUID 
-from pydantic import BaseModel, EmailStr, HttpUrl, ConfigDict
+from pydantic import BaseModel, EmailStr, HttpUrl, ConfigDict, field_validator
 
 
 class Message(BaseModel):
@@ -13,14 +13,6 @@ class MessageUpload(BaseModel):
     image: str
 
 
-class MetricsPublic(BaseModel):
-    total_users: int
-    total_active_users: int
-    total_active_clothes: int
-    total_looks_generated: int
-    total_users_premium: int
-    total_premium: int
-
 # Termos
 class TermosSchema(BaseModel):
     aceito: bool
@@ -70,11 +62,18 @@ class UserPublic(BaseModel):
     inicio_plano: datetime | None
     fim_plano: datetime | None
     assinatura_id: str | None
-    plano_id: str | None
+    plano_id: UUID | None
     status: str
     created_at: datetime
     updated_at: datetime
 
+    @field_validator('user_photo', mode='before')
+    @classmethod
+    def normalize_user_photo(cls, value):
+        if not value or value.strip().lower() in ['null', 'none']:
+            return ''
+        return value
+
 
 class UserList(BaseModel):
     users: list[UserPublic]
@@ -234,6 +233,13 @@ class ClienteUpdate(BaseModel):
 class CampoTemplate(BaseModel):
     name: str
     label: str | None = None
+    # Sem origem, o campo é procurado no prestador, no cliente e no payload
+    origem: Literal['prestador', 'cliente', 'dados'] | None = None
+    atributo: str | None = None
+    obrigatorio: bool = False
+    tipo: Literal['texto', 'numero', 'inteiro', 'data', 'email'] = 'texto'
+    # Nome em utils.formatos.FORMATOS (cpf, brl_centavos, data_extenso, ...)
+    formato: str | None = None
 
 
 class TemplateSchema(BaseModel):
@@ -257,12 +263,23 @@ class TemplatePublic(BaseModel):
     updated_at: datetime
 
 
+class TemplateSummary(BaseModel):
+    id: UUID
+    nome: str
+    tipo: str
+    campos: List[CampoTemplate]
+    template_url: str | None
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+
 class TemplatePaginated(BaseModel):
     total: int
     page: int
     size: int
     pages: int
-    templates: List[TemplatePublic]
+    templates: List[TemplateSummary]
 
 
 class TemplateUpdate(BaseModel):
@@ -299,12 +316,32 @@ class DocumentoPublic(BaseModel):
     updated_at: datetime
 
 
+class DocumentoSummary(BaseModel):
+    id: UUID
+    nome_documento: str | None
+    tipo: str
+    modo: str
+    pdf_url: str | None
+    status: str
+    user_id: UUID
+    cliente_id: Optional[UUID] = None
+    template_id: UUID
+    created_at: datetime
+    updated_at: datetime
+
+
 class DocumentoPaginated(BaseModel):
     total: int
     page: int
     size: int
     pages: int
-    documentos: List[DocumentoPublic]
+    documentos: List[DocumentoSummary]
+
+
+class RenderJobPublic(BaseModel):
+    status: str
+    tentativas: int
+    pdf_url: str | None
 
 
 class DocumentoUpdate(BaseModel):
@@ -320,6 +357,11 @@ class DocumentoUpdate(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class RefreshTokenSchema(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -433,6 +475,7 @@ class CupomPublic(BaseModel):
     termino: datetime
     observacao: str | None = None
     status: str
+    usados: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -445,6 +488,17 @@ class CupomPaginated(BaseModel):
     cupons: List[CupomPublic]
 
 
+class CupomValidacao(BaseModel):
+    code: str
+    tipo_desconto: str
+    valor_desconto: int
+    aplicavel: str
+    termino: datetime
+    plano_id: UUID | None = None
+    preco_cents: int | None = None
+    valor_final_cents: int | None = None
+
+
 class CupomUpdate(BaseModel):
     code: str | None = None
     tipo_desconto: str | None = None
@@ -458,6 +512,16 @@ class CupomUpdate(BaseModel):
     status: str | None = None
 
 
+# Retorno imediato do checkout; checkout_url chega depois, pelo outbox
+class CheckoutPendente(BaseModel):
+    id: UUID
+    tipo_transacao: str
+    valor_cents: int
+    status: str
+    pagarme_transacao_id: str
+    checkout_url: str | None = None
+
+
 # Dados Checkout Avulso
 class CheckoutSchema(BaseModel):
     userId: UUID
@@ -1,63 +1,225 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from http import HTTPStatus
+from uuid import UUID
 from zoneinfo import ZoneInfo
 
+import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-import jwt
+from jwt.algorithms import get_default_algorithms
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from pwdlib import PasswordHash
-from sqlalchemy import select
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from contratrix_api.database import get_session
 from contratrix_api.models import User
-from contratrix_api.schemas import TokenData
-from contratrix_api.settings import Settings
+from contratrix_api.settings import get_settings
+from contratrix_api.utils import cache_bus, refresh_tokens
+from contratrix_api.utils.catalog import Catalog
+from contratrix_api.utils.executor import ExecutorLimitado, ExecutorSaturado
+from contratrix_api.utils.token_cache import TokenCache
+
+
+@dataclass(frozen=True)
+class JwtKeys:
+    algorithm: str
+    # None num serviço que só valida tokens (tem apenas a chave pública)
+    signing_key: object | None
+    verification_key: object
+
+
+@lru_cache
+def get_jwt_keys() -> JwtKeys:
+    # Chaves convertidas uma única vez para os objetos do cryptography; o
+    # PyJWT aceita esses objetos direto e pula o parse do PEM a cada token.
+    # HS* usa SECRET_KEY; RS*/PS*/ES*/EdDSA usam JWT_PRIVATE_KEY (opcional)
+    # e JWT_PUBLIC_KEY em PEM.
+    settings = get_settings()
+    algorithm = get_default_algorithms()[settings.ALGORITHM]
+
+    if settings.ALGORITHM.startswith('HS'):
+        key = algorithm.prepare_key(settings.SECRET_KEY)
+        return JwtKeys(settings.ALGORITHM, key, key)
+
+    signing_key = None
+    if settings.JWT_PRIVATE_KEY:
+        signing_key = algorithm.prepare_key(settings.JWT_PRIVATE_KEY)
+
+    return JwtKeys(
+        settings.ALGORITHM,
+        signing_key,
+        algorithm.prepare_key(settings.JWT_PUBLIC_KEY),
+    )
+
 
-settings = Settings()
-pwd_context = PasswordHash.recommended()
+@lru_cache
+def get_token_cache() -> TokenCache:
+    return TokenCache(get_settings().TOKEN_CACHE_SIZE)
 
 
 def create_access_token(data: dict):
+    settings = get_settings()
+    keys = get_jwt_keys()
     to_encode = data.copy()
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
     to_encode.update({'exp': expire})
     encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+        to_encode, keys.signing_key, algorithm=keys.algorithm
     )
     return encoded_jwt
 
 
-def create_refresh_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
-        days=settings.REFRESH_TOKEN_EXPIRE_DAYS
-    )
-    to_encode.update({'exp': expire})
-    encoded_jwt = InvalidTokenError(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+def decode_access_token(token: str) -> dict:
+    # Clientes mobile repetem o mesmo token muitas vezes por minuto: a
+    # assinatura é verificada uma vez e as claims ficam no LRU até o exp
+    cache = get_token_cache()
+
+    payload = cache.get(token)
+    if payload is None:
+        keys = get_jwt_keys()
+        payload = jwt.decode(
+            token,
+            keys.verification_key,
+            algorithms=[keys.algorithm],
+            options={'require': ['exp']},
+        )
+        cache.put(token, payload)
+
+    return payload
+
+
+@lru_cache
+def get_password_context() -> PasswordHash:
+    # Hashes gravados com outros parâmetros continuam válidos e são
+    # regravados no próximo login (verify_and_update_password)
+    settings = get_settings()
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        ),
+    ))
+
+
+@lru_cache
+def get_hash_executor() -> ExecutorLimitado:
+    settings = get_settings()
+    return ExecutorLimitado(
+        'argon2',
+        workers=settings.PASSWORD_HASH_WORKERS,
+        max_pendentes=settings.PASSWORD_HASH_MAX_PENDING,
     )
-    return encoded_jwt
 
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return get_password_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
+
+
+async def _run_hash(funcao, *args):
+    try:
+        return await get_hash_executor().run(funcao, *args)
+    except ExecutorSaturado:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Muitas requisições. Tente novamente em instantes.',
+            headers={'Retry-After': '1'},
+        )
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hash(get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    # Devolve (válida, novo_hash); novo_hash vem preenchido quando o hash
+    # gravado usa parâmetros diferentes dos configurados
+    return await _run_hash(
+        get_password_context().verify_and_update,
+        plain_password,
+        hashed_password,
+    )
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
-async def get_current_user(
+@dataclass(frozen=True)
+class Principal:
+    # Identidade autenticada, montada só a partir das claims do access token
+    id: UUID
+    role: str
+    email: str
+    token_version: int
+
+
+def access_token_claims(user: User) -> dict:
+    return {
+        'sub': user.email,
+        'uid': str(user.id),
+        'role': user.role,
+        'tv': user.token_version,
+    }
+
+
+def _carregar_versoes(session):
+    # Só usuários que já tiveram tokens revogados; os demais estão na versão 0
+    return session.execute(
+        select(User.id, User.token_version).where(User.token_version > 0)
+    ).all()
+
+
+versoes_token = Catalog(_carregar_versoes)
+# Canal próprio: eventos de outras entidades não mudam token_version e
+# não devem derrubar o mapa de todos os workers
+cache_bus.subscribe('tokens', lambda chave: versoes_token.invalidate())
+_mapa_versoes: tuple[tuple | None, dict] = (None, {})
+
+
+def versao_token(session, user_id: UUID) -> int:
+    global _mapa_versoes  # noqa: PLW0603
+
+    itens = versoes_token.get(session)
+    if _mapa_versoes[0] is not itens:
+        _mapa_versoes = (itens, dict(itens))
+
+    return _mapa_versoes[1].get(user_id, 0)
+
+
+def revogar_tokens(session, user_id: UUID):
+    # Invalida todos os access e refresh tokens do usuário. Depois do
+    # commit o chamador deve chamar versoes_token.invalidate(); os outros
+    # workers são avisados pelo cache bus.
+    session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_version=User.token_version + 1)
+    )
+    refresh_tokens.revogar_do_usuario(session, user_id)
+    cache_bus.notify(session, 'tokens', user_id)
+
+
+def get_current_principal(
     session: Session = Depends(get_session),
     token: str = Depends(oauth2_scheme),
-):
+) -> Principal:
+    # Caminho comum sem consulta ao banco: claims do token + mapa de
+    # versões em memória. A sessão só é usada ao recarregar o mapa ou para
+    # tokens antigos, emitidos antes das claims uid/role/tv. Síncrona de
+    # propósito: o FastAPI a executa no threadpool, então essas consultas
+    # não bloqueiam o event loop.
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -65,23 +227,50 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        email: str = payload.get('sub')
-        if not email:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        payload = decode_access_token(token)
+    except ExpiredSignatureError:
+        raise credentials_exception
     except InvalidTokenError:
         raise credentials_exception
-    except ExpiredSignatureError:
+
+    email = payload.get('sub')
+    if not email:
         raise credentials_exception
 
-    user = session.scalar(
-        select(User).where(User.email == token_data.email)
-    )
+    if 'uid' not in payload:
+        user = session.scalar(select(User).where(User.email == email))
+        if user is None:
+            raise credentials_exception
+        return Principal(user.id, user.role, user.email, user.token_version)
 
-    if user is None:
+    try:
+        principal = Principal(
+            id=UUID(payload['uid']),
+            role=payload['role'],
+            email=email,
+            token_version=int(payload['tv']),
+        )
+    except (KeyError, TypeError, ValueError):
         raise credentials_exception
 
+    if principal.token_version != versao_token(session, principal.id):
+        raise credentials_exception
+
+    return principal
+
+
+def get_current_user(
+    session: Session = Depends(get_session),
+    principal: Principal = Depends(get_current_principal),
+):
+    # Para handlers que precisam da linha completa do usuário
+    user = session.get(User, principal.id)
+
+    if user is None or user.status == 'deleted':
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Could not validate credentials',
+            headers={'WWW-Authenticate': 'Bearer'},
+        )
+
     return user
@@ -1,3 +1,5 @@
+from functools import cached_property, lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +12,9 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     SECRET_KEY: str
     ALGORITHM: str
+    JWT_PRIVATE_KEY: str = ''
+    JWT_PUBLIC_KEY: str = ''
+    TOKEN_CACHE_SIZE: int = 4096
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
     CLOUDFLARE_ACCOUNT_ID: str
@@ -17,9 +22,88 @@ class Settings(BaseSettings):
     CLOUDFLARE_SECRET_ACCESS_KEY: str
     CLOUDFLARE: str
     CLOUDFLARE_AVATAR: str
+    CLOUDFLARE_BUCKET_ID: str
     BREVO_TOKEN: str
     BUCKET_NAME_TEMPLATES: str
     BUCKET_NAME_LOGOS: str
     BUCKET_NAME_AVATAR: str
     BUCKET_NAME_DOCUMENTOS: str
+    DOCUMENTOS_HTML_STORAGE: str = 'db'
+    DOCUMENTOS_HTML_DIR: str = ''
+    CATALOGO_TTL_SECONDS: int = 60
+    CACHE_BUS_ENABLED: bool = True
+    CUPOM_CACHE_TTL_SECONDS: int = 60
+    CUPOM_CACHE_SIZE: int = 1024
+    PAGARME_API_URL: str = 'https://api.pagar.me/1'
+    PAGARME_API_KEY: str = ''
+    PAGARME_TIMEOUT_SECONDS: float = 10.0
+    PAGARME_MAX_CONNECTIONS: int = 20
+    PAGARME_POSTBACK_URL: str = 'https://seuservidor.com/webhook/pagarme'
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_CONCURRENCY: int = 10
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_TENTATIVAS: int = 8
+    OUTBOX_POLL_SECONDS: float = 1.0
+    TAREFAS_ENABLED: bool = True
+    EXPIRAR_PLANOS_INTERVAL_SECONDS: int = 300
+    EXPIRAR_PLANOS_BATCH_SIZE: int = 500
+    PURGAR_RESET_TOKENS_INTERVAL_SECONDS: int = 3600
+    PURGAR_RESET_TOKENS_BATCH_SIZE: int = 1000
+    PURGAR_REFRESH_TOKENS_INTERVAL_SECONDS: int = 3600
+    PURGAR_REFRESH_TOKENS_BATCH_SIZE: int = 1000
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Orçamentos no formato 'requisições/segundos' (utils/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = 'memory'
+    RATE_LIMIT_LOGIN: str = '10/60'
+    RATE_LIMIT_REFRESH: str = '30/60'
+    RATE_LIMIT_CADASTRO: str = '5/3600'
+    RATE_LIMIT_RECUPERACAO: str = '5/900'
+    RATE_LIMIT_RENDER: str = '30/60'
+    RATE_LIMIT_UPLOAD: str = '20/60'
+    RENDER_MAX_CONCORRENTES: int = 2
+    # IPs/redes dos proxies cujo X-Forwarded-For é aceito, separados por
+    # vírgula ('*' para qualquer um); vazio ignora o header
+    RATE_LIMIT_PROXIES_CONFIAVEIS: str = ''
+    PURGAR_RATE_LIMIT_INTERVAL_SECONDS: int = 600
+    PURGAR_RATE_LIMIT_BATCH_SIZE: int = 1000
+    # Admissão e descarte de carga (utils/admissao.py)
+    ADMISSAO_ENABLED: bool = True
+    ADMISSAO_MAX_EM_VOO: int = 200
+    ADMISSAO_MAX_FILA_THREADPOOL: int = 40
+    ADMISSAO_MAX_LAG_MS: float = 250.0
+    ADMISSAO_FRACAO_BAIXA_PRIORIDADE: float = 0.5
+    # 'local': /documentos/express gera o PDF na própria requisição;
+    # 'fila': só enfileira em render_jobs para o render worker
+    RENDER_MODE: str = 'local'
+    RENDER_WORKER_CONCURRENCY: int = 2
+    RENDER_WORKER_MAX_TENTATIVAS: int = 3
+    RENDER_WORKER_POLL_SECONDS: float = 1.0
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 5
+    # Módulos importados no aquecimento, separados por vírgula
+    WARMUP_IMPORTS: str = 'pypandoc'
+
+    # Valores derivados, calculados uma única vez por processo
+    @cached_property
+    def R2_ENDPOINT_URL(self) -> str:
+        return f'https://{self.CLOUDFLARE_ACCOUNT_ID}.r2.cloudflarestorage.com'
+
+    @cached_property
+    def AVATAR_URL_PREFIX(self) -> str:
+        return self.CLOUDFLARE_AVATAR
+
+    @cached_property
+    def DOCUMENTOS_PUBLIC_URL(self) -> str:
+        return f'https://pub-{self.CLOUDFLARE_BUCKET_ID}.r2.dev'
+
 
+@lru_cache
+def get_settings() -> Settings:
+    # O .env é lido apenas na primeira chamada; depois disso todo o
+    # processo compartilha a mesma instância.
+    return Settings()
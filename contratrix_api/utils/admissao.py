@@ -0,0 +1,164 @@
+import asyncio
+from collections import defaultdict
+from functools import lru_cache
+
+import anyio.to_thread
+from fastapi.responses import ORJSONResponse
+
+from contratrix_api.settings import get_settings
+
+# Nunca descartadas: perder um postback ou um checkout custa dinheiro, e
+# um probe recusado tiraria o worker do ar justamente sob carga
+ROTAS_PROTEGIDAS = ('/webhook/', '/checkout/', '/health/')
+# Descartadas primeiro: podem ser repetidas sem prejuízo
+ROTAS_BAIXA_PRIORIDADE = ('/metrics',)
+
+
+def classificar(method: str, path: str) -> str:
+    if path.startswith(ROTAS_PROTEGIDAS):
+        return 'protegida'
+
+    if path.startswith(ROTAS_BAIXA_PRIORIDADE):
+        return 'baixa'
+
+    # Listagens: GET na raiz de um recurso (/documentos/, /clientes/, ...)
+    if method == 'GET' and path != '/' and '/' not in path.strip('/'):
+        return 'baixa'
+
+    return 'normal'
+
+
+class MonitorCarga:
+    """Mede a saturação do processo e decide quais requisições admitir.
+
+    A pressão é a maior razão entre o valor atual e o limite de cada sinal:
+    requisições em voo, fila do threadpool do Starlette e atraso do event
+    loop. Rotas de baixa prioridade são recusadas a partir de
+    `fracao_baixa` da pressão; as normais, quando algum limite é atingido.
+    """
+
+    def __init__(
+        self,
+        max_em_voo: int,
+        max_fila: int,
+        max_lag: float,
+        fracao_baixa: float = 0.5,
+        intervalo: float = 0.1,
+    ):
+        self.max_em_voo = max_em_voo
+        self.max_fila = max_fila
+        self.max_lag = max_lag
+        self.fracao_baixa = fracao_baixa
+        self.intervalo = intervalo
+        self.em_voo = 0
+        self.lag = 0.0
+        self.admitidas: dict[str, int] = defaultdict(int)
+        self.rejeitadas: dict[str, int] = defaultdict(int)
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _limiter():
+        return anyio.to_thread.current_default_thread_limiter()
+
+    def fila_threadpool(self) -> int:
+        return self._limiter().statistics().tasks_waiting
+
+    def pressao(self) -> float:
+        return max(
+            self.em_voo / self.max_em_voo,
+            self.fila_threadpool() / self.max_fila,
+            self.lag / self.max_lag,
+        )
+
+    def admitir(self, prioridade: str) -> bool:
+        if prioridade != 'protegida':
+            limite = self.fracao_baixa if prioridade == 'baixa' else 1.0
+
+            if self.pressao() >= limite:
+                self.rejeitadas[prioridade] += 1
+                return False
+
+        self.admitidas[prioridade] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        limiter = self._limiter()
+        return {
+            'em_voo': self.em_voo,
+            'threads_ocupadas': limiter.borrowed_tokens,
+            'threads_total': limiter.total_tokens,
+            'fila_threadpool': self.fila_threadpool(),
+            'lag_ms': round(self.lag * 1000, 2),
+            'pressao': round(self.pressao(), 3),
+            'admitidas': dict(self.admitidas),
+            'rejeitadas': dict(self.rejeitadas),
+        }
+
+    async def _medir_lag(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            inicio = loop.time()
+            await asyncio.sleep(self.intervalo)
+            self.lag = max(0.0, loop.time() - inicio - self.intervalo)
+
+    def start(self):
+        self._task = asyncio.create_task(self._medir_lag())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+@lru_cache
+def get_monitor() -> MonitorCarga:
+    settings = get_settings()
+    return MonitorCarga(
+        max_em_voo=settings.ADMISSAO_MAX_EM_VOO,
+        max_fila=settings.ADMISSAO_MAX_FILA_THREADPOOL,
+        max_lag=settings.ADMISSAO_MAX_LAG_MS / 1000,
+        fracao_baixa=settings.ADMISSAO_FRACAO_BAIXA_PRIORIDADE,
+    )
+
+
+_SOBRECARGA = ORJSONResponse(
+    {'message': 'Servidor sobrecarregado. Tente novamente em instantes.'},
+    status_code=503,
+    headers={'Retry-After': '1'},
+)
+
+
+class AdmissaoMiddleware:
+    """Recusa com 503 imediato o que o processo não vai conseguir atender.
+
+    Middleware ASGI puro, para que a recusa não passe pelo threadpool nem
+    pela pilha de dependências das rotas.
+    """
+
+    def __init__(self, app, monitor: MonitorCarga | None = None):
+        self.app = app
+        self._monitor = monitor
+
+    def _get_monitor(self) -> MonitorCarga | None:
+        if self._monitor is None and get_settings().ADMISSAO_ENABLED:
+            self._monitor = get_monitor()
+        return self._monitor
+
+    async def __call__(self, scope, receive, send):
+        monitor = self._get_monitor() if scope['type'] == 'http' else None
+
+        if monitor is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not monitor.admitir(classificar(scope['method'], scope['path'])):
+            await _SOBRECARGA(scope, receive, send)
+            return
+
+        monitor.em_voo += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            monitor.em_voo -= 1
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from contratrix_api.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MetricasTarefa:
+    execucoes: int = 0
+    falhas: int = 0
+    ignoradas: int = 0
+    processados_total: int = 0
+    ultimo_resultado: int = 0
+    ultima_duracao: float = 0.0
+    ultima_execucao_em: datetime | None = None
+
+
+@dataclass
+class TarefaPeriodica:
+    """Job de manutenção executado a cada `intervalo` segundos.
+
+    `funcao(session)` roda numa thread, com sessão própria, e devolve
+    quantos registros processou. Um advisory lock do Postgres derivado do
+    nome garante que, com várias instâncias da API, só uma executa por vez;
+    as outras contam a rodada como ignorada.
+    """
+
+    nome: str
+    funcao: Callable[[object], int]
+    intervalo: float
+    metricas: MetricasTarefa = field(default_factory=MetricasTarefa)
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    def executar(self) -> int | None:
+        inicio = time.perf_counter()
+
+        # O advisory lock é da conexão: a sessão fica presa a ela para que
+        # os commits de cada lote não a devolvam ao pool antes do unlock
+        with get_engine().connect() as connection:
+            chave = func.hashtext(f'contratrix:{self.nome}')
+            bloqueado = connection.scalar(
+                select(func.pg_try_advisory_lock(chave))
+            )
+            connection.commit()
+
+            if not bloqueado:
+                self.metricas.ignoradas += 1
+                return None
+
+            try:
+                with Session(bind=connection) as session:
+                    processados = self.funcao(session)
+            except Exception:
+                self.metricas.falhas += 1
+                raise
+            finally:
+                connection.rollback()
+                connection.execute(select(func.pg_advisory_unlock(chave)))
+                connection.commit()
+
+        self.metricas.execucoes += 1
+        self.metricas.processados_total += processados
+        self.metricas.ultimo_resultado = processados
+        self.metricas.ultima_duracao = time.perf_counter() - inicio
+        self.metricas.ultima_execucao_em = datetime.utcnow()
+
+        if processados:
+            logger.info(
+                f'{self.nome}: {processados} registros em '
+                f'{self.metricas.ultima_duracao:.3f}s'
+            )
+
+        return processados
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.executar)
+            except Exception:
+                logger.exception(f'Erro na tarefa {self.nome}')
+
+            await asyncio.sleep(self.intervalo)
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+tarefas: dict[str, TarefaPeriodica] = {}
+
+
+def registrar(nome: str, funcao: Callable[[object], int], intervalo: float):
+    tarefas[nome] = TarefaPeriodica(nome, funcao, intervalo)
+    return tarefas[nome]
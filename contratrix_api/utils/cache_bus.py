@@ -0,0 +1,113 @@
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable
+
+from sqlalchemy import text
+
+from contratrix_api.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'contratrix_cache'
+TODOS = '*'
+
+_handlers: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+_listener: 'CacheListener | None' = None
+
+
+def subscribe(entidade: str, handler: Callable[[str], None]):
+    _handlers[entidade].append(handler)
+
+
+def unsubscribe(entidade: str, handler: Callable[[str], None]):
+    if handler in _handlers.get(entidade, ()):
+        _handlers[entidade].remove(handler)
+
+
+def notify(session, entidade: str, chave: object = TODOS):
+    # Emitido dentro da transação da sessão: o Postgres só entrega a
+    # notificação no commit, e descarta no rollback
+    session.execute(
+        text('SELECT pg_notify(:canal, :payload)'),
+        {'canal': CANAL, 'payload': f'{entidade}:{chave}'},
+    )
+
+
+def dispatch(payload: str):
+    entidade, _, chave = payload.partition(':')
+    entidades = list(_handlers) if entidade == TODOS else [entidade]
+
+    for nome in entidades:
+        for handler in _handlers.get(nome, ()):
+            try:
+                handler(chave or TODOS)
+            except Exception:
+                logger.exception(f'Erro ao invalidar cache de {nome}')
+
+
+class CacheListener(threading.Thread):
+    # Uma thread por processo, com conexão dedicada fora do pool, fazendo
+    # LISTEN no canal e repassando cada payload para dispatch()
+
+    def __init__(self, poll_timeout: float = 5.0, retry_delay: float = 2.0):
+        super().__init__(name='cache-bus-listener', daemon=True)
+        self._poll_timeout = poll_timeout
+        self._retry_delay = retry_delay
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Conexão do cache bus perdida')
+                self._stop_event.wait(self._retry_delay)
+
+    def _listen(self):
+        connection = get_engine().raw_connection()
+        dbapi_connection = connection.driver_connection
+        connection.detach()
+
+        try:
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {CANAL}')
+
+            # Notificações emitidas enquanto estávamos desconectados se
+            # perderam: descarta todos os caches locais
+            dispatch(f'{TODOS}:{TODOS}')
+
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select(
+                    [dbapi_connection], [], [], self._poll_timeout
+                )
+                if not ready:
+                    continue
+
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    dispatch(dbapi_connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+def start_listener():
+    global _listener  # noqa: PLW0603
+
+    if _listener is None:
+        _listener = CacheListener()
+        _listener.start()
+
+
+def stop_listener():
+    global _listener  # noqa: PLW0603
+
+    if _listener is not None:
+        _listener.stop()
+        _listener.join(timeout=10)
+        _listener = None
@@ -0,0 +1,274 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable
+
+from sqlalchemy import inspect
+
+from contratrix_api.models import Cliente, Prestador
+from contratrix_api.utils.formatos import FORMATOS
+
+ORIGEM_PRESTADOR = 'prestador'
+ORIGEM_CLIENTE = 'cliente'
+ORIGEM_DADOS = 'dados'
+
+PLACEHOLDER = re.compile(r'{{\s*([\w.-]+)\s*}}')
+
+_COLUNAS = {
+    ORIGEM_PRESTADOR: frozenset(inspect(Prestador).column_attrs.keys()),
+    ORIGEM_CLIENTE: frozenset(inspect(Cliente).column_attrs.keys()),
+}
+
+
+class CamposInvalidos(Exception):
+    def __init__(self, erros: list[tuple[str, str]]):
+        self.erros = erros
+        super().__init__(
+            'Campos inválidos: '
+            + '; '.join(f'{campo} ({erro})' for campo, erro in erros)
+        )
+
+
+def _numero(valor: str) -> str | None:
+    # Aceita 1234.56 e o formato brasileiro 1.234,56
+    if ',' in valor:
+        valor = valor.replace('.', '').replace(',', '.')
+    try:
+        Decimal(valor)
+    except InvalidOperation:
+        return 'número inválido'
+    return None
+
+
+def _inteiro(valor: str) -> str | None:
+    return None if valor.strip().lstrip('-').isdigit() else 'inteiro inválido'
+
+
+def _data(valor: str) -> str | None:
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            datetime.strptime(valor, formato)
+            return None
+        except ValueError:
+            pass
+    return 'data inválida'
+
+
+def _email(valor: str) -> str | None:
+    usuario, _, dominio = valor.partition('@')
+    return None if usuario and '.' in dominio else 'email inválido'
+
+
+VALIDADORES: dict[str, Callable[[str], str | None] | None] = {
+    'texto': None,
+    'numero': _numero,
+    'inteiro': _inteiro,
+    'data': _data,
+    'email': _email,
+}
+
+
+@dataclass(frozen=True)
+class Vinculo:
+    """De onde vem o valor de um campo e como validá-lo e formatá-lo."""
+
+    nome: str
+    origem: str
+    atributo: str
+    obrigatorio: bool
+    validar: Callable[[str], str | None] | None
+    formatar: Callable[[object], str] = str
+
+
+@dataclass(frozen=True)
+class Slot:
+    # Placeholder no HTML; `padrao` é o texto usado quando não há valor
+    nome: str
+    padrao: str
+
+
+@dataclass(frozen=True)
+class PlanoTemplate:
+    """Template compilado: vínculos dos campos e o HTML já segmentado.
+
+    Placeholders que não estão em `campos` continuam sendo preenchidos
+    por `dados_contrato`, como antes, e ficam intactos se não houver valor.
+    """
+
+    vinculos: tuple[Vinculo, ...]
+    extras: tuple[str, ...]
+    partes: tuple[str | Slot, ...]
+
+    def resolver(self, perfil=None, cliente=None, dados: dict | None = None):
+        """Valores de todos os placeholders, numa passada pelos vínculos.
+
+        A fonte declarada (prestador/cliente) tem precedência; sem valor
+        nela, vale o que veio em `dados`. Erros de todos os campos são
+        reunidos num único CamposInvalidos.
+        """
+        dados = dados or {}
+        fontes = {ORIGEM_PRESTADOR: perfil, ORIGEM_CLIENTE: cliente}
+        valores: dict[str, str] = {}
+        erros: list[tuple[str, str]] = []
+
+        for vinculo in self.vinculos:
+            valor = None
+            fonte = fontes.get(vinculo.origem)
+
+            if fonte is not None:
+                valor = getattr(fonte, vinculo.atributo)
+            if _vazio(valor):
+                valor = dados.get(vinculo.nome)
+
+            if _vazio(valor):
+                if vinculo.obrigatorio:
+                    erros.append((vinculo.nome, 'obrigatório'))
+                continue
+
+            if vinculo.validar is not None and isinstance(valor, str):
+                erro = vinculo.validar(valor)
+                if erro:
+                    erros.append((vinculo.nome, erro))
+                    continue
+
+            try:
+                valores[vinculo.nome] = vinculo.formatar(valor)
+            except ValueError as e:
+                erros.append((vinculo.nome, str(e)))
+
+        if erros:
+            raise CamposInvalidos(erros)
+
+        for nome in self.extras:
+            if dados.get(nome):
+                valores[nome] = str(dados[nome])
+
+        return valores
+
+    def renderizar(self, valores: dict[str, str]) -> str:
+        return ''.join(
+            parte
+            if isinstance(parte, str)
+            else valores.get(parte.nome, parte.padrao)
+            for parte in self.partes
+        )
+
+
+def _vazio(valor) -> bool:
+    # 0 e False são valores; só ausência e texto vazio caem no próximo
+    return valor is None or (isinstance(valor, str) and not valor)
+
+
+def _campo(campo) -> dict:
+    # Templates antigos guardam só o nome do campo
+    return {'name': campo} if isinstance(campo, str) else dict(campo)
+
+
+def compilar(campos: list, html: str) -> PlanoTemplate:
+    vinculos = []
+
+    for campo in map(_campo, campos):
+        nome = campo['name']
+        origem = campo.get('origem')
+        atributo = campo.get('atributo') or nome
+
+        if origem is None:
+            # Mesma ordem da resolução original: prestador, cliente, dados
+            origem = next(
+                (o for o, colunas in _COLUNAS.items() if atributo in colunas),
+                ORIGEM_DADOS,
+            )
+        elif origem != ORIGEM_DADOS and atributo not in _COLUNAS[origem]:
+            raise ValueError(
+                f'Campo {nome}: {origem} não tem o atributo {atributo}'
+            )
+
+        tipo = campo.get('tipo') or 'texto'
+        if tipo not in VALIDADORES:
+            raise ValueError(f'Campo {nome}: tipo {tipo} desconhecido')
+
+        formato = campo.get('formato')
+        if formato is None and atributo.startswith('endereco_'):
+            # JSONB do endereço: sem formato sairia como repr de dict
+            formato = 'endereco'
+        if formato is not None and formato not in FORMATOS:
+            raise ValueError(f'Campo {nome}: formato {formato} desconhecido')
+
+        vinculos.append(
+            Vinculo(
+                nome=nome,
+                origem=origem,
+                atributo=atributo,
+                obrigatorio=bool(campo.get('obrigatorio')),
+                validar=VALIDADORES[tipo],
+                formatar=FORMATOS[formato] if formato else str,
+            )
+        )
+
+    declarados = {v.nome for v in vinculos}
+    partes: list[str | Slot] = []
+    extras: dict[str, None] = {}
+    inicio = 0
+
+    for match in PLACEHOLDER.finditer(html or ''):
+        nome = match.group(1)
+        partes.append(html[inicio : match.start()])
+
+        if nome in declarados:
+            partes.append(Slot(nome, ''))
+        else:
+            extras[nome] = None
+            partes.append(Slot(nome, match.group(0)))
+
+        inicio = match.end()
+
+    partes.append((html or '')[inicio:])
+
+    return PlanoTemplate(
+        vinculos=tuple(vinculos),
+        extras=tuple(extras),
+        # Slots são sempre verdadeiros; só sobram os trechos vazios
+        partes=tuple(p for p in partes if p),
+    )
+
+
+class CachePlanos:
+    """Planos compilados por (template.id, template.updated_at).
+
+    Editar o template muda o updated_at, então uma versão velha nunca é
+    servida; ela só sai do LRU. Num acerto o HTML (coluna deferred) nem
+    chega a ser lido do banco.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self._max_size = max_size
+        self._planos: OrderedDict[tuple, PlanoTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template) -> PlanoTemplate:
+        chave = (template.id, template.updated_at)
+
+        with self._lock:
+            plano = self._planos.get(chave)
+            if plano is not None:
+                self._planos.move_to_end(chave)
+                return plano
+
+        plano = compilar(template.campos, template.template_html)
+
+        with self._lock:
+            self._planos[chave] = plano
+            while len(self._planos) > self._max_size:
+                self._planos.popitem(last=False)
+
+        return plano
+
+    def clear(self):
+        with self._lock:
+            self._planos.clear()
+
+
+planos_templates = CachePlanos()
@@ -0,0 +1,94 @@
+import itertools
+import threading
+import time
+from typing import Callable, Sequence
+
+from contratrix_api.settings import get_settings
+
+
+class Catalog:
+    """Cópia em memória de uma tabela pequena e global (planos, templates).
+
+    O snapshot é recarregado quando expira o TTL ou quando um handler de
+    escrita chama invalidate(). Os itens são schemas Pydantic já
+    desacoplados da sessão, então filtros e paginação rodam em memória.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[object], Sequence],
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._itens: tuple | None = None
+        self._carregado_em = 0.0
+        self._geracoes = itertools.count(1)
+        self._geracao = 0
+        self.versao = 0
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is None:
+            return get_settings().CATALOGO_TTL_SECONDS
+        return self._ttl
+
+    def _atual(self) -> tuple | None:
+        # Lê _itens uma única vez: um invalidate() concorrente pode
+        # zerá-lo entre a verificação e o return
+        itens = self._itens
+        if itens is not None and self._clock() - self._carregado_em < self.ttl:
+            return itens
+        return None
+
+    def get(self, session) -> tuple:
+        itens = self._atual()
+        if itens is not None:
+            return itens
+
+        with self._lock:
+            itens = self._atual()
+            if itens is not None:
+                return itens
+
+            geracao = self._geracao
+            itens = tuple(self._loader(session))
+
+            # Se houve invalidação durante a carga o resultado pode estar
+            # velho: é devolvido, mas não fica em cache
+            if geracao == self._geracao:
+                self._itens = itens
+                self._carregado_em = self._clock()
+                self.versao += 1
+
+            return itens
+
+    def invalidate(self):
+        # next() em itertools.count é atômico: nenhuma invalidação se perde
+        # entre threads concorrentes
+        self._geracao = next(self._geracoes)
+        self._itens = None
+
+
+def paginate(itens: Sequence, page: int, limit: int, chave: str) -> dict:
+    # Mesmo formato das respostas *Paginated montadas a partir do banco
+    total = len(itens)
+    offset = (page - 1) * limit
+    pages = (total + limit - 1) // limit if total else 1
+
+    return {
+        'total': total,
+        'page': page,
+        'size': limit,
+        'pages': pages,
+        chave: list(itens[offset : offset + limit]),
+    }
+
+
+def fingerprint(itens: Sequence) -> tuple:
+    # Igual em todos os workers para o mesmo conteúdo, ao contrário de
+    # Catalog.versao, que é local ao processo
+    return len(itens), max((item.updated_at for item in itens), default=None)
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from contratrix_api.models import Cupom, CupomUsage
+from contratrix_api.settings import get_settings
+from contratrix_api.utils import cache_bus
+
+# Códigos inexistentes também ficam em cache, por pouco tempo, para que
+# tentativas repetidas com um código errado não voltem ao banco
+TTL_CUPOM_INEXISTENTE = 5.0
+
+
+class CupomIndisponivel(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CupomAtivo:
+    id: UUID
+    code: str
+    tipo_desconto: str
+    valor_desconto: int
+    aplicavel: str
+    inicio: datetime
+    termino: datetime
+
+
+# LRU limitado por CUPOM_CACHE_SIZE: /cupons/validar/{code} é público, e
+# cada código inventado vira uma entrada de miss
+_cache: OrderedDict[str, tuple[CupomAtivo | None, float]] = OrderedDict()
+_cache_lock = threading.Lock()
+_clock = time.monotonic
+
+
+def normalizar_codigo(code: str) -> str:
+    return code.strip().upper()
+
+
+def invalidar_cache(chave: str = cache_bus.TODOS):
+    with _cache_lock:
+        _cache.clear()
+
+
+cache_bus.subscribe('cupons', invalidar_cache)
+
+
+def buscar_cupom_ativo(session, code: str) -> CupomAtivo | None:
+    chave = normalizar_codigo(code)
+    agora = _clock()
+
+    with _cache_lock:
+        encontrado = _cache.get(chave)
+        if encontrado is not None:
+            if encontrado[1] > agora:
+                _cache.move_to_end(chave)
+                return encontrado[0]
+            del _cache[chave]
+
+    row = session.execute(
+        select(
+            Cupom.id,
+            Cupom.code,
+            Cupom.tipo_desconto,
+            Cupom.valor_desconto,
+            Cupom.aplicavel,
+            Cupom.inicio,
+            Cupom.termino,
+        ).where(func.upper(Cupom.code) == chave, Cupom.status == 'active')
+    ).first()
+
+    if row is None:
+        cupom, ttl = None, TTL_CUPOM_INEXISTENTE
+    else:
+        cupom = CupomAtivo(**row._mapping)
+        # A entrada nunca sobrevive ao término do cupom
+        restante = (cupom.termino - datetime.utcnow()).total_seconds()
+        ttl = max(0.0, min(get_settings().CUPOM_CACHE_TTL_SECONDS, restante))
+
+    with _cache_lock:
+        _cache[chave] = (cupom, agora + ttl)
+        _cache.move_to_end(chave)
+
+        while len(_cache) > get_settings().CUPOM_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return cupom
+
+
+def validar_cupom(cupom: CupomAtivo | None, agora: datetime | None = None):
+    if cupom is None:
+        raise CupomIndisponivel('Cupom inválido')
+
+    agora = agora or datetime.utcnow()
+    if not (cupom.inicio <= agora <= cupom.termino):
+        raise CupomIndisponivel('Cupom expirado')
+
+
+def calcular_valor_final(preco_cents: int, cupom: CupomAtivo | None) -> int:
+    # Preço único para /checkout/avulso, /checkout/assinatura e a prévia
+    # em /cupons/validar
+    if cupom is None:
+        return preco_cents
+
+    valor_final = preco_cents
+
+    if cupom.tipo_desconto == 'percentual':
+        valor_final -= int(valor_final * (cupom.valor_desconto / 100))
+    elif cupom.tipo_desconto == 'fixo':
+        valor_final -= cupom.valor_desconto
+
+    return max(valor_final, 0)
+
+
+def resgatar_cupom(session, cupom_id: UUID, user_id: UUID) -> None:
+    # Resgate atômico, sem ler antes de escrever: o UPDATE condicional só
+    # incrementa se ainda houver saldo, e o upsert em cupom_usado só
+    # incrementa se o usuário ainda estiver abaixo do limite. Tudo roda na
+    # transação do checkout; se algo falhar, o rollback desfaz os contadores.
+    agora = datetime.utcnow()
+
+    limite_por_usuario = session.execute(
+        update(Cupom)
+        .where(
+            Cupom.id == cupom_id,
+            Cupom.status == 'active',
+            Cupom.usados < Cupom.quantidade_total,
+            Cupom.inicio <= agora,
+            Cupom.termino >= agora,
+        )
+        .values(usados=Cupom.usados + 1)
+        .returning(Cupom.limit_uso_usuario)
+    ).scalar_one_or_none()
+
+    if limite_por_usuario is None:
+        raise CupomIndisponivel('Cupom esgotado ou expirado')
+
+    if limite_por_usuario < 1:
+        raise CupomIndisponivel('Limite de uso do cupom atingido')
+
+    quantidade_usado = session.execute(
+        insert(CupomUsage)
+        .values(
+            id=uuid4(),
+            cupom_id=cupom_id,
+            user_id=user_id,
+            quantidade_usado=1,
+        )
+        .on_conflict_do_update(
+            constraint='uq_cupom_usado_cupom_user',
+            set_={
+                'quantidade_usado': CupomUsage.quantidade_usado + 1,
+                'ultima_vez_usado': func.now(),
+            },
+            where=CupomUsage.quantidade_usado < limite_por_usuario,
+        )
+        .returning(CupomUsage.quantidade_usado)
+    ).scalar_one_or_none()
+
+    if quantidade_usado is None:
+        raise CupomIndisponivel('Limite de uso do cupom atingido')
+
+
+def liberar_cupom(session, cupom_id: UUID, user_id: UUID) -> None:
+    # Inverso do resgate, para cobranças recusadas. Quem chama garante que
+    # roda uma única vez por transação (ver outbox.falhar).
+    session.execute(
+        update(Cupom)
+        .where(Cupom.id == cupom_id, Cupom.usados > 0)
+        .values(usados=Cupom.usados - 1)
+    )
+    session.execute(
+        update(CupomUsage)
+        .where(
+            CupomUsage.cupom_id == cupom_id,
+            CupomUsage.user_id == user_id,
+            CupomUsage.quantidade_usado > 0,
+        )
+        .values(quantidade_usado=CupomUsage.quantidade_usado - 1)
+    )
@@ -1,6 +1,9 @@
-import requests
 import json
-from contratrix_api.settings import Settings
+import logging
+
+from contratrix_api.settings import get_settings
+
+logger = logging.getLogger(__name__)
 
 def send_email(name:str, recipientEmail: str, templateId: int, params: any):
     url = "https://api.brevo.com/v3/smtp/email"
@@ -17,8 +20,18 @@ def send_email(name:str, recipientEmail: str, templateId: int, params: any):
     )
     headers = {
         "accept": "application/json",
-        "api-key": Settings().BREVO_TOKEN,
+        "api-key": get_settings().BREVO_TOKEN,
         "content-type": "application/json",
     }
+    # Só o cadastro e a recuperação de senha enviam e-mail: o requests fica
+    # fora do import da aplicação
+    import requests  # noqa: PLC0415
+
     response = requests.request("POST", url, headers=headers, data=payload)
-    print(response)
\ No newline at end of file
+    if response.ok:
+        logger.info(f'E-mail {templateId} enviado para {recipientEmail}')
+    else:
+        logger.warning(
+            f'Brevo recusou o e-mail {templateId} para {recipientEmail}: '
+            f'{response.status_code} {response.text}'
+        )
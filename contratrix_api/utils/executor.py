@@ -0,0 +1,56 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+class ExecutorSaturado(Exception):
+    pass
+
+
+class ExecutorLimitado:
+    """Pool de threads dedicado, com limite de tarefas pendentes.
+
+    Tarefas CPU-bound que liberam o GIL (Argon2, por exemplo) rodam aqui em
+    vez do threadpool do Starlette, que atende todos os endpoints síncronos.
+    Quando já há `max_pendentes` tarefas esperando ou em execução, novas
+    submissões falham na hora com ExecutorSaturado em vez de enfileirar.
+    """
+
+    def __init__(self, nome: str, workers: int, max_pendentes: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=nome
+        )
+        self._max_pendentes = max_pendentes
+        self._pendentes = 0
+        self._lock = threading.Lock()
+        self.rejeitadas = 0
+
+    @property
+    def pendentes(self) -> int:
+        return self._pendentes
+
+    def _liberar(self, _future=None):
+        with self._lock:
+            self._pendentes -= 1
+
+    async def run(self, funcao: Callable, *args):
+        with self._lock:
+            if self._pendentes >= self._max_pendentes:
+                self.rejeitadas += 1
+                raise ExecutorSaturado()
+            self._pendentes += 1
+
+        try:
+            future = self._executor.submit(funcao, *args)
+        except BaseException:
+            self._liberar()
+            raise
+
+        # Libera a vaga quando a thread termina, mesmo se quem aguardava
+        # for cancelado (cliente desconectou)
+        future.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,83 @@
+"""Expira usuários cujo fim_plano já passou.
+
+Roda periodicamente no lifespan da API (ver app.py) ou manualmente:
+    python -m contratrix_api.utils.expirar_planos --batch-size 500
+
+O custo é proporcional aos usuários vencidos: a busca usa o índice parcial
+ix_users_fim_plano_ativos e cada lote é atualizado e commitado separadamente.
+"""
+
+import argparse
+import logging
+from datetime import datetime
+
+from sqlalchemy import ARRAY, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import UUID
+
+from contratrix_api.database import get_sessionmaker
+from contratrix_api.models import User
+
+logger = logging.getLogger(__name__)
+
+# 'active' é o status de cadastro; 'ativo' é o gravado pelo webhook
+STATUS_ATIVOS = ('active', 'ativo')
+STATUS_EXPIRADO = 'expirado'
+
+
+def expirar_lote(
+    session, batch_size: int, agora: datetime | None = None
+) -> int:
+    agora = agora or datetime.utcnow()
+
+    ids = session.scalars(
+        select(User.id)
+        .where(User.fim_plano < agora, User.status.in_(STATUS_ATIVOS))
+        .order_by(User.fim_plano)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    if not ids:
+        return 0
+
+    # Um único parâmetro array, em vez de um bind por id no IN
+    lote = bindparam('ids', ids, type_=ARRAY(UUID(as_uuid=True)))
+    expirados = session.scalars(
+        update(User)
+        .where(
+            User.id == any_(lote),
+            User.status.in_(STATUS_ATIVOS),
+        )
+        .values(status=STATUS_EXPIRADO)
+        .returning(User.id)
+    ).all()
+    session.commit()
+
+    return len(expirados)
+
+
+def expirar_planos(session, batch_size: int = 500) -> int:
+    total = 0
+    agora = datetime.utcnow()
+
+    while expirados := expirar_lote(session, batch_size, agora):
+        total += expirados
+
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    with get_sessionmaker()() as session:
+        total = expirar_planos(session, args.batch_size)
+
+    logger.info(f'{total} usuários expirados')
+
+
+if __name__ == '__main__':
+    main()
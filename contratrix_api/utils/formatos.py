@@ -0,0 +1,283 @@
+"""Formatadores de valores para os campos dos templates.
+
+Cada formatador recebe o valor bruto (str do payload, ou o tipo da coluna
+do prestador/cliente) e devolve o texto final. Valor que não pode ser
+formatado levanta ValueError com a mensagem mostrada ao usuário.
+"""
+
+import re
+from datetime import date, datetime
+from typing import Callable
+
+_NAO_DIGITO = re.compile(r'\D')
+DIGITOS_CPF = 11
+DIGITOS_CNPJ = 14
+CEM = 100
+
+MESES = (
+    'janeiro',
+    'fevereiro',
+    'março',
+    'abril',
+    'maio',
+    'junho',
+    'julho',
+    'agosto',
+    'setembro',
+    'outubro',
+    'novembro',
+    'dezembro',
+)
+
+_UNIDADES = (
+    'zero',
+    'um',
+    'dois',
+    'três',
+    'quatro',
+    'cinco',
+    'seis',
+    'sete',
+    'oito',
+    'nove',
+    'dez',
+    'onze',
+    'doze',
+    'treze',
+    'quatorze',
+    'quinze',
+    'dezesseis',
+    'dezessete',
+    'dezoito',
+    'dezenove',
+)
+_DEZENAS = (
+    '',
+    '',
+    'vinte',
+    'trinta',
+    'quarenta',
+    'cinquenta',
+    'sessenta',
+    'setenta',
+    'oitenta',
+    'noventa',
+)
+_CENTENAS = (
+    '',
+    'cento',
+    'duzentos',
+    'trezentos',
+    'quatrocentos',
+    'quinhentos',
+    'seiscentos',
+    'setecentos',
+    'oitocentos',
+    'novecentos',
+)
+_ESCALAS = (
+    ('', ''),
+    ('mil', 'mil'),
+    ('milhão', 'milhões'),
+    ('bilhão', 'bilhões'),
+    ('trilhão', 'trilhões'),
+)
+
+
+def _digitos(valor, quantidade: int, nome: str) -> str:
+    digitos = _NAO_DIGITO.sub('', str(valor))
+    if len(digitos) != quantidade:
+        raise ValueError(f'{nome} inválido')
+    return digitos
+
+
+def cpf(valor) -> str:
+    d = _digitos(valor, DIGITOS_CPF, 'CPF')
+    return f'{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}'
+
+
+def cnpj(valor) -> str:
+    d = _digitos(valor, DIGITOS_CNPJ, 'CNPJ')
+    return f'{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}'
+
+
+def cpf_cnpj(valor) -> str:
+    # Campos de documento que aceitam pessoa física ou jurídica
+    if len(_NAO_DIGITO.sub('', str(valor))) == DIGITOS_CNPJ:
+        return cnpj(valor)
+    return cpf(valor)
+
+
+def _centavos(valor) -> int:
+    if isinstance(valor, int):
+        return valor
+
+    texto = str(valor).strip()
+    if not texto.lstrip('-').isdigit():
+        raise ValueError('valor em centavos inválido')
+    return int(texto)
+
+
+def brl_centavos(valor) -> str:
+    centavos = _centavos(valor)
+    reais, resto = divmod(abs(centavos), 100)
+    texto = f'R$ {reais:,}'.replace(',', '.') + f',{resto:02d}'
+    return f'-{texto}' if centavos < 0 else texto
+
+
+def _ate_mil(n: int) -> str:
+    if n == CEM:
+        return 'cem'
+
+    partes = []
+    centena, resto = divmod(n, CEM)
+    if centena:
+        partes.append(_CENTENAS[centena])
+    # Até dezenove o nome é único; daí em diante, dezena e unidade
+    if resto >= len(_UNIDADES):
+        dezena, unidade = divmod(resto, 10)
+        partes.append(_DEZENAS[dezena])
+        if unidade:
+            partes.append(_UNIDADES[unidade])
+    elif resto:
+        partes.append(_UNIDADES[resto])
+
+    return ' e '.join(partes)
+
+
+def _inteiro_extenso(n: int) -> str:
+    if n == 0:
+        return 'zero'
+    if n >= 1000 ** len(_ESCALAS):
+        raise ValueError('número grande demais para escrever por extenso')
+
+    grupos = []
+    while n:
+        n, grupo = divmod(n, 1000)
+        grupos.append(grupo)
+
+    partes = []
+    for escala in range(len(grupos) - 1, -1, -1):
+        grupo = grupos[escala]
+        if not grupo:
+            continue
+
+        singular, plural = _ESCALAS[escala]
+        if escala == 1 and grupo == 1:
+            texto = 'mil'
+        elif escala:
+            texto = f'{_ate_mil(grupo)} {singular if grupo == 1 else plural}'
+        else:
+            texto = _ate_mil(grupo)
+
+        # "mil e quinhentos", "um milhão e duzentos mil", mas
+        # "mil duzentos e trinta": o "e" só entra antes do último grupo
+        # quando ele é uma centena redonda ou menor que cem
+        ultimo = not any(grupos[:escala])
+        if partes and ultimo and (grupo < CEM or grupo % CEM == 0):
+            partes.append('e')
+        partes.append(texto)
+
+    return ' '.join(partes)
+
+
+def extenso(valor) -> str:
+    texto = str(valor).strip()
+    if not texto.lstrip('-').isdigit():
+        raise ValueError('inteiro inválido')
+
+    n = int(texto)
+    return f'menos {_inteiro_extenso(-n)}' if n < 0 else _inteiro_extenso(n)
+
+
+def brl_extenso(valor) -> str:
+    centavos = _centavos(valor)
+    if centavos < 0:
+        raise ValueError('valor em centavos inválido')
+
+    reais, resto = divmod(centavos, 100)
+    partes = []
+
+    if reais or not resto:
+        moeda = 'real' if reais == 1 else 'reais'
+        # "um milhão de reais", mas "um milhão e cem reais"
+        if reais and reais % 1_000_000 == 0:
+            moeda = f'de {moeda}'
+        partes.append(f'{_inteiro_extenso(reais)} {moeda}')
+    if resto:
+        fracao = 'centavo' if resto == 1 else 'centavos'
+        partes.append(f'{_inteiro_extenso(resto)} {fracao}')
+
+    return ' e '.join(partes)
+
+
+def _para_data(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+
+    # fromisoformat e o split são bem mais rápidos que strptime
+    texto = str(valor).strip()
+    try:
+        if '/' in texto:
+            dia, mes, ano = texto.split('/')
+            return date(int(ano), int(mes), int(dia))
+        return date.fromisoformat(texto[:10])
+    except ValueError:
+        raise ValueError('data inválida')
+
+
+def data(valor) -> str:
+    d = _para_data(valor)
+    return f'{d.day:02d}/{d.month:02d}/{d.year}'
+
+
+def data_extenso(valor) -> str:
+    d = _para_data(valor)
+    dia = '1º' if d.day == 1 else str(d.day)
+    return f'{dia} de {MESES[d.month - 1]} de {d.year}'
+
+
+def cep(valor) -> str:
+    d = _digitos(valor, 8, 'CEP')
+    return f'{d[:5]}-{d[5:]}'
+
+
+def endereco(valor) -> str:
+    # endereco_prestador/endereco_cliente são JSONB no formato do
+    # EnderecoSchema; um endereço em texto (payload) já vem pronto
+    if not isinstance(valor, dict):
+        return str(valor)
+
+    v = {chave: str(item).strip() for chave, item in valor.items() if item}
+    logradouro = ', '.join(
+        filter(None, (v.get('rua'), v.get('numero'), v.get('complemento')))
+    )
+    cidade = '/'.join(filter(None, (v.get('cidade'), v.get('uf'))))
+    codigo = v.get('cep')
+    if codigo:
+        try:
+            codigo = f'CEP {cep(codigo)}'
+        except ValueError:
+            codigo = f'CEP {codigo}'
+
+    partes = [logradouro, v.get('bairro'), cidade, codigo]
+    if v.get('pais', '').lower() not in {'', 'brasil', 'br'}:
+        partes.append(v['pais'])
+
+    return ' - '.join(filter(None, partes))
+
+
+FORMATOS: dict[str, Callable[[object], str]] = {
+    'cpf': cpf,
+    'cnpj': cnpj,
+    'cpf_cnpj': cpf_cnpj,
+    'cep': cep,
+    'brl_centavos': brl_centavos,
+    'brl_extenso': brl_extenso,
+    'extenso': extenso,
+    'data': data,
+    'data_extenso': data_extenso,
+    'endereco': endereco,
+}
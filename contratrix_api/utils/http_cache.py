@@ -0,0 +1,43 @@
+import hashlib
+from http import HTTPStatus
+
+from fastapi import Request, Response
+
+# Políticas de Cache-Control por router. As respostas dependem do usuário
+# autenticado, então nunca vão para caches compartilhados (private).
+CACHE_CONTROL_DOCUMENTOS = 'private, no-cache'
+CACHE_CONTROL_TEMPLATES = 'private, max-age=300, must-revalidate'
+CACHE_CONTROL_PLANOS = 'private, max-age=300, must-revalidate'
+
+
+def make_etag(*parts) -> str:
+    # ETag forte derivado de (id, updated_at) ou de um resumo da coleção
+    digest = hashlib.sha256(
+        '|'.join(str(part) for part in parts).encode('utf-8')
+    ).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    candidates = (tag.strip() for tag in if_none_match.split(','))
+    return etag in (tag.removeprefix('W/') for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED,
+        headers={'ETag': etag, 'Cache-Control': cache_control},
+    )
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str):
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = cache_control
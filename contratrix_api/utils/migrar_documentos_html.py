@@ -0,0 +1,80 @@
+"""Move o HTML já gravado em documentos.documento_text para o storage.
+
+Uso:
+    python -m contratrix_api.utils.migrar_documentos_html --batch-size 200
+
+Requer DOCUMENTOS_HTML_STORAGE diferente de 'db'. Cada lote é gravado e
+commitado separadamente, com FOR UPDATE SKIP LOCKED, então o script pode
+ser interrompido e retomado, ou rodar em paralelo em mais de um processo.
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import select, update
+
+from contratrix_api.database import get_sessionmaker
+from contratrix_api.models import Documentos
+from contratrix_api.utils.storage import (
+    html_storage_enabled,
+    put_documento_html,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def migrar_lote(session, batch_size: int) -> int:
+    rows = session.execute(
+        select(Documentos.id, Documentos.documento_text)
+        .where(
+            Documentos.html_key.is_(None),
+            Documentos.documento_text.is_not(None),
+        )
+        .order_by(Documentos.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    for documento_id, html in rows:
+        stored = put_documento_html(documento_id, html)
+        session.execute(
+            update(Documentos)
+            .where(Documentos.id == documento_id)
+            .values(
+                documento_text=None,
+                html_key=stored.key,
+                html_size=stored.size,
+                html_sha256=stored.sha256,
+                # o conteúdo não mudou: preserva o updated_at
+                updated_at=Documentos.updated_at,
+            )
+        )
+
+    session.commit()
+
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if not html_storage_enabled():
+        raise SystemExit(
+            'DOCUMENTOS_HTML_STORAGE está como "db"; nada a migrar.'
+        )
+
+    total = 0
+    with get_sessionmaker()() as session:
+        while migrados := migrar_lote(session, args.batch_size):
+            total += migrados
+            logger.info(f'{total} documentos migrados')
+
+    logger.info(f'Migração concluída: {total} documentos')
+
+
+if __name__ == '__main__':
+    main()
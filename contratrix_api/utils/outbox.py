@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+
+from contratrix_api.database import get_sessionmaker
+from contratrix_api.models import OutboxPagamento, Transacoes
+from contratrix_api.settings import get_settings
+from contratrix_api.utils import cache_bus
+from contratrix_api.utils.cupons import liberar_cupom
+from contratrix_api.utils.pagarme import (
+    GatewayError,
+    GatewayIndisponivel,
+    PagarmeClient,
+    get_pagarme,
+)
+
+logger = logging.getLogger(__name__)
+
+OPERACAO_TRANSACAO = 'transacao'
+OPERACAO_ASSINATURA = 'assinatura'
+
+# Enquanto um envio está em andamento a linha continua 'pendente', mas só
+# volta a ser elegível depois deste prazo. Se o processo morrer no meio do
+# envio outro dispatcher retoma; a chave de idempotência evita cobrança dupla.
+LEASE = timedelta(seconds=60)
+BACKOFF_MAXIMO = 300
+
+
+@dataclass(frozen=True)
+class Envio:
+    id: UUID
+    transacao_id: UUID
+    operacao: str
+    payload: dict
+    tentativas: int
+
+
+def registrar(session, db_transacao: Transacoes, operacao: str, payload: dict):
+    # Chamado dentro da transação do checkout: a linha só existe se a
+    # transação existir. O NOTIFY acorda o dispatcher logo após o commit.
+    session.add(
+        OutboxPagamento(
+            transacao_id=db_transacao.id, operacao=operacao, payload=payload
+        )
+    )
+    cache_bus.notify(session, 'outbox')
+
+
+def reservar_lote(session, limite: int) -> list[Envio]:
+    # Relógio do banco, o mesmo do server_default: instâncias com relógios
+    # ou fusos diferentes enxergam a mesma fila
+    agora = func.now()
+
+    elegiveis = (
+        select(OutboxPagamento.id)
+        .where(
+            OutboxPagamento.status == 'pendente',
+            OutboxPagamento.proxima_tentativa_em <= agora,
+        )
+        .order_by(OutboxPagamento.proxima_tentativa_em)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    )
+
+    rows = session.execute(
+        update(OutboxPagamento)
+        .where(OutboxPagamento.id.in_(elegiveis.scalar_subquery()))
+        .values(
+            tentativas=OutboxPagamento.tentativas + 1,
+            proxima_tentativa_em=agora + LEASE,
+        )
+        .returning(
+            OutboxPagamento.id,
+            OutboxPagamento.transacao_id,
+            OutboxPagamento.operacao,
+            OutboxPagamento.payload,
+            OutboxPagamento.tentativas,
+        )
+    ).all()
+    session.commit()
+
+    return [Envio(**row._mapping) for row in rows]
+
+
+def concluir(session, envio: Envio, resposta: dict):
+    session.execute(
+        update(Transacoes)
+        .where(Transacoes.id == envio.transacao_id)
+        .values(
+            pagarme_transacao_id=str(resposta['id']),
+            checkout_url=resposta.get('checkout_url'),
+        )
+    )
+    session.execute(
+        update(OutboxPagamento)
+        .where(OutboxPagamento.id == envio.id)
+        .values(status='enviado', ultimo_erro=None)
+    )
+    session.commit()
+
+
+def reagendar(session, envio: Envio, erro: str, espera: float):
+    session.execute(
+        update(OutboxPagamento)
+        .where(OutboxPagamento.id == envio.id)
+        .values(
+            ultimo_erro=erro,
+            proxima_tentativa_em=func.now() + timedelta(seconds=espera),
+        )
+    )
+    session.commit()
+
+
+def falhar(session, envio: Envio, erro: str):
+    # Só a transição pendente -> falhou devolve o cupom: um segundo envio
+    # da mesma transação que também falhe não libera o resgate duas vezes
+    falhou = session.execute(
+        update(Transacoes)
+        .where(
+            Transacoes.id == envio.transacao_id,
+            Transacoes.status == 'pendente',
+        )
+        .values(status='falhou')
+        .returning(Transacoes.cupom_id, Transacoes.user_id)
+    ).first()
+    if falhou is not None and falhou.cupom_id is not None:
+        liberar_cupom(session, falhou.cupom_id, falhou.user_id)
+
+    session.execute(
+        update(OutboxPagamento)
+        .where(OutboxPagamento.id == envio.id)
+        .values(status='falhou', ultimo_erro=erro)
+    )
+    session.commit()
+
+
+def _no_banco(funcao, *args):
+    # As escritas do dispatcher usam sessões próprias, fora do event loop
+    def executar():
+        with get_sessionmaker()() as session:
+            return funcao(session, *args)
+
+    return asyncio.to_thread(executar)
+
+
+class OutboxDispatcher:
+    """Esvazia outbox_pagamentos enviando cada linha ao Pagar.me.
+
+    No máximo `concorrencia` chamadas ao gateway ficam em voo ao mesmo
+    tempo. Falhas temporárias voltam para a fila com backoff exponencial;
+    recusas do gateway, ou o esgotamento das tentativas, marcam a transação
+    como 'falhou'.
+    """
+
+    def __init__(
+        self,
+        client: PagarmeClient | None = None,
+        concorrencia: int | None = None,
+        lote: int | None = None,
+        max_tentativas: int | None = None,
+        intervalo: float | None = None,
+    ):
+        settings = get_settings()
+        self._client = client
+        self._concorrencia = concorrencia or settings.OUTBOX_CONCURRENCY
+        self._lote = lote or settings.OUTBOX_BATCH_SIZE
+        self._max_tentativas = max_tentativas or settings.OUTBOX_MAX_TENTATIVAS
+        self._intervalo = intervalo or settings.OUTBOX_POLL_SECONDS
+        self._em_voo: set[asyncio.Task] = set()
+        self._acordar = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    def acordar(self, chave: str = cache_bus.TODOS):
+        # Chamado pela thread do cache bus quando um checkout é gravado
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._acordar.set)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        cache_bus.subscribe('outbox', self.acordar)
+        self._task = asyncio.create_task(self._executar())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        cache_bus.unsubscribe('outbox', self.acordar)
+
+        if self._em_voo:
+            await asyncio.gather(*self._em_voo, return_exceptions=True)
+
+    async def _executar(self):
+        while True:
+            try:
+                reservados = await self.processar_lote()
+            except Exception:
+                logger.exception('Erro ao ler outbox_pagamentos')
+                reservados = 0
+
+            # Lote cheio: provavelmente há mais trabalho, segue direto
+            if reservados < self._lote:
+                try:
+                    await asyncio.wait_for(
+                        self._acordar.wait(), timeout=self._intervalo
+                    )
+                except TimeoutError:
+                    pass
+                self._acordar.clear()
+
+    async def processar_lote(self) -> int:
+        # Só reserva o que cabe nas vagas livres, para que uma linha não
+        # fique parada com o lease correndo enquanto espera uma vaga
+        vagas = self._concorrencia - len(self._em_voo)
+        if vagas <= 0:
+            await asyncio.wait(
+                self._em_voo, return_when=asyncio.FIRST_COMPLETED
+            )
+            return self._lote
+
+        envios = await _no_banco(reservar_lote, min(vagas, self._lote))
+
+        for envio in envios:
+            task = asyncio.create_task(self._enviar(envio))
+            self._em_voo.add(task)
+            task.add_done_callback(self._em_voo.discard)
+
+        return len(envios)
+
+    async def drenar(self):
+        # Processa até esvaziar a fila elegível; usado em testes e scripts
+        while await self.processar_lote():
+            pass
+
+        if self._em_voo:
+            await asyncio.gather(*self._em_voo, return_exceptions=True)
+
+    async def _enviar(self, envio: Envio):
+        try:
+            client = self._client or get_pagarme()
+
+            if envio.operacao == OPERACAO_ASSINATURA:
+                chamada = client.criar_assinatura
+            else:
+                chamada = client.criar_transacao
+
+            try:
+                resposta = await chamada(envio.transacao_id, envio.payload)
+            except GatewayError as e:
+                logger.warning(f'Pagar.me recusou {envio.transacao_id}: {e}')
+                await _no_banco(falhar, envio, str(e))
+            except GatewayIndisponivel as e:
+                if envio.tentativas >= self._max_tentativas:
+                    await _no_banco(falhar, envio, str(e))
+                else:
+                    espera = max(
+                        e.retry_after or 0,
+                        min(2**envio.tentativas, BACKOFF_MAXIMO),
+                    )
+                    await _no_banco(reagendar, envio, str(e), espera)
+            else:
+                await _no_banco(concluir, envio, resposta)
+        except Exception:
+            logger.exception(f'Erro ao enviar transação {envio.transacao_id}')
+
+
+async def main():
+    # Dispatcher como processo separado da API:
+    #   python -m contratrix_api.utils.outbox
+    logging.basicConfig(level=logging.INFO)
+
+    dispatcher = OutboxDispatcher()
+    cache_bus.start_listener()
+    dispatcher.start()
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await dispatcher.stop()
+        cache_bus.stop_listener()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
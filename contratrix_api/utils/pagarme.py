@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Callable
+from uuid import UUID
+
+from contratrix_api.settings import get_settings
+
+# O httpx só é importado quando o cliente é criado: workers que não
+# falam com o gateway não pagam o import
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayError(Exception):
+    # Resposta definitiva do gateway (4xx): repetir não adianta
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+class GatewayIndisponivel(Exception):
+    # Timeout, erro de rede, 5xx ou circuito aberto: pode ser repetido com
+    # a mesma chave de idempotência
+    def __init__(self, detail: str, retry_after: float | None = None):
+        super().__init__(detail)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Abre após N falhas seguidas e recusa chamadas até o fim do cooldown.
+
+    Depois do cooldown deixa passar uma única chamada de teste (half-open):
+    se ela funcionar o circuito fecha, se falhar volta a abrir.
+    """
+
+    def __init__(
+        self,
+        limite_falhas: int,
+        cooldown: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._limite_falhas = limite_falhas
+        self._cooldown = cooldown
+        self._clock = clock
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+
+    @property
+    def aberto(self) -> bool:
+        return self._falhas >= self._limite_falhas
+
+    def retry_after(self) -> float:
+        return max(0.0, self._aberto_ate - self._clock())
+
+    def permitir(self) -> bool:
+        if not self.aberto:
+            return True
+
+        if self._clock() < self._aberto_ate or self._testando:
+            return False
+
+        self._testando = True
+        return True
+
+    def sucesso(self):
+        self._falhas = 0
+        self._testando = False
+
+    def falha(self):
+        self._falhas += 1
+        self._testando = False
+
+        if self.aberto:
+            self._aberto_ate = self._clock() + self._cooldown
+
+
+def chave_idempotencia(transacao_id: UUID) -> str:
+    # Uma cobrança por transação: repetir a chamada (retry local, duplo
+    # clique, reprocessamento) devolve a mesma cobrança no gateway
+    return f'transacao-{transacao_id}'
+
+
+class PagarmeClient:
+    def __init__(  # noqa: PLR0913
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float,
+        *,
+        max_conexoes: int = 20,
+        tentativas: int = 2,
+        breaker: CircuitBreaker | None = None,
+        transport: 'httpx.AsyncBaseTransport | None' = None,
+    ):
+        import httpx  # noqa: PLC0415
+
+        self._tentativas = tentativas
+        self._timeout = timeout
+        self._breaker = breaker or CircuitBreaker(limite_falhas=5, cooldown=30)
+        self._erros_transporte = (httpx.TransportError, TimeoutError)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(api_key, ''),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 3.0)),
+            limits=httpx.Limits(
+                max_connections=max_conexoes,
+                max_keepalive_connections=max_conexoes,
+            ),
+            transport=transport,
+        )
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    async def close(self):
+        await self._client.aclose()
+
+    async def criar_transacao(self, transacao_id: UUID, dados: dict) -> dict:
+        return await self._post('/transactions', transacao_id, dados)
+
+    async def criar_assinatura(self, transacao_id: UUID, dados: dict) -> dict:
+        return await self._post('/subscriptions', transacao_id, dados)
+
+    async def _post(self, path: str, transacao_id: UUID, dados: dict) -> dict:
+        headers = {'Idempotency-Key': chave_idempotencia(transacao_id)}
+
+        for tentativa in range(1, self._tentativas + 1):
+            if not self._breaker.permitir():
+                raise GatewayIndisponivel(
+                    'Gateway de pagamento indisponível',
+                    retry_after=self._breaker.retry_after(),
+                )
+
+            try:
+                # Os timeouts do httpx valem por fase (conexão, cada leitura);
+                # o prazo total da chamada é garantido aqui
+                async with asyncio.timeout(self._timeout):
+                    response = await self._client.post(
+                        path, json=dados, headers=headers
+                    )
+            except self._erros_transporte as e:
+                self._breaker.falha()
+                logger.warning(f'Pagar.me {path} falhou ({tentativa}): {e!r}')
+            else:
+                if response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR:
+                    # 4xx é erro do pedido, não do gateway: não conta para
+                    # o circuito
+                    self._breaker.sucesso()
+
+                    if response.is_error:
+                        raise GatewayError(response.status_code, response.text)
+
+                    return response.json()
+
+                self._breaker.falha()
+                logger.warning(
+                    f'Pagar.me {path} respondeu {response.status_code} '
+                    f'({tentativa})'
+                )
+
+            if tentativa < self._tentativas:
+                await asyncio.sleep(0.2 * tentativa)
+
+        raise GatewayIndisponivel(
+            'Gateway de pagamento indisponível',
+            retry_after=self._breaker.retry_after() or None,
+        )
+
+
+_client: PagarmeClient | None = None
+
+
+def get_pagarme() -> PagarmeClient:
+    # Um cliente (e um pool de conexões) por processo, criado no primeiro
+    # uso dentro do event loop da aplicação
+    global _client  # noqa: PLW0603
+
+    if _client is None:
+        settings = get_settings()
+        _client = PagarmeClient(
+            base_url=settings.PAGARME_API_URL,
+            api_key=settings.PAGARME_API_KEY,
+            timeout=settings.PAGARME_TIMEOUT_SECONDS,
+            max_conexoes=settings.PAGARME_MAX_CONNECTIONS,
+        )
+
+    return _client
+
+
+async def close_pagarme():
+    global _client  # noqa: PLW0603
+
+    if _client is not None:
+        await _client.close()
+        _client = None
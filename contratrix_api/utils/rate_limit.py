@@ -0,0 +1,349 @@
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Callable
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+from contratrix_api.database import get_engine
+from contratrix_api.models import RateLimitBucket
+from contratrix_api.security import Principal, get_current_principal
+from contratrix_api.settings import get_settings
+
+
+@dataclass(frozen=True)
+class Orcamento:
+    """Token bucket: rajada de até `capacidade` e recarga de `por_segundo`."""
+
+    capacidade: float
+    por_segundo: float
+
+    @classmethod
+    def parse(cls, valor: str) -> 'Orcamento':
+        # '10/60' -> 10 requisições a cada 60 segundos, com rajada de 10
+        quantidade, segundos = valor.split('/')
+        return cls(float(quantidade), float(quantidade) / float(segundos))
+
+    def espera(self, tokens: float, custo: float) -> float:
+        return (custo - tokens) / self.por_segundo
+
+
+class MemoriaBackend:
+    """Buckets no próprio processo: cada worker tem o seu orçamento."""
+
+    em_thread = False
+
+    def __init__(
+        self,
+        max_chaves: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._max_chaves = max_chaves
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(
+        self, chave: str, orcamento: Orcamento, custo: float = 1.0
+    ) -> float:
+        """Devolve 0 se liberado, ou quantos segundos esperar."""
+        agora = self._clock()
+
+        with self._lock:
+            tokens, atualizado = self._buckets.get(
+                chave, (orcamento.capacidade, agora)
+            )
+            tokens = min(
+                orcamento.capacidade,
+                tokens + (agora - atualizado) * orcamento.por_segundo,
+            )
+
+            espera = 0.0
+            if tokens < custo:
+                espera = orcamento.espera(tokens, custo)
+            else:
+                tokens -= custo
+
+            self._buckets[chave] = (tokens, agora)
+            self._buckets.move_to_end(chave)
+
+            # A chave mais antiga já teve tempo de recarregar; descartá-la só
+            # devolve um bucket cheio para quem estava parado
+            while len(self._buckets) > self._max_chaves:
+                self._buckets.popitem(last=False)
+
+        return espera
+
+
+def _recarga(orcamento: Orcamento, agora):
+    return func.least(
+        orcamento.capacidade,
+        RateLimitBucket.tokens
+        + (agora - RateLimitBucket.atualizado_em) * orcamento.por_segundo,
+    )
+
+
+class PostgresBackend:
+    """Buckets na tabela rate_limit_buckets, compartilhados entre instâncias.
+
+    O consumo é um único upsert: o UPDATE só acontece se, após a recarga,
+    houver tokens suficientes; sem linha no RETURNING, a requisição é negada.
+    """
+
+    em_thread = True
+
+    def __init__(self, engine=None):
+        self._engine = engine
+
+    @property
+    def engine(self):
+        return self._engine or get_engine()
+
+    def consumir(
+        self, chave: str, orcamento: Orcamento, custo: float = 1.0
+    ) -> float:
+        agora = func.extract('epoch', func.clock_timestamp())
+
+        stmt = insert(RateLimitBucket).values(
+            chave=chave,
+            tokens=orcamento.capacidade - custo,
+            atualizado_em=agora,
+        )
+        recarga = _recarga(orcamento, stmt.excluded.atualizado_em)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RateLimitBucket.chave],
+            set_={
+                'tokens': recarga - custo,
+                'atualizado_em': stmt.excluded.atualizado_em,
+            },
+            where=recarga >= custo,
+        ).returning(RateLimitBucket.tokens)
+
+        with self.engine.begin() as connection:
+            if connection.scalar(stmt) is not None:
+                return 0.0
+
+            tokens = connection.scalar(
+                select(_recarga(orcamento, agora)).where(
+                    RateLimitBucket.chave == chave
+                )
+            )
+
+        return orcamento.espera(tokens or 0.0, custo)
+
+
+def purgar_lote(session, orcamentos: dict[str, Orcamento], batch_size: int):
+    # Um bucket que já recarregou até a capacidade equivale a não ter linha:
+    # o próximo consumo recria o bucket cheio
+    agora = func.extract('epoch', func.now())
+    cheios = or_(
+        *(
+            and_(
+                RateLimitBucket.chave.startswith(f'{classe}:'),
+                _recarga(orcamento, agora) >= orcamento.capacidade,
+            )
+            for classe, orcamento in orcamentos.items()
+        )
+    )
+    chaves = (
+        select(RateLimitBucket.chave)
+        .where(cheios)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    removidos = session.execute(
+        delete(RateLimitBucket).where(RateLimitBucket.chave.in_(chaves))
+    ).rowcount
+    session.commit()
+
+    return removidos
+
+
+def purgar_buckets(session, batch_size: int = 1000) -> int:
+    orcamentos = get_rate_limiter().orcamentos
+    total = 0
+
+    while removidos := purgar_lote(session, orcamentos, batch_size):
+        total += removidos
+
+    return total
+
+
+class RateLimiter:
+    def __init__(self, backend, orcamentos: dict[str, Orcamento]):
+        self.backend = backend
+        self.orcamentos = orcamentos
+        self.negadas: dict[str, int] = defaultdict(int)
+
+    async def consumir(self, classe: str, chave: str) -> float:
+        orcamento = self.orcamentos[classe]
+        chave = f'{classe}:{chave}'
+
+        if self.backend.em_thread:
+            espera = await run_in_threadpool(
+                self.backend.consumir, chave, orcamento
+            )
+        else:
+            espera = self.backend.consumir(chave, orcamento)
+
+        if espera:
+            self.negadas[classe] += 1
+        return espera
+
+
+class LimiteConcorrencia:
+    """Máximo de execuções simultâneas por chave, neste processo."""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._em_uso: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.negadas = 0
+
+    def adquirir(self, chave: str) -> bool:
+        with self._lock:
+            if self._em_uso[chave] >= self.maximo:
+                self.negadas += 1
+                return False
+            self._em_uso[chave] += 1
+            return True
+
+    def liberar(self, chave: str):
+        with self._lock:
+            self._em_uso[chave] -= 1
+            if self._em_uso[chave] <= 0:
+                del self._em_uso[chave]
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    settings = get_settings()
+
+    if settings.RATE_LIMIT_BACKEND == 'postgres':
+        backend = PostgresBackend()
+    else:
+        backend = MemoriaBackend()
+
+    return RateLimiter(
+        backend,
+        {
+            'login': Orcamento.parse(settings.RATE_LIMIT_LOGIN),
+            'refresh': Orcamento.parse(settings.RATE_LIMIT_REFRESH),
+            'cadastro': Orcamento.parse(settings.RATE_LIMIT_CADASTRO),
+            'recuperacao': Orcamento.parse(settings.RATE_LIMIT_RECUPERACAO),
+            'render': Orcamento.parse(settings.RATE_LIMIT_RENDER),
+            'upload': Orcamento.parse(settings.RATE_LIMIT_UPLOAD),
+        },
+    )
+
+
+@lru_cache
+def get_limite_render() -> LimiteConcorrencia:
+    return LimiteConcorrencia(get_settings().RENDER_MAX_CONCORRENTES)
+
+
+def _muitas_requisicoes(espera: float):
+    return HTTPException(
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        detail='Muitas requisições. Tente novamente em instantes.',
+        headers={'Retry-After': str(max(1, math.ceil(espera)))},
+    )
+
+
+async def _verificar(classe: str, chave: str):
+    if not get_settings().RATE_LIMIT_ENABLED:
+        return
+
+    espera = await get_rate_limiter().consumir(classe, chave)
+    if espera:
+        raise _muitas_requisicoes(espera)
+
+
+@lru_cache
+def _proxies_confiaveis() -> tuple[
+    ipaddress.IPv4Network | ipaddress.IPv6Network, ...
+]:
+    valor = get_settings().RATE_LIMIT_PROXIES_CONFIAVEIS.strip()
+    if not valor:
+        return ()
+    if valor == '*':
+        valor = '0.0.0.0/0,::/0'
+    return tuple(
+        ipaddress.ip_network(item.strip(), strict=False)
+        for item in valor.split(',')
+    )
+
+
+def _confiavel(ip: str, proxies) -> bool:
+    try:
+        endereco = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(endereco in rede for rede in proxies)
+
+
+def ip_do_cliente(request: Request) -> str:
+    """IP de quem fez a requisição, atravessando os proxies confiáveis.
+
+    Atrás do balanceador todo mundo chega com o IP dele; o cliente real
+    vem no X-Forwarded-For, lido da direita para a esquerda enquanto os
+    saltos forem proxies confiáveis (RATE_LIMIT_PROXIES_CONFIAVEIS). Sem
+    proxies configurados o header é ignorado, porque qualquer um o forja.
+    """
+    ip = request.client.host if request.client else 'desconhecido'
+    proxies = _proxies_confiaveis()
+    if not _confiavel(ip, proxies):
+        return ip
+
+    saltos = request.headers.get('x-forwarded-for', '').split(',')
+    for salto in reversed([s.strip() for s in saltos if s.strip()]):
+        ip = salto
+        if not _confiavel(salto, proxies):
+            break
+
+    return ip
+
+
+def limite_por_ip(classe: str):
+    # Rotas sem autenticação (login, refresh, cadastro, recuperação de senha)
+    async def dependencia(request: Request):
+        await _verificar(classe, ip_do_cliente(request))
+
+    return dependencia
+
+
+def limite_por_usuario(classe: str):
+    # O principal é o mesmo resolvido pelo CurrentUser da rota: o FastAPI
+    # reaproveita a dependência dentro da requisição
+    async def dependencia(user: Principal = Depends(get_current_principal)):
+        await _verificar(classe, str(user.id))
+
+    return dependencia
+
+
+async def limitar_renders(user: Principal = Depends(get_current_principal)):
+    """Segura uma vaga de render do usuário enquanto a rota executa."""
+    limite = get_limite_render()
+    if limite.maximo <= 0:
+        yield
+        return
+
+    chave = str(user.id)
+
+    if not limite.adquirir(chave):
+        raise _muitas_requisicoes(1)
+
+    try:
+        yield
+    finally:
+        limite.liberar(chave)
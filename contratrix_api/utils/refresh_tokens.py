@@ -0,0 +1,121 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, select, update
+
+from contratrix_api.models import RefreshToken
+from contratrix_api.settings import get_settings
+
+
+class RefreshTokenInvalido(Exception):
+    pass
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def emitir(session, user_id: UUID, family_id: UUID | None = None) -> str:
+    # Token opaco; o valor em claro só existe na resposta ao cliente
+    token = secrets.token_urlsafe(32)
+    session.add(
+        RefreshToken(
+            token_hash=_hash(token),
+            family_id=family_id or uuid4(),
+            user_id=user_id,
+            expires_at=datetime.utcnow()
+            + timedelta(days=get_settings().REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token
+
+
+def rotacionar(session, token: str) -> tuple[UUID, str]:
+    # Consome o token num UPDATE condicional e emite o próximo da mesma
+    # família. Duas requisições com o mesmo token: só uma passa.
+    agora = datetime.utcnow()
+    token_hash = _hash(token)
+
+    consumido = session.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > agora,
+        )
+        .values(used_at=agora)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+    ).first()
+
+    if consumido is None:
+        reutilizado = session.scalar(
+            select(RefreshToken.family_id).where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_not(None),
+            )
+        )
+
+        # Token já rotacionado apresentado de novo: alguém tem uma cópia.
+        # Revoga a família inteira, inclusive o token legítimo mais novo.
+        if reutilizado is not None:
+            revogar_familia(session, reutilizado)
+            session.commit()
+
+        raise RefreshTokenInvalido()
+
+    user_id, family_id = consumido
+    return user_id, emitir(session, user_id, family_id)
+
+
+def revogar_familia(session, family_id: UUID):
+    session.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.family_id == family_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def revogar_do_usuario(session, user_id: UUID):
+    session.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def purgar_lote(session, batch_size: int, agora: datetime) -> int:
+    # Tokens usados ou revogados ficam até expirar: são eles que permitem
+    # detectar reuso
+    ids = (
+        select(RefreshToken.id)
+        .where(RefreshToken.expires_at < agora)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    removidos = session.execute(
+        delete(RefreshToken).where(RefreshToken.id.in_(ids))
+    ).rowcount
+    session.commit()
+
+    return removidos
+
+
+def purgar_tokens(session, batch_size: int = 1000) -> int:
+    total = 0
+    agora = datetime.utcnow()
+
+    while removidos := purgar_lote(session, batch_size, agora):
+        total += removidos
+
+    return total
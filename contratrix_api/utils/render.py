@@ -0,0 +1,37 @@
+import os
+import tempfile
+from uuid import uuid4
+
+
+def nome_pdf(nome_documento: str | None) -> str:
+    return f'{uuid4()}-{(nome_documento or "documento").replace(" ", "-")}.pdf'
+
+
+def html_para_pdf(html: str) -> bytes:
+    """Converte o HTML do documento em PDF (pandoc + WeasyPrint).
+
+    O pypandoc é importado aqui, e não no topo do módulo, para que workers
+    que não geram PDF não o carreguem.
+    """
+    import pypandoc  # noqa: PLC0415
+
+    fd, caminho = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+
+    try:
+        pypandoc.convert_text(
+            html,
+            to='pdf',
+            format='html',
+            outputfile=caminho,
+            extra_args=[
+                '--pdf-engine=weasyprint',
+                '--metadata',
+                'title="Contrato"',
+            ],
+        )
+
+        with open(caminho, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(caminho)
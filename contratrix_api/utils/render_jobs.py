@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+
+from contratrix_api.models import Documentos, RenderJob
+from contratrix_api.utils import cache_bus
+from contratrix_api.utils.storage import get_documento_html
+
+# Mesmo esquema do outbox: o job fica 'pendente' durante o render e só
+# volta a ser elegível após o lease, caso o worker morra no meio
+LEASE = timedelta(minutes=5)
+BACKOFF_MAXIMO = 300
+
+
+@dataclass(frozen=True)
+class Job:
+    id: UUID
+    documento_id: UUID
+    tentativas: int
+
+
+def registrar(session, db_documento: Documentos):
+    # Chamado na transação que cria o documento; o NOTIFY acorda os
+    # workers logo após o commit
+    session.add(RenderJob(documento_id=db_documento.id))
+    cache_bus.notify(session, 'render')
+
+
+def reservar_lote(session, limite: int) -> list[Job]:
+    # Relógio do banco, como no outbox: é o mesmo do server_default
+    agora = func.now()
+
+    elegiveis = (
+        select(RenderJob.id)
+        .where(
+            RenderJob.status == 'pendente',
+            RenderJob.proxima_tentativa_em <= agora,
+        )
+        .order_by(RenderJob.proxima_tentativa_em)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    )
+
+    rows = session.execute(
+        update(RenderJob)
+        .where(RenderJob.id.in_(elegiveis.scalar_subquery()))
+        .values(
+            tentativas=RenderJob.tentativas + 1,
+            proxima_tentativa_em=agora + LEASE,
+        )
+        .returning(RenderJob.id, RenderJob.documento_id, RenderJob.tentativas)
+    ).all()
+    session.commit()
+
+    return [Job(**row._mapping) for row in rows]
+
+
+def carregar_html(session, job: Job) -> tuple[str, str | None]:
+    """HTML já preenchido do documento e o nome usado no arquivo."""
+    db_documento = session.get(Documentos, job.documento_id)
+
+    if db_documento.html_key:
+        html = get_documento_html(
+            db_documento.html_key, db_documento.html_sha256
+        )
+    else:
+        html = db_documento.documento_text
+
+    return html or '', db_documento.nome_documento
+
+
+def concluir(session, job: Job, pdf_url: str):
+    session.execute(
+        update(Documentos)
+        .where(Documentos.id == job.documento_id)
+        .values(pdf_url=pdf_url)
+    )
+    session.execute(
+        update(RenderJob)
+        .where(RenderJob.id == job.id)
+        .values(status='concluido', ultimo_erro=None)
+    )
+    session.commit()
+
+
+def reagendar(session, job: Job, erro: str):
+    espera = min(5 * 2**job.tentativas, BACKOFF_MAXIMO)
+    session.execute(
+        update(RenderJob)
+        .where(RenderJob.id == job.id)
+        .values(
+            ultimo_erro=erro,
+            proxima_tentativa_em=func.now() + timedelta(seconds=espera),
+        )
+    )
+    session.commit()
+
+
+def falhar(session, job: Job, erro: str):
+    session.execute(
+        update(RenderJob)
+        .where(RenderJob.id == job.id)
+        .values(status='falhou', ultimo_erro=erro)
+    )
+    session.commit()
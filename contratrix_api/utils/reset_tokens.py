@@ -0,0 +1,87 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, or_, select, update
+
+from contratrix_api.models import PasswordResetToken
+
+
+def invalidar_tokens(session, user_id: UUID):
+    # Usa o índice parcial ix_password_reset_tokens_pendentes
+    session.execute(
+        update(PasswordResetToken)
+        .where(
+            PasswordResetToken.user_id == user_id,
+            PasswordResetToken.used.is_(False),
+        )
+        .values(used=True)
+    )
+
+
+def token_pendente(session, user_id: UUID, code: str) -> bool:
+    # Leitura barata, antes do Argon2: código errado não chega a custar um
+    # hash. O consumo de verdade continua sendo o UPDATE de consumir_token.
+    return (
+        session.scalar(
+            select(PasswordResetToken.id)
+            .where(
+                PasswordResetToken.user_id == user_id,
+                PasswordResetToken.used.is_(False),
+                PasswordResetToken.code == code,
+                PasswordResetToken.expires_at > datetime.utcnow(),
+            )
+            .limit(1)
+        )
+        is not None
+    )
+
+
+def consumir_token(session, user_id: UUID, code: str) -> bool:
+    # Verificação e consumo no mesmo UPDATE: duas requisições com o mesmo
+    # código não conseguem usar o token duas vezes. Só existe um token
+    # pendente por usuário, porque /recover-password invalida os anteriores.
+    consumido = session.scalar(
+        update(PasswordResetToken)
+        .where(
+            PasswordResetToken.user_id == user_id,
+            PasswordResetToken.used.is_(False),
+            PasswordResetToken.code == code,
+            PasswordResetToken.expires_at > datetime.utcnow(),
+        )
+        .values(used=True)
+        .returning(PasswordResetToken.id)
+    )
+
+    return consumido is not None
+
+
+def purgar_lote(session, batch_size: int, agora: datetime) -> int:
+    ids = (
+        select(PasswordResetToken.id)
+        .where(
+            or_(
+                PasswordResetToken.expires_at < agora,
+                PasswordResetToken.used.is_(True),
+            )
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    removidos = session.execute(
+        delete(PasswordResetToken).where(PasswordResetToken.id.in_(ids))
+    ).rowcount
+    session.commit()
+
+    return removidos
+
+
+def purgar_tokens(session, batch_size: int = 1000) -> int:
+    total = 0
+    agora = datetime.utcnow()
+
+    while removidos := purgar_lote(session, batch_size, agora):
+        total += removidos
+
+    return total
@@ -0,0 +1,150 @@
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from uuid import UUID
+
+import zstandard
+
+from contratrix_api.settings import get_settings
+
+# Modos de armazenamento do HTML gerado dos documentos:
+#   db    -> coluna documentos.documento_text (comportamento original)
+#   r2    -> objeto zstd no bucket BUCKET_NAME_DOCUMENTOS
+#   local -> arquivo zstd em DOCUMENTOS_HTML_DIR e PDFs em pdf/ no mesmo
+#            diretório (testes/desenvolvimento)
+HTML_STORAGE_DB = 'db'
+HTML_STORAGE_R2 = 'r2'
+HTML_STORAGE_LOCAL = 'local'
+HTML_STORAGE_MODES = (HTML_STORAGE_DB, HTML_STORAGE_R2, HTML_STORAGE_LOCAL)
+
+
+@dataclass(frozen=True)
+class StoredHtml:
+    key: str
+    size: int
+    sha256: str
+
+
+class HtmlChecksumError(Exception):
+    pass
+
+
+@lru_cache
+def get_s3_client():
+    # O client do boto3 é thread-safe e caro de montar: um por processo.
+    # O import fica aqui porque só o boto3 custa ~130ms e dezenas de MB
+    import boto3  # noqa: PLC0415
+
+    settings = get_settings()
+    return boto3.client(
+        's3',
+        region_name='auto',
+        endpoint_url=settings.R2_ENDPOINT_URL,
+        aws_access_key_id=settings.CLOUDFLARE_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.CLOUDFLARE_SECRET_ACCESS_KEY,
+    )
+
+
+def html_storage_mode() -> str:
+    # Um valor desconhecido (typo no .env) não pode cair no R2 em silêncio
+    mode = get_settings().DOCUMENTOS_HTML_STORAGE
+    if mode not in HTML_STORAGE_MODES:
+        raise ValueError(
+            f'DOCUMENTOS_HTML_STORAGE inválido: {mode!r} '
+            f'(esperado um de {", ".join(HTML_STORAGE_MODES)})'
+        )
+    return mode
+
+
+def html_storage_enabled() -> bool:
+    return html_storage_mode() != HTML_STORAGE_DB
+
+
+def documento_html_key(documento_id: UUID) -> str:
+    return f'html/{documento_id}.html.zst'
+
+
+def put_documento_html(documento_id: UUID, html: str) -> StoredHtml:
+    raw = html.encode('utf-8')
+    key = documento_html_key(documento_id)
+
+    _write(key, zstandard.ZstdCompressor(level=10).compress(raw))
+
+    return StoredHtml(
+        key=key, size=len(raw), sha256=hashlib.sha256(raw).hexdigest()
+    )
+
+
+def delete_documento_html(key: str) -> None:
+    # Desfaz um put_documento_html cuja transação não chegou ao commit
+    _delete(key)
+
+
+def get_documento_html(key: str, sha256: str | None = None) -> str:
+    raw = zstandard.ZstdDecompressor().decompress(_read(key))
+
+    if sha256 and hashlib.sha256(raw).hexdigest() != sha256:
+        raise HtmlChecksumError(f'Checksum inválido para {key}')
+
+    return raw.decode('utf-8')
+
+
+def put_documento_pdf(nome: str, data: bytes) -> str:
+    """Publica o PDF e devolve a URL gravada em documentos.pdf_url."""
+    settings = get_settings()
+
+    if html_storage_mode() == HTML_STORAGE_LOCAL:
+        path = Path(settings.DOCUMENTOS_HTML_DIR) / 'pdf' / nome
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path.resolve().as_uri()
+
+    get_s3_client().put_object(
+        Bucket=settings.BUCKET_NAME_DOCUMENTOS,
+        Key=nome,
+        Body=data,
+        ContentType='application/pdf',
+    )
+    return f'{settings.DOCUMENTOS_PUBLIC_URL}/{nome}'
+
+
+def _write(key: str, data: bytes) -> None:
+    settings = get_settings()
+
+    if html_storage_mode() == HTML_STORAGE_LOCAL:
+        path = Path(settings.DOCUMENTOS_HTML_DIR) / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return
+
+    get_s3_client().put_object(
+        Bucket=settings.BUCKET_NAME_DOCUMENTOS,
+        Key=key,
+        Body=data,
+        ContentType='application/zstd',
+    )
+
+
+def _read(key: str) -> bytes:
+    settings = get_settings()
+
+    if html_storage_mode() == HTML_STORAGE_LOCAL:
+        return (Path(settings.DOCUMENTOS_HTML_DIR) / key).read_bytes()
+
+    response = get_s3_client().get_object(
+        Bucket=settings.BUCKET_NAME_DOCUMENTOS, Key=key
+    )
+    return response['Body'].read()
+
+
+def _delete(key: str) -> None:
+    settings = get_settings()
+
+    if html_storage_mode() == HTML_STORAGE_LOCAL:
+        (Path(settings.DOCUMENTOS_HTML_DIR) / key).unlink(missing_ok=True)
+        return
+
+    get_s3_client().delete_object(
+        Bucket=settings.BUCKET_NAME_DOCUMENTOS, Key=key
+    )
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class TokenCache:
+    """LRU de tokens já verificados: digest do token -> claims.
+
+    A chave é o sha256 do token, para não manter tokens em claro na memória.
+    Cada entrada vale até o `exp` do próprio token, então um token expirado
+    nunca é servido do cache. Revogação não passa por aqui: a checagem de
+    token_version continua sendo feita a cada requisição.
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.time):
+        self._max_size = max_size
+        self._clock = clock
+        self._itens: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> dict | None:
+        chave = self.digest(token)
+
+        with self._lock:
+            encontrado = self._itens.get(chave)
+
+            if encontrado is None:
+                self.misses += 1
+                return None
+
+            payload, exp = encontrado
+            if exp <= self._clock():
+                del self._itens[chave]
+                self.misses += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get('exp')
+        if not exp or self._max_size <= 0:
+            return
+
+        chave = self.digest(token)
+
+        with self._lock:
+            self._itens[chave] = (payload, float(exp))
+            self._itens.move_to_end(chave)
+
+            while len(self._itens) > self._max_size:
+                self._itens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
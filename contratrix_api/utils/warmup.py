@@ -0,0 +1,102 @@
+import asyncio
+import importlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from contratrix_api.database import get_engine, get_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Aquecimento:
+    """Etapas executadas uma vez, em background, logo após o startup.
+
+    O worker já responde /health/live enquanto aquece; /health/ready só
+    passa a responder 200 quando todas as etapas concluíram. Etapas que
+    falham (banco fora do ar, por exemplo) são repetidas a cada
+    `intervalo_retentativa` segundos.
+    """
+
+    intervalo_retentativa: float = 5.0
+    etapas: dict[str, Callable[[], object]] = field(default_factory=dict)
+    duracoes: dict[str, float] = field(default_factory=dict)
+    falhas: dict[str, str] = field(default_factory=dict)
+    pronto: bool = False
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    def registrar(self, nome: str, funcao: Callable[[], object]):
+        self.etapas[nome] = funcao
+
+    def executar(self) -> bool:
+        """Roda as etapas pendentes; devolve True se todas concluíram."""
+        for nome, funcao in self.etapas.items():
+            if nome in self.duracoes:
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                funcao()
+            except Exception as exc:
+                self.falhas[nome] = repr(exc)
+                logger.exception(f'Falha no aquecimento: {nome}')
+                continue
+
+            self.duracoes[nome] = time.perf_counter() - inicio
+            self.falhas.pop(nome, None)
+
+        return len(self.duracoes) == len(self.etapas)
+
+    async def _loop(self):
+        inicio = time.perf_counter()
+
+        while not await asyncio.to_thread(self.executar):
+            await asyncio.sleep(self.intervalo_retentativa)
+
+        self.pronto = True
+        logger.info(
+            f'Aquecimento concluído em {time.perf_counter() - inicio:.3f}s: '
+            + ', '.join(f'{n}={d:.3f}s' for n, d in self.duracoes.items())
+        )
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        # Sai do balanceador antes de encerrar as dependências
+        self.pronto = False
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+aquecimento = Aquecimento()
+
+
+def abrir_conexoes(quantidade: int):
+    # Abre as conexões ao mesmo tempo (e não uma de cada vez, reusando a
+    # mesma) para que fiquem todas no pool
+    engine = get_engine()
+    conexoes = [engine.connect() for _ in range(quantidade)]
+
+    try:
+        for conexao in conexoes:
+            conexao.exec_driver_sql('SELECT 1')
+    finally:
+        for conexao in conexoes:
+            conexao.close()
+
+
+def carregar_catalogos(*catalogos):
+    with get_sessionmaker()() as session:
+        for catalogo in catalogos:
+            catalogo.get(session)
+
+
+def importar_modulos(nomes: str):
+    for nome in filter(None, (n.strip() for n in nomes.split(','))):
+        importlib.import_module(nome)
@@ -8,10 +8,10 @@ from alembic import context
 from alembic import context
 
 from contratrix_api.models import table_registry
-from contratrix_api.settings import Settings
+from contratrix_api.settings import get_settings
 
 config = context.config
-config.set_main_option('sqlalchemy.url', Settings().DATABASE_URL)
+config.set_main_option('sqlalchemy.url', get_settings().DATABASE_URL)
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
@@ -0,0 +1,32 @@
+"""adicionado colunas de storage do html na tabela documentos
+
+Revision ID: 3b7e0c9a1f52
+Revises: e332d04c76e6
+Create Date: 2026-10-19 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e0c9a1f52'
+down_revision: Union[str, None] = 'e332d04c76e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documentos', sa.Column('html_key', sa.String(), nullable=True))
+    op.add_column('documentos', sa.Column('html_size', sa.Integer(), nullable=True))
+    op.add_column('documentos', sa.Column('html_sha256', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('documentos', 'html_sha256')
+    op.drop_column('documentos', 'html_size')
+    op.drop_column('documentos', 'html_key')
@@ -0,0 +1,28 @@
+"""indice parcial de fim_plano na tabela users
+
+Revision ID: 617624367ca0
+Revises: 70ea0e2e11e7
+Create Date: 2026-10-19 13:15:40.533213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '617624367ca0'
+down_revision: Union[str, None] = '70ea0e2e11e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_fim_plano_ativos', 'users', ['fim_plano'], unique=False, postgresql_where="status IN ('active', 'ativo')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_fim_plano_ativos', table_name='users', postgresql_where="status IN ('active', 'ativo')")
@@ -0,0 +1,30 @@
+"""contador de uso e restricao unica de cupom por usuario
+
+Revision ID: 7c41d2e8a9b0
+Revises: 3b7e0c9a1f52
+Create Date: 2026-10-19 10:02:47.118530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41d2e8a9b0'
+down_revision: Union[str, None] = '3b7e0c9a1f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cupons', sa.Column('usados', sa.Integer(), server_default='0', nullable=False))
+    op.create_unique_constraint('uq_cupom_usado_cupom_user', 'cupom_usado', ['cupom_id', 'user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_cupom_usado_cupom_user', 'cupom_usado', type_='unique')
+    op.drop_column('cupons', 'usados')
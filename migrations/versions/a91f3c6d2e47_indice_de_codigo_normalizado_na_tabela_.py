@@ -0,0 +1,28 @@
+"""indice de codigo normalizado na tabela cupons
+
+Revision ID: a91f3c6d2e47
+Revises: 7c41d2e8a9b0
+Create Date: 2026-10-19 10:41:05.562291
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91f3c6d2e47'
+down_revision: Union[str, None] = '7c41d2e8a9b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_cupons_code_upper', 'cupons', [sa.text('upper(code)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cupons_code_upper', table_name='cupons')
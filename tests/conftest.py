@@ -0,0 +1,157 @@
+import os
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+
+# Testes de integração: Postgres com as migrations aplicadas (alembic
+# upgrade head) em TEST_DATABASE_URL. As rotas usam o ambiente da API, que
+# deve apontar para o mesmo banco (DATABASE_URL = TEST_DATABASE_URL).
+requer_banco = pytest.mark.skipif(
+    not os.environ.get('TEST_DATABASE_URL'),
+    reason='requer um Postgres local em TEST_DATABASE_URL',
+)
+
+# Tabelas com FK para users, apagadas antes do próprio usuário
+_DEPENDENTES_USUARIO = (
+    'refresh_tokens',
+    'password_reset_tokens',
+    'prestador',
+    'clientes',
+    'documentos',
+)
+
+
+def criar_engine(**kwargs):
+    # Importes tardios: os testes unitários rodam sem sqlalchemy/fastapi
+    from sqlalchemy import create_engine  # noqa: PLC0415
+
+    return create_engine(os.environ['TEST_DATABASE_URL'], **kwargs)
+
+
+def apagar_usuarios(session, user_ids):
+    from sqlalchemy import text  # noqa: PLC0415
+
+    # A API devolve ids como texto; o cast cobre os dois casos
+    ids = {'ids': [str(user_id) for user_id in user_ids]}
+    do_usuario = 'user_id = ANY(CAST(:ids AS uuid[]))'
+
+    session.execute(
+        text(
+            'DELETE FROM render_jobs WHERE documento_id IN '
+            f'(SELECT id FROM documentos WHERE {do_usuario})'
+        ),
+        ids,
+    )
+    for tabela in _DEPENDENTES_USUARIO:
+        session.execute(text(f'DELETE FROM {tabela} WHERE {do_usuario}'), ids)
+    session.execute(
+        text('DELETE FROM users WHERE id = ANY(CAST(:ids AS uuid[]))'), ids
+    )
+    session.commit()
+
+
+def cadastrar(client, email: str, password: str = 'secret'):
+    return client.post(
+        '/users/',
+        json={
+            'nome': 'T',
+            'sobrenome': 'T',
+            'email': email,
+            'password': password,
+            'termos': {'aceito': True, 'data_aceite': '2025-01-01T00:00:00'},
+        },
+    )
+
+
+@pytest.fixture(scope='session')
+def engine():
+    # Pool grande o bastante para os testes de concorrência
+    engine = criar_engine(pool_size=50, max_overflow=0)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    # Peça depois de `usuarios`: a transação aberta é desfeita antes da
+    # limpeza dos usuários, que senão esperaria pelos locks dela
+    from sqlalchemy.orm import Session  # noqa: PLC0415
+
+    with Session(engine) as session:
+        yield session
+        session.rollback()
+
+
+@pytest.fixture
+def usuarios(engine):
+    # Fábrica de usuários inseridos direto no banco, sem passar pelas rotas
+    from sqlalchemy import text  # noqa: PLC0415
+    from sqlalchemy.orm import Session  # noqa: PLC0415
+
+    criados = []
+
+    def criar(status='active', fim_plano=None):
+        user_id = uuid4()
+        with Session(engine) as session:
+            session.execute(
+                text(
+                    'INSERT INTO users (id, nome, sobrenome, password, '
+                    'email, primeiro_acesso, termos, role, status, '
+                    "fim_plano) VALUES (:id, 'T', 'T', 'x', :email, false, "
+                    "'[]', 'user', :status, :fim_plano)"
+                ),
+                {
+                    'id': user_id,
+                    'email': f'{user_id}@testes.test',
+                    'status': status,
+                    'fim_plano': fim_plano,
+                },
+            )
+            session.commit()
+        criados.append(user_id)
+        return user_id
+
+    yield criar
+
+    with Session(engine) as session:
+        apagar_usuarios(session, criados)
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient  # noqa: PLC0415
+    from pydantic import ValidationError  # noqa: PLC0415
+
+    from contratrix_api.app import app  # noqa: PLC0415
+    from contratrix_api.settings import get_settings  # noqa: PLC0415
+
+    try:
+        get_settings()
+    except ValidationError:
+        pytest.skip('requer o .env/ambiente da API')
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def api(client, monkeypatch):
+    # Cliente autenticado como um usuário cadastrado pelas próprias rotas
+    from contratrix_api.database import get_sessionmaker  # noqa: PLC0415
+    from contratrix_api.settings import get_settings  # noqa: PLC0415
+
+    monkeypatch.setattr(get_settings(), 'RATE_LIMIT_ENABLED', False)
+
+    email = f'{uuid4().hex[:8]}@testes.com'
+    resposta = cadastrar(client, email)
+    assert resposta.status_code == HTTPStatus.CREATED, resposta.text
+    user_id = resposta.json()['id']
+    token = client.post(
+        '/auth/token', data={'username': email, 'password': 'secret'}
+    ).json()['access_token']
+
+    client.headers['Authorization'] = f'Bearer {token}'
+    yield client, user_id
+
+    with get_sessionmaker()() as session:
+        apagar_usuarios(session, [user_id])
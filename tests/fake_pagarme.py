@@ -0,0 +1,103 @@
+"""Pagar.me falso para testes e testes de carga do checkout.
+
+Responde POST /transactions e POST /subscriptions respeitando o header
+Idempotency-Key: a mesma chave devolve sempre a mesma cobrança. Latência e
+falhas são configuráveis para exercitar timeouts e o circuit breaker.
+
+Uso:
+    python -m tests.fake_pagarme [--port 8089] [--latencia 0.05] [--falhas 0]
+
+e aponte a API para ele com PAGARME_API_URL=http://127.0.0.1:8089.
+"""
+
+import argparse
+import asyncio
+import itertools
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class FakePagarme:
+    def __init__(
+        self, latencia: float = 0.0, falhas: int = 0, recusas: int = 0
+    ):
+        self.latencia = latencia
+        # Quantas das próximas chamadas respondem 503
+        self.falhas = falhas
+        # Quantas das próximas chamadas são recusadas (400)
+        self.recusas = recusas
+        self.chamadas = 0
+        # Maior número de requisições simultâneas observado
+        self.em_voo = 0
+        self.pico = 0
+        self.cobrancas: dict[str, dict] = {}
+        self._ids = itertools.count(1)
+        self.app = Starlette(
+            routes=[
+                Route('/transactions', self._criar('tran'), methods=['POST']),
+                Route('/subscriptions', self._criar('sub'), methods=['POST']),
+            ]
+        )
+
+    def _criar(self, prefixo: str):
+        async def endpoint(request: Request):
+            self.chamadas += 1
+            self.em_voo += 1
+            self.pico = max(self.pico, self.em_voo)
+
+            try:
+                if self.latencia:
+                    await asyncio.sleep(self.latencia)
+            finally:
+                self.em_voo -= 1
+
+            if self.falhas > 0:
+                self.falhas -= 1
+                return JSONResponse({'errors': 'indisponível'}, 503)
+
+            if self.recusas > 0:
+                self.recusas -= 1
+                return JSONResponse({'errors': 'cartão recusado'}, 400)
+
+            dados = await request.json()
+            chave = request.headers.get('idempotency-key')
+
+            if chave and chave in self.cobrancas:
+                return JSONResponse(self.cobrancas[chave])
+
+            id_cobranca = f'{prefixo}_{next(self._ids)}'
+            cobranca = {
+                'id': id_cobranca,
+                'status': 'processing',
+                'amount': dados.get('amount'),
+                'metadata': dados.get('metadata', {}),
+                'checkout_url': f'https://fake.pagar.me/checkout/{id_cobranca}',
+            }
+
+            if chave:
+                self.cobrancas[chave] = cobranca
+
+            return JSONResponse(cobranca)
+
+        return endpoint
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latencia', type=float, default=0.0)
+    parser.add_argument('--falhas', type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakePagarme(latencia=args.latencia, falhas=args.falhas)
+    uvicorn.run(
+        fake.app, host='127.0.0.1', port=args.port, log_level='warning'
+    )
+
+
+if __name__ == '__main__':
+    main()
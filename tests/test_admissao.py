@@ -0,0 +1,83 @@
+import asyncio
+import time
+from http import HTTPStatus
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+pytest.importorskip('pydantic_settings')
+
+import anyio.to_thread  # noqa: E402
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from contratrix_api.utils.admissao import (  # noqa: E402
+    AdmissaoMiddleware,
+    MonitorCarga,
+    classificar,
+)
+
+
+def test_classificacao_das_rotas():
+    assert classificar('POST', '/webhook/pagarme') == 'protegida'
+    assert classificar('POST', '/checkout/avulso') == 'protegida'
+    assert classificar('GET', '/metrics/') == 'baixa'
+    assert classificar('GET', '/documentos/') == 'baixa'
+    assert classificar('GET', '/documentos/123') == 'normal'
+    assert classificar('POST', '/documentos/') == 'normal'
+
+
+def test_lag_do_event_loop_descarta_baixa_prioridade_primeiro():
+    monitor = MonitorCarga(max_em_voo=100, max_fila=100, max_lag=0.2)
+
+    async def cenario():
+        monitor.lag = 0.12
+        return [monitor.admitir(p) for p in ('baixa', 'normal', 'protegida')]
+
+    assert asyncio.run(cenario()) == [False, True, True]
+    assert monitor.rejeitadas == {'baixa': 1}
+
+
+def test_fila_do_threadpool_gera_503_sem_afetar_webhook():
+    monitor = MonitorCarga(max_em_voo=1000, max_fila=2, max_lag=10)
+    app = FastAPI()
+
+    @app.get('/documentos/{id}')
+    def lento(id: str):
+        time.sleep(0.2)
+        return {'id': id}
+
+    @app.post('/webhook/pagarme')
+    def webhook():
+        time.sleep(0.2)
+        return {}
+
+    app.add_middleware(AdmissaoMiddleware, monitor=monitor)
+
+    async def cenario():
+        # Threadpool pequeno para saturar rápido
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 2
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://t'
+        ) as c:
+            normais = []
+            for i in range(12):
+                normais.append(asyncio.create_task(c.get(f'/documentos/{i}')))
+                await asyncio.sleep(0.005)
+            webhooks = [c.post('/webhook/pagarme') for _ in range(3)]
+            return (
+                [r.status_code for r in await asyncio.gather(*normais)],
+                [r.status_code for r in await asyncio.gather(*webhooks)],
+            )
+
+    normais, webhooks = asyncio.run(cenario())
+
+    assert HTTPStatus.SERVICE_UNAVAILABLE in normais
+    assert HTTPStatus.OK in normais
+    assert webhooks == [HTTPStatus.OK] * len(webhooks)
+    assert monitor.rejeitadas['normal'] == normais.count(
+        HTTPStatus.SERVICE_UNAVAILABLE
+    )
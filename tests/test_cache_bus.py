@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy.orm import Session  # noqa: E402
+
+from contratrix_api.utils import cache_bus  # noqa: E402
+from tests.conftest import requer_banco  # noqa: E402
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr(cache_bus, '_handlers', cache_bus.defaultdict(list))
+    return cache_bus._handlers
+
+
+def test_dispatch_chama_so_os_handlers_da_entidade(handlers):
+    recebidos = []
+    cache_bus.subscribe(
+        'planos', lambda chave: recebidos.append(('planos', chave))
+    )
+    cache_bus.subscribe(
+        'templates', lambda chave: recebidos.append(('templates', chave))
+    )
+
+    cache_bus.dispatch('planos:123')
+
+    assert recebidos == [('planos', '123')]
+
+
+def test_dispatch_curinga_invalida_todas_as_entidades(handlers):
+    recebidos = []
+    cache_bus.subscribe('planos', recebidos.append)
+    cache_bus.subscribe('templates', recebidos.append)
+
+    cache_bus.dispatch('*:*')
+
+    assert recebidos == ['*', '*']
+
+
+@requer_banco
+def test_notify_so_e_entregue_apos_o_commit(handlers, engine, monkeypatch):
+    monkeypatch.setattr(cache_bus, 'get_engine', lambda: engine)
+
+    conectado, recebido = threading.Event(), threading.Event()
+
+    def handler(chave):
+        # O listener dispara '*' logo depois do LISTEN
+        (conectado if chave == '*' else recebido).set()
+
+    cache_bus.subscribe('planos', handler)
+
+    listener = cache_bus.CacheListener(poll_timeout=0.1)
+    listener.start()
+    try:
+        assert conectado.wait(5)
+
+        with Session(engine) as session:
+            cache_bus.notify(session, 'planos', 42)
+            session.rollback()
+            assert not recebido.wait(1)
+
+            cache_bus.notify(session, 'planos', 42)
+            session.commit()
+            assert recebido.wait(5)
+    finally:
+        listener.stop()
+        listener.join(timeout=5)
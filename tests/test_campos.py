@@ -0,0 +1,109 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from contratrix_api.utils.campos import (  # noqa: E402
+    ORIGEM_CLIENTE,
+    ORIGEM_DADOS,
+    ORIGEM_PRESTADOR,
+    CachePlanos,
+    CamposInvalidos,
+    compilar,
+)
+
+HTML = (
+    '<p>{{nome_prestador}} contrata {{ nome_cliente }} por {{valor}} '
+    'em {{data}}. {{livre}}</p>'
+)
+
+
+def test_origem_inferida_como_na_resolucao_original():
+    plano = compilar(
+        ['nome_prestador', {'name': 'nome_cliente'}, {'name': 'valor'}], HTML
+    )
+
+    assert [(v.nome, v.origem) for v in plano.vinculos] == [
+        ('nome_prestador', ORIGEM_PRESTADOR),
+        ('nome_cliente', ORIGEM_CLIENTE),
+        ('valor', ORIGEM_DADOS),
+    ]
+    assert plano.extras == ('data', 'livre')
+
+
+def test_atributo_inexistente_e_recusado_na_compilacao():
+    with pytest.raises(ValueError, match='não tem o atributo nao_existe'):
+        compilar(
+            [{'name': 'x', 'origem': 'cliente', 'atributo': 'nao_existe'}], ''
+        )
+
+    with pytest.raises(ValueError, match='tipo cor desconhecido'):
+        compilar([{'name': 'x', 'tipo': 'cor'}], '')
+
+
+def test_renderiza_numa_passada():
+    plano = compilar(
+        [
+            {'name': 'nome_prestador'},
+            {'name': 'nome_cliente'},
+            {'name': 'valor', 'tipo': 'numero'},
+        ],
+        HTML,
+    )
+    perfil = SimpleNamespace(nome_prestador='Ana')
+    cliente = SimpleNamespace(nome_cliente=None)
+
+    valores = plano.resolver(
+        perfil,
+        cliente,
+        {'nome_cliente': 'Bruno', 'valor': '1.500,00', 'data': '01/02/2025'},
+    )
+
+    # Sem valor no cliente, vale o payload; placeholder sem valor fica intacto
+    assert plano.renderizar(valores) == (
+        '<p>Ana contrata Bruno por 1.500,00 em 01/02/2025. {{livre}}</p>'
+    )
+
+
+def test_erros_de_todos_os_campos_juntos():
+    plano = compilar(
+        [
+            {'name': 'valor', 'tipo': 'numero', 'obrigatorio': True},
+            {'name': 'data', 'tipo': 'data', 'obrigatorio': True},
+            {'name': 'email', 'tipo': 'email'},
+            {'name': 'nome_cliente', 'obrigatorio': True},
+        ],
+        HTML,
+    )
+
+    with pytest.raises(CamposInvalidos) as exc:
+        plano.resolver(None, None, {'valor': 'abc', 'email': 'sem-arroba'})
+
+    assert exc.value.erros == [
+        ('valor', 'número inválido'),
+        ('data', 'obrigatório'),
+        ('email', 'email inválido'),
+        ('nome_cliente', 'obrigatório'),
+    ]
+
+
+def test_cache_por_versao_do_template():
+    cache = CachePlanos(max_size=2)
+    template = SimpleNamespace(
+        id=1,
+        updated_at=datetime(2025, 1, 1),
+        campos=['valor'],
+        template_html='{{valor}}',
+    )
+
+    plano = cache.get(template)
+    assert cache.get(template) is plano
+
+    template.updated_at = datetime(2025, 1, 2)
+    template.template_html = 'R$ {{valor}}'
+    novo = cache.get(template)
+
+    assert novo is not plano
+    assert novo.renderizar({'valor': '10'}) == 'R$ 10'
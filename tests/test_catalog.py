@@ -0,0 +1,221 @@
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import delete  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from contratrix_api.models import Planos  # noqa: E402
+from contratrix_api.routers import planos  # noqa: E402
+from contratrix_api.utils import cache_bus  # noqa: E402
+from contratrix_api.utils.catalog import (  # noqa: E402
+    Catalog,
+    fingerprint,
+    paginate,
+)
+from tests.conftest import criar_engine, requer_banco  # noqa: E402
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def banco():
+    # Simula a tabela compartilhada pelas duas instâncias da aplicação
+    return {'planos': [], 'consultas': 0}
+
+
+def _loader(banco):
+    def carregar(session):
+        banco['consultas'] += 1
+        return list(banco['planos'])
+
+    return carregar
+
+
+def _plano(nome, minuto=0):
+    return SimpleNamespace(
+        nome=nome, updated_at=datetime(2026, 1, 1, 0, minuto)
+    )
+
+
+def test_catalogo_responde_da_memoria_ate_expirar(banco):
+    relogio = Relogio()
+    catalogo = Catalog(_loader(banco), ttl=60, clock=relogio)
+    banco['planos'].append(_plano('Básico'))
+
+    catalogo.get(None)
+    catalogo.get(None)
+    assert banco['consultas'] == 1
+
+    relogio.agora = 61
+    catalogo.get(None)
+    assert banco['consultas'] == len(['carga inicial', 'após o TTL'])
+
+
+def test_duas_instancias_convergem_apos_escrita(banco):
+    relogio = Relogio()
+    instancia_a = Catalog(_loader(banco), ttl=60, clock=relogio)
+    instancia_b = Catalog(_loader(banco), ttl=60, clock=relogio)
+    banco['planos'].append(_plano('Básico'))
+    instancia_a.get(None)
+    instancia_b.get(None)
+
+    # Escrita feita pela instância A: ela invalida só o próprio cache
+    banco['planos'].append(_plano('Pro', minuto=1))
+    instancia_a.invalidate()
+
+    assert len(instancia_a.get(None)) == len(banco['planos'])
+    assert len(instancia_b.get(None)) == 1
+
+    # Sem o cache bus, a instância B converge no máximo em um TTL
+    relogio.agora = 61
+    assert fingerprint(instancia_b.get(None)) == fingerprint(
+        instancia_a.get(None)
+    )
+
+
+def test_invalidacao_durante_a_carga_nao_fica_em_cache(banco):
+    catalogo = Catalog(None, ttl=60, clock=Relogio())
+
+    def carregar_e_invalidar(session):
+        banco['consultas'] += 1
+        catalogo.invalidate()
+        return []
+
+    catalogo._loader = carregar_e_invalidar
+    catalogo.get(None)
+    catalogo._loader = _loader(banco)
+    catalogo.get(None)
+
+    assert banco['consultas'] == len(['invalidada', 'recarregada'])
+
+
+def test_invalidate_entre_a_verificacao_e_o_retorno(banco):
+    banco['planos'].append(_plano('Básico'))
+    relogio = Relogio()
+    catalogo = Catalog(_loader(banco), ttl=60, clock=relogio)
+    catalogo.get(None)
+
+    # O relógio é lido depois de _itens no caminho rápido: invalidar
+    # aqui reproduz a intercalação exata da corrida
+    def relogio_que_invalida():
+        catalogo.invalidate()
+        return relogio()
+
+    catalogo._clock = relogio_que_invalida
+
+    assert catalogo.get(None) == tuple(banco['planos'])
+
+
+def test_get_nunca_devolve_none_com_invalidate_concorrente(banco):
+    banco['planos'].append(_plano('Básico'))
+    catalogo = Catalog(_loader(banco), ttl=60)
+    parar = threading.Event()
+
+    def invalidar():
+        while not parar.is_set():
+            catalogo.invalidate()
+
+    thread = threading.Thread(target=invalidar)
+    thread.start()
+    try:
+        resultados = [catalogo.get(None) for _ in range(20_000)]
+    finally:
+        parar.set()
+        thread.join()
+
+    assert all(itens == tuple(banco['planos']) for itens in resultados)
+
+
+def test_paginacao_em_memoria():
+    itens = [_plano(str(i)) for i in range(25)]
+
+    pagina = paginate(itens, page=3, limit=10, chave='planos')
+
+    assert pagina['total'] == len(itens)
+    assert pagina['pages'] == len(['1-10', '11-20', '21-25'])
+    assert [p.nome for p in pagina['planos']] == [
+        '20',
+        '21',
+        '22',
+        '23',
+        '24',
+    ]
+
+
+@requer_banco
+def test_duas_instancias_no_mesmo_banco_convergem_pelo_notify(monkeypatch):
+    # Cada instância tem seu engine e seu catálogo; a B só fica sabendo da
+    # escrita da A pelo NOTIFY, já que o TTL é longo demais para o teste
+    engine_a = criar_engine()
+    engine_b = criar_engine()
+    monkeypatch.setattr(cache_bus, '_handlers', cache_bus.defaultdict(list))
+    monkeypatch.setattr(cache_bus, 'get_engine', lambda: engine_b)
+
+    instancia_a = Catalog(planos._carregar_planos, ttl=3600)
+    instancia_b = Catalog(planos._carregar_planos, ttl=3600)
+    conectado, invalidado = threading.Event(), threading.Event()
+
+    def handler_b(chave):
+        instancia_b.invalidate()
+        # O listener dispara '*' logo depois do LISTEN
+        (conectado if chave == cache_bus.TODOS else invalidado).set()
+
+    cache_bus.subscribe('planos', handler_b)
+    listener = cache_bus.CacheListener(poll_timeout=0.1)
+    listener.start()
+
+    plano_id = None
+    try:
+        assert conectado.wait(5)
+
+        with Session(engine_a) as session_a, Session(engine_b) as session_b:
+            antes = instancia_a.get(session_a)
+            assert fingerprint(instancia_b.get(session_b)) == fingerprint(
+                antes
+            )
+
+            plano = Planos(
+                nome='Catálogo entre instâncias',
+                descricao='d',
+                preco_cents=100,
+                ciclo_faturamento='mensal',
+                pagarme_planoId='p',
+                status='active',
+            )
+            session_a.add(plano)
+            session_a.flush()
+            plano_id = plano.id
+            cache_bus.notify(session_a, 'planos', plano_id)
+            session_a.commit()
+            instancia_a.invalidate()
+
+            assert invalidado.wait(5)
+
+            depois_a = instancia_a.get(session_a)
+            depois_b = instancia_b.get(session_b)
+
+        assert plano_id in {item.id for item in depois_b}
+        assert fingerprint(depois_b) == fingerprint(depois_a)
+        assert fingerprint(depois_b) != fingerprint(antes)
+    finally:
+        listener.stop()
+        listener.join(timeout=10)
+        if plano_id is not None:
+            with Session(engine_a) as session:
+                session.execute(delete(Planos).where(Planos.id == plano_id))
+                session.commit()
+        engine_a.dispose()
+        engine_b.dispose()
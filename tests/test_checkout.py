@@ -0,0 +1,77 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import delete, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from contratrix_api.models import (  # noqa: E402
+    OutboxPagamento,
+    Planos,
+    Transacoes,
+)
+from tests.conftest import requer_banco  # noqa: E402
+
+pytestmark = requer_banco
+
+
+@pytest.fixture
+def plano_id(engine):
+    with Session(engine) as session:
+        plano = Planos(
+            nome='Teste checkout',
+            descricao='',
+            preco_cents=1000,
+            ciclo_faturamento='mensal',
+            pagarme_planoId='plan_teste',
+            status='active',
+        )
+        session.add(plano)
+        session.commit()
+        plano_id = plano.id
+
+    yield plano_id
+
+    with Session(engine) as session:
+        transacoes = select(Transacoes.id).where(
+            Transacoes.plano_id == plano_id
+        )
+        session.execute(
+            delete(OutboxPagamento).where(
+                OutboxPagamento.transacao_id.in_(transacoes)
+            )
+        )
+        session.execute(
+            delete(Transacoes).where(Transacoes.plano_id == plano_id)
+        )
+        session.execute(delete(Planos).where(Planos.id == plano_id))
+        session.commit()
+
+
+def test_checkout_e_do_usuario_autenticado(api, plano_id, engine):
+    client, user_id = api
+
+    # userId de outro usuário no corpo não muda o dono da transação
+    resposta = client.post(
+        '/checkout/avulso',
+        json={
+            'userId': str(uuid4()),
+            'planoId': str(plano_id),
+            'cupom_code': '',
+        },
+    )
+    assert resposta.status_code == HTTPStatus.ACCEPTED, resposta.text
+
+    with Session(engine) as session:
+        dono = session.scalar(
+            select(Transacoes.user_id).where(
+                Transacoes.id == resposta.json()['id']
+            )
+        )
+
+    assert str(dono) == user_id
@@ -0,0 +1,132 @@
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('pydantic_settings')
+
+from contratrix_api.utils import cupons  # noqa: E402
+from contratrix_api.utils.cupons import (  # noqa: E402
+    TTL_CUPOM_INEXISTENTE,
+    CupomAtivo,
+    CupomIndisponivel,
+    buscar_cupom_ativo,
+    calcular_valor_final,
+    invalidar_cache,
+    validar_cupom,
+)
+
+
+def _cupom(tipo_desconto, valor_desconto, termino=None):
+    agora = datetime.utcnow()
+    return CupomAtivo(
+        id=uuid4(),
+        code='PROMO',
+        tipo_desconto=tipo_desconto,
+        valor_desconto=valor_desconto,
+        aplicavel='all',
+        inicio=agora - timedelta(days=1),
+        termino=termino or agora + timedelta(days=1),
+    )
+
+
+@pytest.mark.parametrize(
+    ('preco', 'desconto', 'esperado'),
+    [
+        (10000, None, 10000),
+        (10000, ('percentual', 15), 8500),
+        (10000, ('fixo', 2500), 7500),
+        (1000, ('fixo', 2500), 0),
+    ],
+)
+def test_calcular_valor_final(preco, desconto, esperado):
+    cupom = _cupom(*desconto) if desconto else None
+
+    assert calcular_valor_final(preco, cupom) == esperado
+
+
+def test_validar_cupom():
+    validar_cupom(_cupom('fixo', 100))
+
+    with pytest.raises(CupomIndisponivel, match='inválido'):
+        validar_cupom(None)
+
+    expirado = _cupom(
+        'fixo', 100, termino=datetime.utcnow() - timedelta(hours=1)
+    )
+    with pytest.raises(CupomIndisponivel, match='expirado'):
+        validar_cupom(expirado)
+
+
+class _SessaoFalsa:
+    def __init__(self, cupons_ativos=()):
+        self.cupons = list(cupons_ativos)
+        self.consultas = 0
+
+    def execute(self, _):
+        self.consultas += 1
+        row = (
+            SimpleNamespace(_mapping=asdict(self.cupons[0]))
+            if self.cupons
+            else None
+        )
+        return SimpleNamespace(first=lambda: row)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    settings = SimpleNamespace(CUPOM_CACHE_TTL_SECONDS=60, CUPOM_CACHE_SIZE=2)
+
+    monkeypatch.setattr(cupons, '_clock', lambda: agora[0])
+    monkeypatch.setattr(cupons, 'get_settings', lambda: settings)
+    invalidar_cache()
+    yield agora
+    invalidar_cache()
+
+
+def test_cache_ttl_limitado_ao_termino(relogio):
+    termino = datetime.utcnow() + timedelta(seconds=10)
+    session = _SessaoFalsa([_cupom('fixo', 100, termino=termino)])
+
+    buscar_cupom_ativo(session, 'promo')
+    relogio[0] += 5
+    buscar_cupom_ativo(session, 'promo')
+    assert session.consultas == 1
+
+    relogio[0] += 10
+    buscar_cupom_ativo(session, 'promo')
+    assert session.consultas == len(['inicial', 'apos_termino'])
+
+
+def test_cache_de_miss_expira(relogio):
+    session = _SessaoFalsa()
+
+    assert buscar_cupom_ativo(session, 'nao-existe') is None
+    assert buscar_cupom_ativo(session, 'NAO-EXISTE') is None
+    assert session.consultas == 1
+
+    relogio[0] += TTL_CUPOM_INEXISTENTE
+    buscar_cupom_ativo(session, 'nao-existe')
+    assert session.consultas == len(['inicial', 'apos_ttl'])
+
+
+def test_invalidar_cache_limpa_entradas(relogio):
+    session = _SessaoFalsa([_cupom('fixo', 100)])
+
+    buscar_cupom_ativo(session, 'promo')
+    invalidar_cache('promo')
+    buscar_cupom_ativo(session, 'promo')
+
+    assert session.consultas == len(['inicial', 'apos_invalidar'])
+
+
+def test_cache_descarta_menos_recente(relogio):
+    session = _SessaoFalsa()
+
+    for code in ('a', 'b', 'c'):
+        buscar_cupom_ativo(session, code)
+
+    assert list(cupons._cache) == ['B', 'C']
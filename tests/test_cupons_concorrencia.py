@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import delete, select, update  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from contratrix_api.models import Cupom, CupomUsage  # noqa: E402
+from contratrix_api.utils.cupons import (  # noqa: E402
+    CupomIndisponivel,
+    resgatar_cupom,
+)
+from tests.conftest import requer_banco  # noqa: E402
+
+pytestmark = requer_banco
+
+
+@pytest.fixture
+def criar_cupom(engine):
+    criados = []
+
+    def criar(quantidade_total, limit_uso_usuario, code=None):
+        agora = datetime.utcnow()
+        with Session(engine) as session:
+            cupom = Cupom(
+                code=code or f'TESTE-{uuid4().hex[:8]}',
+                tipo_desconto='percentual',
+                valor_desconto=10,
+                aplicavel='todos',
+                quantidade_total=quantidade_total,
+                limit_uso_usuario=limit_uso_usuario,
+                inicio=agora - timedelta(days=1),
+                termino=agora + timedelta(days=1),
+                observacao='',
+                status='active',
+            )
+            session.add(cupom)
+            session.commit()
+            criados.append(cupom.id)
+            return cupom.id
+
+    yield criar
+
+    with Session(engine) as session:
+        session.execute(delete(Cupom).where(Cupom.id.in_(criados)))
+        session.commit()
+
+
+def _checkouts_paralelos(engine, cupom_id, usuarios):
+    def checkout(user_id):
+        with Session(engine) as session:
+            try:
+                resgatar_cupom(session, cupom_id, user_id)
+            except CupomIndisponivel:
+                session.rollback()
+                return False
+            session.commit()
+            return True
+
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        return sum(executor.map(checkout, usuarios))
+
+
+def test_cupom_nunca_excede_a_quantidade_total(engine, criar_cupom):
+    quantidade_total = 50
+    cupom_id = criar_cupom(
+        quantidade_total=quantidade_total, limit_uso_usuario=1
+    )
+
+    resgates = _checkouts_paralelos(
+        engine, cupom_id, [uuid4() for _ in range(300)]
+    )
+
+    with Session(engine) as session:
+        usados = session.scalar(
+            select(Cupom.usados).where(Cupom.id == cupom_id)
+        )
+
+    assert resgates == quantidade_total
+    assert usados == quantidade_total
+
+
+def test_limite_por_usuario_sob_concorrencia(engine, criar_cupom):
+    limite = 3
+    cupom_id = criar_cupom(quantidade_total=1000, limit_uso_usuario=limite)
+    user_id = uuid4()
+
+    resgates = _checkouts_paralelos(engine, cupom_id, [user_id] * 100)
+
+    with Session(engine) as session:
+        usados = session.scalar(
+            select(Cupom.usados).where(Cupom.id == cupom_id)
+        )
+        uso = session.scalar(
+            select(CupomUsage.quantidade_usado).where(
+                CupomUsage.cupom_id == cupom_id,
+                CupomUsage.user_id == user_id,
+            )
+        )
+
+    assert resgates == limite
+    assert uso == limite
+    assert usados == limite
+
+
+def test_codigo_unico_sem_diferenciar_caixa(engine, criar_cupom):
+    code = f'caixa-{uuid4().hex[:8]}'
+    cupom_id = criar_cupom(quantidade_total=10, limit_uso_usuario=1, code=code)
+
+    with pytest.raises(IntegrityError):
+        criar_cupom(
+            quantidade_total=10, limit_uso_usuario=1, code=code.upper()
+        )
+
+    # Excluído (soft delete), o código fica livre para um cupom novo
+    with Session(engine) as session:
+        session.execute(
+            update(Cupom).where(Cupom.id == cupom_id).values(status='deleted')
+        )
+        session.commit()
+
+    criar_cupom(quantidade_total=10, limit_uso_usuario=1, code=code.upper())
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from contratrix_api.utils import agendador  # noqa: E402
+from contratrix_api.utils.expirar_planos import expirar_planos  # noqa: E402
+from tests.conftest import requer_banco  # noqa: E402
+
+pytestmark = requer_banco
+
+
+def _status(engine, user_id):
+    with Session(engine) as session:
+        return session.scalar(
+            text('SELECT status FROM users WHERE id = :id'), {'id': user_id}
+        )
+
+
+def test_expira_apenas_planos_vencidos(engine, usuarios):
+    ontem = datetime.utcnow() - timedelta(days=1)
+    amanha = datetime.utcnow() + timedelta(days=1)
+
+    vencidos = [usuarios('ativo', ontem) for _ in range(7)]
+    vigente = usuarios('ativo', amanha)
+    cancelado = usuarios('cancelado', ontem)
+
+    with Session(engine) as session:
+        assert expirar_planos(session, batch_size=3) >= len(vencidos)
+
+    assert {_status(engine, user_id) for user_id in vencidos} == {'expirado'}
+    assert _status(engine, vigente) == 'ativo'
+    assert _status(engine, cancelado) == 'cancelado'
+
+
+def test_tarefa_nao_roda_em_paralelo(engine, monkeypatch):
+    monkeypatch.setattr(agendador, 'get_engine', lambda: engine)
+    interna = agendador.TarefaPeriodica('teste', lambda session: 1, 60)
+
+    # Outra instância segurando o lock: a rodada é ignorada
+    def concorrente(session):
+        return interna.executar() or 0
+
+    externa = agendador.TarefaPeriodica('teste', concorrente, 60)
+
+    assert externa.executar() == 0
+    assert interna.metricas.ignoradas == 1
+    assert externa.metricas.execucoes == 1
+    assert interna.executar() == 1
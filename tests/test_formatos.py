@@ -0,0 +1,113 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from contratrix_api.utils import formatos  # noqa: E402
+from contratrix_api.utils.campos import CamposInvalidos, compilar  # noqa: E402
+
+
+def test_mascaras():
+    assert formatos.cpf('12345678901') == '123.456.789-01'
+    assert formatos.cnpj('12.345.678/0001-95') == '12.345.678/0001-95'
+    assert formatos.cpf_cnpj('12345678000195') == '12.345.678/0001-95'
+    assert formatos.cep('01310100') == '01310-100'
+
+    with pytest.raises(ValueError, match='CPF inválido'):
+        formatos.cpf('123')
+
+
+def test_moeda_a_partir_de_centavos():
+    assert formatos.brl_centavos('150050') == 'R$ 1.500,50'
+    assert formatos.brl_centavos(5) == 'R$ 0,05'
+    assert formatos.brl_centavos(-100) == '-R$ 1,00'
+
+    with pytest.raises(ValueError, match='valor em centavos inválido'):
+        formatos.brl_centavos('15,00')
+
+
+@pytest.mark.parametrize(
+    ('numero', 'esperado'),
+    [
+        (0, 'zero'),
+        (100, 'cem'),
+        (101, 'cento e um'),
+        (1000, 'mil'),
+        (1500, 'mil e quinhentos'),
+        (1234, 'mil duzentos e trinta e quatro'),
+        (1_200_000, 'um milhão e duzentos mil'),
+        (2_000_001, 'dois milhões e um'),
+    ],
+)
+def test_extenso(numero, esperado):
+    assert formatos.extenso(numero) == esperado
+
+
+def test_reais_por_extenso():
+    assert formatos.brl_extenso('150050') == (
+        'mil e quinhentos reais e cinquenta centavos'
+    )
+    assert formatos.brl_extenso(100) == 'um real'
+    assert formatos.brl_extenso(1) == 'um centavo'
+    assert formatos.brl_extenso(100_000_000) == 'um milhão de reais'
+
+
+def test_datas():
+    assert formatos.data_extenso('2025-03-15') == '15 de março de 2025'
+    assert formatos.data_extenso('01/02/2025') == '1º de fevereiro de 2025'
+    assert formatos.data(date(2025, 2, 1)) == '01/02/2025'
+
+    with pytest.raises(ValueError, match='data inválida'):
+        formatos.data('2025-13-01')
+
+
+def test_endereco_achatado():
+    assert (
+        formatos.endereco({
+            'cep': '01310100',
+            'rua': 'Av. Paulista',
+            'numero': '1000',
+            'complemento': None,
+            'bairro': 'Bela Vista',
+            'cidade': 'São Paulo',
+            'uf': 'SP',
+            'pais': 'Brasil',
+        })
+        == 'Av. Paulista, 1000 - Bela Vista - São Paulo/SP - CEP 01310-100'
+    )
+
+
+def test_formatos_aplicados_no_render():
+    plano = compilar(
+        [
+            {'name': 'cpf_prestador', 'formato': 'cpf'},
+            {'name': 'endereco_prestador'},
+            {'name': 'valor', 'formato': 'brl_centavos'},
+        ],
+        '{{cpf_prestador}} | {{endereco_prestador}} | {{valor}}',
+    )
+    perfil = SimpleNamespace(
+        cpf_prestador='12345678901',
+        endereco_prestador={'cidade': 'Recife', 'uf': 'PE'},
+    )
+
+    valores = plano.resolver(perfil, None, {'valor': '990'})
+
+    # Endereço sem formato declarado não sai mais como repr de dict
+    assert plano.renderizar(valores) == '123.456.789-01 | Recife/PE | R$ 9,90'
+
+
+def test_erro_de_formato_vira_campo_invalido():
+    plano = compilar(
+        [{'name': 'valor', 'formato': 'brl_centavos'}], '{{valor}}'
+    )
+
+    with pytest.raises(CamposInvalidos) as exc:
+        plano.resolver(None, None, {'valor': '12,50'})
+
+    assert exc.value.erros == [('valor', 'valor em centavos inválido')]
+
+    with pytest.raises(ValueError, match='formato moeda desconhecido'):
+        compilar([{'name': 'valor', 'formato': 'moeda'}], '')
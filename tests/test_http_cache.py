@@ -0,0 +1,170 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import text  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from contratrix_api.database import get_sessionmaker  # noqa: E402
+from contratrix_api.utils.http_cache import (  # noqa: E402
+    etag_matches,
+    make_etag,
+    not_modified,
+)
+from tests.conftest import requer_banco  # noqa: E402
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b'if-none-match', if_none_match.encode()))
+    return Request({'type': 'http', 'headers': headers})
+
+
+def test_etag_muda_com_a_versao():
+    etag = make_etag('template', 1, '2025-01-01T00:00:00')
+
+    assert etag == make_etag('template', 1, '2025-01-01T00:00:00')
+    assert etag != make_etag('template', 1, '2025-01-01T00:00:01')
+    assert etag.startswith('"')
+    assert etag.endswith('"')
+
+
+@pytest.mark.parametrize(
+    ('if_none_match', 'esperado'),
+    [
+        (None, False),
+        ('', False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"outro", W/"abc"', True),
+        ('"outro",  "mais um"', False),
+        ('*', True),
+    ],
+)
+def test_etag_matches(if_none_match, esperado):
+    assert etag_matches(_request(if_none_match), '"abc"') is esperado
+
+
+def test_not_modified_sem_corpo():
+    resposta = not_modified('"abc"', 'private, no-cache')
+
+    assert resposta.status_code == HTTPStatus.NOT_MODIFIED
+    assert resposta.body == b''
+    assert resposta.headers['etag'] == '"abc"'
+    assert resposta.headers['cache-control'] == 'private, no-cache'
+
+
+def _executar(sql: str, **params):
+    with get_sessionmaker()() as session:
+        session.execute(text(sql), params)
+        session.commit()
+
+
+@pytest.fixture
+def recursos(api):
+    client, user_id = api
+
+    template_id, documento_id = uuid4(), uuid4()
+    _executar(
+        'INSERT INTO templates (id, nome, tipo, campos, template_url, '
+        "template_html, status) VALUES (:id, 'T', 't', '[]', '', "
+        "'<p>x</p>', 'active')",
+        id=template_id,
+    )
+    _executar(
+        'INSERT INTO documentos (id, nome_documento, tipo, modo, '
+        'documento_text, pdf_url, status, user_id, template_id) VALUES '
+        "(:id, 'D', 't', 'm', '<p>x</p>', '', 'active', :u, :t)",
+        id=documento_id,
+        u=user_id,
+        t=template_id,
+    )
+
+    planos = []
+    yield client, template_id, documento_id, planos
+
+    _executar('DELETE FROM documentos WHERE id = :id', id=documento_id)
+    for plano_id in planos:
+        _executar('DELETE FROM planos WHERE id = :id', id=plano_id)
+    _executar('DELETE FROM templates WHERE id = :id', id=template_id)
+
+
+def _revalidar(client, url: str, etag: str):
+    return client.get(url, headers={'If-None-Match': etag})
+
+
+@requer_banco
+def test_template_304_e_etag_novo_apos_escrita(recursos):
+    client, template_id, _, _ = recursos
+    url = f'/templates/{template_id}'
+
+    primeira = client.get(url)
+    etag = primeira.headers['etag']
+    assert primeira.status_code == HTTPStatus.OK
+
+    revalidada = _revalidar(client, url, f'W/{etag}')
+    assert revalidada.status_code == HTTPStatus.NOT_MODIFIED
+    assert revalidada.content == b''
+    assert revalidada.headers['etag'] == etag
+
+    escrita = client.patch(url, json={'nome': 'Outro'})
+    assert escrita.status_code == HTTPStatus.OK
+
+    depois = _revalidar(client, url, etag)
+    assert depois.status_code == HTTPStatus.OK
+    assert depois.headers['etag'] != etag
+    assert depois.json()['nome'] == 'Outro'
+
+
+@requer_banco
+def test_documento_304_e_etag_novo_apos_escrita(recursos):
+    client, _, documento_id, _ = recursos
+    url = f'/documentos/{documento_id}'
+
+    etag = client.get(url).headers['etag']
+    revalidada = _revalidar(client, url, f'"outro", {etag}')
+    assert revalidada.status_code == HTTPStatus.NOT_MODIFIED
+    assert revalidada.content == b''
+
+    _executar(
+        "UPDATE documentos SET nome_documento = 'Renomeado', "
+        "updated_at = updated_at + interval '1 second' WHERE id = :id",
+        id=documento_id,
+    )
+
+    depois = _revalidar(client, url, etag)
+    assert depois.status_code == HTTPStatus.OK
+    assert depois.headers['etag'] != etag
+
+
+@requer_banco
+def test_listagem_de_planos_304_e_etag_novo_apos_escrita(recursos):
+    client, _, _, planos = recursos
+
+    etag = client.get('/planos/').headers['etag']
+    revalidada = _revalidar(client, '/planos/', etag)
+    assert revalidada.status_code == HTTPStatus.NOT_MODIFIED
+    assert revalidada.content == b''
+
+    resposta = client.post(
+        '/planos/',
+        json={
+            'nome': f'Plano {uuid4().hex[:6]}',
+            'descricao': 'd',
+            'preco_cents': 100,
+            'ciclo_faturamento': 'mensal',
+            'pagarme_planoId': 'p',
+        },
+    )
+    assert resposta.status_code == HTTPStatus.CREATED, resposta.text
+    planos.append(resposta.json()['id'])
+
+    depois = _revalidar(client, '/planos/', etag)
+    assert depois.status_code == HTTPStatus.OK
+    assert depois.headers['etag'] != etag
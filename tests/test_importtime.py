@@ -0,0 +1,80 @@
+"""Orçamento de import da aplicação.
+
+Roda `python -X importtime -c 'import contratrix_api.app'` num processo
+novo e falha se o tempo de import, o RSS de base ou os módulos carregados
+regredirem. Os limites podem ser ajustados por máquina com
+IMPORT_TIME_BUDGET_MS e IMPORT_RSS_BUDGET_MB.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('sqlalchemy')
+
+if not os.path.exists('/proc/self/status'):
+    pytest.skip('mede o RSS via /proc (Linux)', allow_module_level=True)
+
+BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', '1500'))
+BUDGET_RSS_MB = float(os.environ.get('IMPORT_RSS_BUDGET_MB', '90'))
+
+# Só devem ser importados por quem de fato os usa (storage, render,
+# e-mail e gateway de pagamento)
+MODULOS_LAZY = ('boto3', 'botocore', 'pypandoc', 'requests', 'httpx')
+
+# VmRSS atual, e não ru_maxrss: no Linux o pico é herdado do processo pai
+# através do exec, e o pai aqui é o próprio pytest
+_CODIGO = f"""
+import json, sys
+import contratrix_api.app
+with open('/proc/self/status') as f:
+    rss_kb = next(int(l.split()[1]) for l in f if l.startswith('VmRSS:'))
+print(json.dumps({{
+    'rss_kb': rss_kb,
+    'carregados': [m for m in {MODULOS_LAZY!r} if m in sys.modules],
+}}))
+"""
+
+
+@pytest.fixture(scope='module')
+def importacao():
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CODIGO],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    # Linhas do -X importtime: "import time: self [us] | cumulative | name"
+    tempos = {}
+    for linha in proc.stderr.splitlines():
+        if linha.startswith('import time:') and '|' in linha:
+            _, cumulativo, nome = linha.split('|')
+            if cumulativo.strip().isdigit():
+                tempos[nome.strip()] = int(cumulativo) / 1000
+
+    return json.loads(proc.stdout), tempos
+
+
+def test_sdks_pesados_nao_sao_importados(importacao):
+    resultado, _ = importacao
+
+    assert resultado['carregados'] == []
+
+
+def test_tempo_de_import_dentro_do_orcamento(importacao):
+    _, tempos = importacao
+    maiores = sorted(tempos.items(), key=lambda t: t[1], reverse=True)[:10]
+
+    assert tempos['contratrix_api.app'] <= BUDGET_MS, maiores
+
+
+def test_rss_de_base_dentro_do_orcamento(importacao):
+    resultado, _ = importacao
+
+    assert resultado['rss_kb'] / 1024 <= BUDGET_RSS_MB
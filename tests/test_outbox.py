@@ -0,0 +1,231 @@
+import asyncio
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import httpx
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import delete, select  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from contratrix_api.models import (  # noqa: E402
+    Cupom,
+    CupomUsage,
+    OutboxPagamento,
+    Planos,
+    Transacoes,
+)
+from contratrix_api.utils import outbox  # noqa: E402
+from contratrix_api.utils.pagarme import PagarmeClient  # noqa: E402
+from tests.conftest import requer_banco  # noqa: E402
+from tests.fake_pagarme import FakePagarme  # noqa: E402
+
+pytestmark = requer_banco
+
+
+@pytest.fixture
+def checkouts(engine, usuarios, monkeypatch):
+    monkeypatch.setattr(
+        outbox, 'get_sessionmaker', lambda: sessionmaker(engine)
+    )
+
+    user_id = usuarios()
+    with Session(engine) as session:
+        plano = Planos(
+            nome='Teste outbox',
+            descricao='',
+            preco_cents=1000,
+            ciclo_faturamento='mensal',
+            pagarme_planoId='plan_teste',
+            status='active',
+        )
+        session.add(plano)
+        session.commit()
+        plano_id = plano.id
+
+    def criar(quantidade, cupom_id=None):
+        ids = []
+        with Session(engine) as session:
+            for _ in range(quantidade):
+                db_transacao = Transacoes(
+                    tipo_transacao='avulso',
+                    valor_cents=1000,
+                    pagarme_transacao_id='',
+                    status='pendente',
+                    user_id=user_id,
+                    plano_id=plano_id,
+                    cupom_id=cupom_id,
+                    documento_id=None,
+                )
+                session.add(db_transacao)
+                session.flush()
+                outbox.registrar(
+                    session,
+                    db_transacao,
+                    outbox.OPERACAO_TRANSACAO,
+                    {'amount': 1000},
+                )
+                ids.append(db_transacao.id)
+            session.commit()
+        return ids
+
+    criar.user_id = user_id
+    yield criar
+
+    with Session(engine) as session:
+        transacoes = select(Transacoes.id).where(Transacoes.user_id == user_id)
+        session.execute(
+            delete(OutboxPagamento).where(
+                OutboxPagamento.transacao_id.in_(transacoes)
+            )
+        )
+        session.execute(
+            delete(Transacoes).where(Transacoes.user_id == user_id)
+        )
+        session.execute(delete(Planos).where(Planos.id == plano_id))
+        session.commit()
+
+
+def _dispatcher(fake, concorrencia):
+    client = PagarmeClient(
+        base_url='http://pagarme.test',
+        api_key='chave',
+        timeout=5,
+        transport=httpx.ASGITransport(app=fake.app),
+    )
+    return outbox.OutboxDispatcher(
+        client=client, concorrencia=concorrencia, lote=50, max_tentativas=3
+    )
+
+
+def test_dispatcher_envia_cada_transacao_uma_vez(engine, checkouts):
+    ids = checkouts(30)
+    fake = FakePagarme(latencia=0.02)
+    concorrencia = 4
+
+    asyncio.run(_dispatcher(fake, concorrencia=concorrencia).drenar())
+
+    assert fake.pico <= concorrencia
+    assert len(fake.cobrancas) == len(ids)
+
+    with Session(engine) as session:
+        transacoes = session.scalars(
+            select(Transacoes).where(Transacoes.id.in_(ids))
+        ).all()
+        status = session.scalars(
+            select(OutboxPagamento.status).where(
+                OutboxPagamento.transacao_id.in_(ids)
+            )
+        ).all()
+
+    assert all(t.pagarme_transacao_id and t.checkout_url for t in transacoes)
+    assert set(status) == {'enviado'}
+
+
+def test_falha_temporaria_volta_para_a_fila(engine, checkouts):
+    (transacao_id,) = checkouts(1)
+    fake = FakePagarme(falhas=2)
+
+    asyncio.run(_dispatcher(fake, concorrencia=1).drenar())
+
+    with Session(engine) as session:
+        envio = session.scalar(
+            select(OutboxPagamento).where(
+                OutboxPagamento.transacao_id == transacao_id
+            )
+        )
+
+    # As duas tentativas do cliente falharam: reagendado com backoff
+    assert envio.status == 'pendente'
+    assert envio.tentativas == 1
+    assert envio.ultimo_erro
+    assert not fake.cobrancas
+
+
+@pytest.fixture
+def cupom_resgatado(engine, checkouts):
+    # Estado deixado pelo checkout: um resgate contado no cupom e no usuário
+    with Session(engine) as session:
+        cupom = Cupom(
+            code=f'OUTBOX{uuid4().hex[:8]}'.upper(),
+            tipo_desconto='percentual',
+            valor_desconto=10,
+            aplicavel='todos',
+            quantidade_total=1,
+            limit_uso_usuario=1,
+            inicio=datetime.utcnow() - timedelta(days=1),
+            termino=datetime.utcnow() + timedelta(days=1),
+            observacao='',
+            status='active',
+            usados=1,
+        )
+        session.add(cupom)
+        session.flush()
+        session.add(
+            CupomUsage(
+                user_id=checkouts.user_id,
+                cupom_id=cupom.id,
+                quantidade_usado=1,
+            )
+        )
+        session.commit()
+        cupom_id = cupom.id
+
+    yield cupom_id
+
+    with Session(engine) as session:
+        transacoes = select(Transacoes.id).where(
+            Transacoes.cupom_id == cupom_id
+        )
+        session.execute(
+            delete(OutboxPagamento).where(
+                OutboxPagamento.transacao_id.in_(transacoes)
+            )
+        )
+        session.execute(
+            delete(Transacoes).where(Transacoes.cupom_id == cupom_id)
+        )
+        session.execute(delete(Cupom).where(Cupom.id == cupom_id))
+        session.commit()
+
+
+def _contadores(engine, cupom_id):
+    with Session(engine) as session:
+        return (
+            session.scalar(select(Cupom.usados).where(Cupom.id == cupom_id)),
+            session.scalar(
+                select(CupomUsage.quantidade_usado).where(
+                    CupomUsage.cupom_id == cupom_id
+                )
+            ),
+        )
+
+
+def test_pagamento_recusado_libera_o_cupom(engine, checkouts, cupom_resgatado):
+    (transacao_id,) = checkouts(1, cupom_id=cupom_resgatado)
+    fake = FakePagarme(recusas=1)
+
+    asyncio.run(_dispatcher(fake, concorrencia=1).drenar())
+
+    with Session(engine) as session:
+        envio = session.scalar(
+            select(OutboxPagamento).where(
+                OutboxPagamento.transacao_id == transacao_id
+            )
+        )
+        status = session.scalar(
+            select(Transacoes.status).where(Transacoes.id == transacao_id)
+        )
+
+    assert envio.status == 'falhou'
+    assert status == 'falhou'
+    assert _contadores(engine, cupom_resgatado) == (0, 0)
+
+    # Falhar de novo a mesma transação não devolve o cupom outra vez
+    with Session(engine) as session:
+        outbox.falhar(session, envio, 'repetido')
+
+    assert _contadores(engine, cupom_resgatado) == (0, 0)
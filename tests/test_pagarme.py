@@ -0,0 +1,84 @@
+import asyncio
+from uuid import uuid4
+
+import httpx
+import pytest
+
+pytest.importorskip('pydantic_settings')
+
+from contratrix_api.utils.pagarme import (  # noqa: E402
+    CircuitBreaker,
+    GatewayIndisponivel,
+    PagarmeClient,
+)
+from tests.fake_pagarme import FakePagarme  # noqa: E402
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _client(fake, timeout=1.0, breaker=None):
+    return PagarmeClient(
+        base_url='http://pagarme.test',
+        api_key='chave',
+        timeout=timeout,
+        breaker=breaker,
+        transport=httpx.ASGITransport(app=fake.app),
+    )
+
+
+def test_retry_reaproveita_a_mesma_cobranca():
+    async def cenario():
+        fake = FakePagarme(falhas=1)
+        client = _client(fake)
+        transacao_id = uuid4()
+
+        primeira = await client.criar_transacao(transacao_id, {'amount': 100})
+        repetida = await client.criar_transacao(transacao_id, {'amount': 100})
+        await client.close()
+
+        return fake, primeira, repetida
+
+    fake, primeira, repetida = asyncio.run(cenario())
+
+    # 503 + retry + chamada repetida: três requisições, uma cobrança
+    assert fake.chamadas == len(['503', 'retry', 'repetida'])
+    assert len(fake.cobrancas) == 1
+    assert primeira['id'] == repetida['id']
+
+
+def test_timeout_abre_o_circuito():
+    relogio = Relogio()
+    cooldown = 30
+    breaker = CircuitBreaker(limite_falhas=2, cooldown=cooldown, clock=relogio)
+
+    async def cenario():
+        fake = FakePagarme(latencia=0.5)
+        client = _client(fake, timeout=0.05, breaker=breaker)
+
+        with pytest.raises(GatewayIndisponivel):
+            await client.criar_transacao(uuid4(), {'amount': 100})
+
+        chamadas = fake.chamadas
+
+        # Circuito aberto: falha sem chegar ao gateway
+        with pytest.raises(GatewayIndisponivel) as erro:
+            await client.criar_transacao(uuid4(), {'amount': 100})
+
+        assert fake.chamadas == chamadas
+        assert erro.value.retry_after == cooldown
+
+        # Após o cooldown uma chamada de teste passa e fecha o circuito
+        fake.latencia = 0
+        relogio.agora = cooldown + 1
+        await client.criar_transacao(uuid4(), {'amount': 100})
+        await client.close()
+
+    asyncio.run(cenario())
+
+    assert not breaker.aberto
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('jwt')
+pytest.importorskip('pydantic_settings')
+
+from fastapi import HTTPException  # noqa: E402
+
+from contratrix_api import security  # noqa: E402
+from contratrix_api.utils import cache_bus  # noqa: E402
+from contratrix_api.utils.catalog import Catalog  # noqa: E402
+from contratrix_api.utils.token_cache import TokenCache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def chaves(monkeypatch):
+    # Sem .env: configurações e chaves mínimas para emitir e validar tokens
+    settings = SimpleNamespace(
+        ACCESS_TOKEN_EXPIRE_MINUTES=30, TOKEN_CACHE_SIZE=100
+    )
+    keys = security.JwtKeys('HS256', 'segredo-de-teste', 'segredo-de-teste')
+    monkeypatch.setattr(security, 'get_settings', lambda: settings)
+    monkeypatch.setattr(security, 'get_jwt_keys', lambda: keys)
+    cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+    monkeypatch.setattr(security, 'get_token_cache', lambda: cache)
+
+
+@pytest.fixture
+def versoes(monkeypatch):
+    revogados = {}
+    monkeypatch.setattr(
+        security,
+        'versoes_token',
+        Catalog(lambda session: revogados.items(), ttl=60),
+    )
+    return revogados
+
+
+def _token(user_id, token_version=0):
+    user = SimpleNamespace(
+        id=user_id, email='a@b.com', role='admin', token_version=token_version
+    )
+    return security.create_access_token(security.access_token_claims(user))
+
+
+def _principal(token):
+    # Sessão None: o caminho comum não pode tocar no banco
+    return security.get_current_principal(session=None, token=token)
+
+
+def test_principal_vem_das_claims_sem_consultar_o_banco(versoes):
+    user_id = uuid4()
+
+    principal = _principal(_token(user_id))
+
+    assert principal.id == user_id
+    assert principal.role == 'admin'
+
+
+def test_token_de_versao_antiga_e_recusado(versoes):
+    user_id = uuid4()
+    token = _token(user_id)
+
+    versoes[user_id] = 1
+    security.versoes_token.invalidate()
+
+    with pytest.raises(HTTPException):
+        _principal(token)
+
+    assert _principal(_token(user_id, token_version=1)).id == user_id
+
+
+def test_so_eventos_de_tokens_invalidam_o_mapa(versoes):
+    user_id = uuid4()
+    token = _token(user_id)
+    _principal(token)
+    versoes[user_id] = 1
+
+    # Eventos de outros canais não derrubam o mapa em memória
+    cache_bus.dispatch(f'users:{user_id}')
+    assert _principal(token).id == user_id
+
+    cache_bus.dispatch(f'tokens:{user_id}')
+    with pytest.raises(HTTPException):
+        _principal(token)
@@ -0,0 +1,202 @@
+from http import HTTPStatus
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from contratrix_api.settings import get_settings  # noqa: E402
+from contratrix_api.utils import rate_limit  # noqa: E402
+from contratrix_api.utils.rate_limit import (  # noqa: E402
+    LimiteConcorrencia,
+    MemoriaBackend,
+    Orcamento,
+    PostgresBackend,
+    RateLimiter,
+    ip_do_cliente,
+    purgar_lote,
+)
+from tests.conftest import requer_banco  # noqa: E402
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_bucket_em_memoria_recarrega_com_o_tempo():
+    relogio = Relogio()
+    backend = MemoriaBackend(clock=relogio)
+    orcamento = Orcamento.parse('3/60')
+
+    assert [backend.consumir('u', orcamento) for _ in range(3)] == [0, 0, 0]
+    assert backend.consumir('u', orcamento) == pytest.approx(20)
+    # Outra chave tem o próprio orçamento
+    assert backend.consumir('v', orcamento) == 0
+
+    relogio.agora = 20
+    assert backend.consumir('u', orcamento) == 0
+    assert backend.consumir('u', orcamento) > 0
+
+
+def test_limite_de_concorrencia_por_chave():
+    limite = LimiteConcorrencia(2)
+
+    assert limite.adquirir('a')
+    assert limite.adquirir('a')
+    assert not limite.adquirir('a')
+    assert limite.adquirir('b')
+
+    limite.liberar('a')
+    assert limite.adquirir('a')
+    assert limite.negadas == 1
+
+
+@pytest.fixture
+def proxies(monkeypatch):
+    def configurar(valor):
+        monkeypatch.setattr(
+            rate_limit,
+            'get_settings',
+            lambda: SimpleNamespace(RATE_LIMIT_PROXIES_CONFIAVEIS=valor),
+        )
+        rate_limit._proxies_confiaveis.cache_clear()
+
+    yield configurar
+    rate_limit._proxies_confiaveis.cache_clear()
+
+
+def _request(ip: str, forwarded: str | None = None) -> Request:
+    headers = []
+    if forwarded is not None:
+        headers.append((b'x-forwarded-for', forwarded.encode()))
+    return Request({'type': 'http', 'headers': headers, 'client': (ip, 1)})
+
+
+@pytest.mark.parametrize(
+    ('confiaveis', 'ip', 'forwarded', 'esperado'),
+    [
+        # Sem proxies configurados o header é forjável e fica de fora
+        ('', '10.0.0.2', '203.0.113.7', '10.0.0.2'),
+        ('10.0.0.0/8', '10.0.0.2', '203.0.113.7', '203.0.113.7'),
+        # O primeiro salto não confiável, vindo da direita, é o cliente
+        ('10.0.0.0/8', '10.0.0.2', '1.1.1.1, 203.0.113.7', '203.0.113.7'),
+        ('10.0.0.0/8', '10.0.0.2', '203.0.113.7, 10.0.0.9', '203.0.113.7'),
+        # Conexão direta, fora do balanceador: o header é ignorado
+        ('10.0.0.0/8', '198.51.100.1', '203.0.113.7', '198.51.100.1'),
+        ('10.0.0.0/8', '10.0.0.2', None, '10.0.0.2'),
+        ('*', '198.51.100.1', '203.0.113.7', '203.0.113.7'),
+    ],
+)
+def test_ip_do_cliente_atras_do_proxy(
+    proxies, confiaveis, ip, forwarded, esperado
+):
+    proxies(confiaveis)
+
+    assert ip_do_cliente(_request(ip, forwarded)) == esperado
+
+
+@requer_banco
+def test_bucket_compartilhado_no_postgres(engine):
+    chave = f'teste:{uuid4()}'
+    # Duas instâncias da API apontando para o mesmo banco
+    instancias = [PostgresBackend(engine), PostgresBackend(engine)]
+    orcamento = Orcamento.parse('4/3600')
+
+    try:
+        resultados = [
+            instancias[i % 2].consumir(chave, orcamento) for i in range(5)
+        ]
+
+        assert resultados[:4] == [0, 0, 0, 0]
+        assert resultados[4] == pytest.approx(900, rel=0.01)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text('DELETE FROM rate_limit_buckets WHERE chave = :chave'),
+                {'chave': chave},
+            )
+
+
+@requer_banco
+def test_purga_so_remove_buckets_ja_recarregados(engine):
+    classe = f'teste{uuid4().hex[:8]}'
+    orcamentos = {classe: Orcamento.parse('10/60')}
+    # Recarga de 1 token a cada 6 s: o bucket vazio há uma hora já está
+    # cheio, o consumido agora ainda não
+    buckets = {
+        f'{classe}:recarregado': (0.0, 3600),
+        f'{classe}:recente': (0.0, 0),
+        f'{classe}:intocado': (10.0, 0),
+        f'outra{classe}:antigo': (0.0, 3600),
+    }
+
+    with engine.begin() as connection:
+        for chave, (tokens, idade) in buckets.items():
+            connection.execute(
+                text(
+                    'INSERT INTO rate_limit_buckets (chave, tokens, '
+                    'atualizado_em) VALUES (:chave, :tokens, '
+                    'extract(epoch from now()) - :idade)'
+                ),
+                {'chave': chave, 'tokens': tokens, 'idade': idade},
+            )
+
+    try:
+        with Session(engine) as session:
+            removidos = purgar_lote(session, orcamentos, batch_size=100)
+
+        with engine.connect() as connection:
+            restantes = set(
+                connection.scalars(
+                    text(
+                        'SELECT chave FROM rate_limit_buckets '
+                        'WHERE chave = ANY(:chaves)'
+                    ),
+                    {'chaves': list(buckets)},
+                )
+            )
+
+        assert removidos == len(['recarregado', 'intocado'])
+        # Classes que não estão nos orçamentos não são tocadas
+        assert restantes == {
+            f'{classe}:recente',
+            f'outra{classe}:antigo',
+        }
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    'DELETE FROM rate_limit_buckets WHERE chave = ANY(:chaves)'
+                ),
+                {'chaves': list(buckets)},
+            )
+
+
+@requer_banco
+def test_refresh_token_tem_orcamento_por_ip(client, monkeypatch):
+    limiter = RateLimiter(
+        MemoriaBackend(), {'refresh': Orcamento.parse('2/60')}
+    )
+    monkeypatch.setattr(get_settings(), 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(rate_limit, 'get_rate_limiter', lambda: limiter)
+
+    status = [
+        client.post(
+            '/auth/refresh_token', json={'refresh_token': 'invalido'}
+        ).status_code
+        for _ in range(3)
+    ]
+
+    assert status[:2] == [HTTPStatus.UNAUTHORIZED] * 2
+    assert status[2] == HTTPStatus.TOO_MANY_REQUESTS
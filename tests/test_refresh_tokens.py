@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import select, update  # noqa: E402
+
+from contratrix_api.models import RefreshToken  # noqa: E402
+from contratrix_api.utils import refresh_tokens  # noqa: E402
+from tests.conftest import requer_banco  # noqa: E402
+
+pytestmark = requer_banco
+
+
+def test_rotacao_e_deteccao_de_reuso(usuarios, session):
+    user_id = usuarios()
+    primeiro = refresh_tokens.emitir(session, user_id)
+    session.commit()
+
+    dono, segundo = refresh_tokens.rotacionar(session, primeiro)
+    session.commit()
+    assert dono == user_id
+
+    # O primeiro token volta a aparecer: a família toda cai
+    with pytest.raises(refresh_tokens.RefreshTokenInvalido):
+        refresh_tokens.rotacionar(session, primeiro)
+
+    with pytest.raises(refresh_tokens.RefreshTokenInvalido):
+        refresh_tokens.rotacionar(session, segundo)
+
+    # Só o hash é gravado
+    hashes = session.scalars(
+        select(RefreshToken.token_hash).where(RefreshToken.user_id == user_id)
+    ).all()
+    assert primeiro not in hashes
+    assert segundo not in hashes
+
+
+def test_purga_apenas_expirados(usuarios, session):
+    user_id = usuarios()
+    expirados = 2
+    for _ in range(expirados):
+        refresh_tokens.emitir(session, user_id)
+    session.flush()
+    session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id)
+        .values(expires_at=datetime.utcnow() - timedelta(days=1))
+    )
+    vigente = refresh_tokens.emitir(session, user_id)
+    session.commit()
+
+    assert refresh_tokens.purgar_tokens(session, batch_size=1) >= expirados
+
+    restantes = session.scalars(
+        select(RefreshToken.id).where(RefreshToken.user_id == user_id)
+    ).all()
+    assert len(restantes) == 1
+    assert refresh_tokens.rotacionar(session, vigente)[0] == user_id
@@ -0,0 +1,164 @@
+"""API enfileirando e render worker gerando o PDF, em processos separados."""
+
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import text  # noqa: E402
+
+from contratrix_api.database import get_sessionmaker  # noqa: E402
+from contratrix_api.render_worker import RenderWorker  # noqa: E402
+from contratrix_api.settings import get_settings  # noqa: E402
+from tests.conftest import requer_banco  # noqa: E402
+
+pytestmark = requer_banco
+
+# Sem pandoc no ambiente o worker roda de verdade e só o conversor é
+# trocado, dentro do próprio processo do worker
+_WORKER = """
+import shutil
+from contratrix_api import render_worker
+from contratrix_api.utils import render
+
+if not shutil.which('pandoc'):
+    render.html_para_pdf = lambda html: b'%PDF-1.4\\n' + html.encode()
+
+render_worker.main(['--drenar'])
+"""
+
+
+@pytest.fixture
+def template_id(api, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'RENDER_MODE', 'fila')
+
+    template_id = uuid4()
+    with get_sessionmaker()() as session:
+        session.execute(
+            text(
+                'INSERT INTO templates (id, nome, tipo, campos, '
+                "template_html, status) VALUES (:id, 'T', 't', :campos, "
+                ":html, 'active')"
+            ),
+            {
+                'id': template_id,
+                'campos': '[{"name": "nome"}]',
+                'html': '<p>Contrato de {{ nome }}</p>',
+            },
+        )
+        session.commit()
+
+    yield template_id
+
+    # Os documentos gerados referenciam o template: saem antes dele
+    _, user_id = api
+    with get_sessionmaker()() as session:
+        session.execute(
+            text(
+                'DELETE FROM render_jobs WHERE documento_id IN '
+                '(SELECT id FROM documentos WHERE user_id = :u)'
+            ),
+            {'u': user_id},
+        )
+        session.execute(
+            text('DELETE FROM documentos WHERE user_id = :u'), {'u': user_id}
+        )
+        session.execute(
+            text('DELETE FROM templates WHERE id = :id'), {'id': template_id}
+        )
+        session.commit()
+
+
+def test_api_enfileira_e_worker_gera_o_pdf(api, template_id, tmp_path):
+    client, _ = api
+
+    resposta = client.post(
+        '/documentos/express',
+        json={
+            'nome_documento': 'Contrato Teste',
+            'tipo': 't',
+            'modo': 'm',
+            'template_id': str(template_id),
+            'dados_contrato': {'nome': 'Maria'},
+        },
+    )
+    assert resposta.status_code == HTTPStatus.ACCEPTED, resposta.text
+    documento = resposta.json()
+    assert not documento['pdf_url']
+
+    andamento = client.get(f'/documentos/{documento["id"]}/render').json()
+    assert andamento['status'] == 'pendente'
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=os.environ['TEST_DATABASE_URL'],
+        DOCUMENTOS_HTML_STORAGE='local',
+        DOCUMENTOS_HTML_DIR=str(tmp_path),
+    )
+    subprocess.run(
+        [sys.executable, '-c', _WORKER],
+        env=env,
+        check=True,
+        timeout=120,
+        cwd=Path(__file__).resolve().parents[1],
+    )
+
+    andamento = client.get(f'/documentos/{documento["id"]}/render').json()
+    assert andamento['status'] == 'concluido'
+    assert andamento['tentativas'] == 1
+
+    pdf = Path(andamento['pdf_url'].removeprefix('file://'))
+    assert pdf.parent == tmp_path / 'pdf'
+    assert pdf.read_bytes().startswith(b'%PDF')
+
+
+def test_falha_no_render_volta_para_a_fila_e_desiste(api, template_id):
+    client, _ = api
+    documento = client.post(
+        '/documentos/express',
+        json={
+            'nome_documento': 'Contrato Quebrado',
+            'tipo': 't',
+            'modo': 'm',
+            'template_id': str(template_id),
+            'dados_contrato': {'nome': 'Maria'},
+        },
+    ).json()
+
+    def quebrado(html):
+        raise RuntimeError('pandoc saiu com código 1')
+
+    max_tentativas = 2
+    worker = RenderWorker(
+        concorrencia=1, max_tentativas=max_tentativas, renderizar=quebrado
+    )
+    worker.drenar()
+
+    andamento = client.get(f'/documentos/{documento["id"]}/render').json()
+    assert andamento == {'status': 'pendente', 'tentativas': 1, 'pdf_url': ''}
+
+    # Antecipa a nova tentativa em vez de esperar o backoff
+    with get_sessionmaker()() as session:
+        session.execute(
+            text(
+                'UPDATE render_jobs SET proxima_tentativa_em = now() '
+                'WHERE documento_id = :id'
+            ),
+            {'id': documento['id']},
+        )
+        session.commit()
+
+    worker.drenar()
+    worker.shutdown()
+
+    andamento = client.get(f'/documentos/{documento["id"]}/render').json()
+    assert andamento['status'] == 'falhou'
+    assert worker.falhas == max_tentativas
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from contratrix_api.models import PasswordResetToken  # noqa: E402
+from contratrix_api.utils.reset_tokens import (  # noqa: E402
+    consumir_token,
+    purgar_tokens,
+)
+from tests.conftest import requer_banco  # noqa: E402
+
+pytestmark = requer_banco
+
+
+@pytest.fixture
+def user_id(usuarios):
+    return usuarios()
+
+
+def _token(engine, user_id, code, minutos=10, used=False):
+    with Session(engine) as session:
+        session.add(
+            PasswordResetToken(
+                code=code,
+                expires_at=datetime.utcnow() + timedelta(minutes=minutos),
+                used=used,
+                user_id=user_id,
+            )
+        )
+        session.commit()
+
+
+def test_token_e_consumido_uma_unica_vez(engine, user_id):
+    _token(engine, user_id, '123456')
+
+    def tentar(_):
+        with Session(engine) as session:
+            consumido = consumir_token(session, user_id, '123456')
+            session.commit()
+            return consumido
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        resultados = list(executor.map(tentar, range(20)))
+
+    assert resultados.count(True) == 1
+
+
+def test_token_expirado_nao_e_aceito_e_e_purgado(engine, user_id):
+    _token(engine, user_id, '111111', minutos=-1)
+    _token(engine, user_id, '222222', used=True)
+    _token(engine, user_id, '333333')
+
+    with Session(engine) as session:
+        assert not consumir_token(session, user_id, '111111')
+        session.rollback()
+        purgar_tokens(session, batch_size=1)
+
+        restantes = session.scalars(
+            select(PasswordResetToken.code).where(
+                PasswordResetToken.user_id == user_id
+            )
+        ).all()
+
+    assert restantes == ['333333']
@@ -0,0 +1,174 @@
+import asyncio
+import threading
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('pwdlib')
+pytest.importorskip('pydantic_settings')
+
+from pwdlib import PasswordHash  # noqa: E402
+from pwdlib.hashers.argon2 import Argon2Hasher  # noqa: E402
+from sqlalchemy import select, text, update  # noqa: E402
+
+from contratrix_api import security  # noqa: E402
+from contratrix_api.database import get_sessionmaker  # noqa: E402
+from contratrix_api.models import User  # noqa: E402
+from contratrix_api.routers import users  # noqa: E402
+from contratrix_api.settings import get_settings  # noqa: E402
+from contratrix_api.utils.executor import (  # noqa: E402
+    ExecutorLimitado,
+    ExecutorSaturado,
+)
+from tests.conftest import (  # noqa: E402
+    apagar_usuarios,
+    cadastrar,
+    requer_banco,
+)
+
+
+def test_executor_rejeita_quando_a_fila_esta_cheia():
+    executor = ExecutorLimitado('teste', workers=1, max_pendentes=2)
+    liberar = threading.Event()
+
+    async def cenario():
+        tarefas = [
+            asyncio.create_task(executor.run(liberar.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ExecutorSaturado):
+            await executor.run(liberar.wait)
+
+        liberar.set()
+        await asyncio.gather(*tarefas)
+
+        # Vagas devolvidas ao terminar
+        assert executor.pendentes == 0
+        assert await executor.run(lambda: 'ok') == 'ok'
+
+    asyncio.run(cenario())
+    executor.shutdown()
+
+    assert executor.rejeitadas == 1
+
+
+@pytest.fixture
+def emails(monkeypatch):
+    # Usuários cadastrados pelas rotas, apagados pelo e-mail no final
+    monkeypatch.setattr(get_settings(), 'RATE_LIMIT_ENABLED', False)
+    emails = []
+    yield emails
+
+    with get_sessionmaker()() as session:
+        ids = session.scalars(
+            select(User.id).where(User.email.in_(emails))
+        ).all()
+        apagar_usuarios(session, ids)
+
+
+def _cadastrar(client, email: str):
+    return cadastrar(client, email, 'segredo')
+
+
+@requer_banco
+def test_email_repetido_e_recusado_antes_do_hash(client, emails, monkeypatch):
+    email = f'{uuid4().hex[:8]}@senhas.com'
+    emails.append(email)
+    hashes = []
+
+    async def contar(password):
+        hashes.append(password)
+        return await security.hash_password(password)
+
+    monkeypatch.setattr(users, 'hash_password', contar)
+
+    assert _cadastrar(client, email).status_code == HTTPStatus.CREATED
+    repetido = _cadastrar(client, email)
+
+    assert repetido.status_code == HTTPStatus.BAD_REQUEST
+    assert hashes == ['segredo']
+
+
+@requer_banco
+def test_login_regrava_hash_com_parametros_antigos(client, emails):
+    email = f'{uuid4().hex[:8]}@senhas.com'
+    emails.append(email)
+    assert _cadastrar(client, email).status_code == HTTPStatus.CREATED
+
+    settings = get_settings()
+    antigo = PasswordHash((
+        Argon2Hasher(
+            time_cost=settings.ARGON2_TIME_COST + 1, memory_cost=8192
+        ),
+    ))
+    hash_antigo = antigo.hash('segredo')
+    with get_sessionmaker()() as session:
+        session.execute(
+            update(User)
+            .where(User.email == email)
+            .values(password=hash_antigo)
+        )
+        session.commit()
+
+    valida, novo_hash = asyncio.run(
+        security.verify_and_update_password('segredo', hash_antigo)
+    )
+    assert valida
+    assert novo_hash
+
+    resposta = client.post(
+        '/auth/token', data={'username': email, 'password': 'segredo'}
+    )
+    assert resposta.status_code == HTTPStatus.OK
+
+    with get_sessionmaker()() as session:
+        gravado = session.scalar(
+            select(User.password).where(User.email == email)
+        )
+
+    # O login regravou o hash com os parâmetros atuais
+    assert gravado != hash_antigo
+    assert asyncio.run(
+        security.verify_and_update_password('segredo', gravado)
+    ) == (True, None)
+
+
+@requer_banco
+def test_codigo_errado_no_reset_nao_chega_ao_hash(client, emails, monkeypatch):
+    email = f'{uuid4().hex[:8]}@senhas.com'
+    emails.append(email)
+    assert _cadastrar(client, email).status_code == HTTPStatus.CREATED
+    client.post('/users/recover-password', json={'email': email})
+
+    hashes = []
+
+    async def contar(password):
+        hashes.append(password)
+        return await security.hash_password(password)
+
+    monkeypatch.setattr(users, 'hash_password', contar)
+
+    errado = client.post(
+        '/users/reset-password',
+        json={'email': email, 'code': 'errado', 'password': 'nova'},
+    )
+    assert errado.status_code == HTTPStatus.BAD_REQUEST
+    assert not hashes
+
+    with get_sessionmaker()() as session:
+        code = session.scalar(
+            text(
+                'SELECT code FROM password_reset_tokens WHERE user_id = '
+                '(SELECT id FROM users WHERE email = :e) AND NOT used'
+            ),
+            {'e': email},
+        )
+
+    certo = client.post(
+        '/users/reset-password',
+        json={'email': email, 'code': code, 'password': 'nova'},
+    )
+    assert certo.status_code == HTTPStatus.OK
+    assert hashes == ['nova']
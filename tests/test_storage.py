@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip('zstandard')
+pytest.importorskip('pydantic_settings')
+
+from contratrix_api.utils import storage  # noqa: E402
+
+
+@pytest.fixture
+def local_storage(monkeypatch, tmp_path):
+    settings = SimpleNamespace(
+        DOCUMENTOS_HTML_STORAGE='local', DOCUMENTOS_HTML_DIR=str(tmp_path)
+    )
+    monkeypatch.setattr(storage, 'get_settings', lambda: settings)
+    return tmp_path
+
+
+def test_html_do_documento_e_gravado_comprimido_e_lido_de_volta(local_storage):
+    html = '<p>Contrato de prestação de serviços</p>' * 200
+
+    stored = storage.put_documento_html(uuid4(), html)
+
+    assert stored.size == len(html.encode('utf-8'))
+    assert (local_storage / stored.key).stat().st_size < stored.size
+    assert storage.get_documento_html(stored.key, stored.sha256) == html
+
+
+def test_checksum_divergente_e_rejeitado(local_storage):
+    stored = storage.put_documento_html(uuid4(), '<p>original</p>')
+
+    with pytest.raises(storage.HtmlChecksumError):
+        storage.get_documento_html(stored.key, '0' * 64)
+
+
+def test_html_de_transacao_desfeita_e_removido(local_storage):
+    stored = storage.put_documento_html(uuid4(), '<p>rascunho</p>')
+
+    storage.delete_documento_html(stored.key)
+
+    assert not (local_storage / stored.key).exists()
+
+
+def test_modo_de_storage_desconhecido_e_recusado(monkeypatch):
+    settings = SimpleNamespace(DOCUMENTOS_HTML_STORAGE='s3')
+    monkeypatch.setattr(storage, 'get_settings', lambda: settings)
+
+    with pytest.raises(ValueError, match='DOCUMENTOS_HTML_STORAGE'):
+        storage.html_storage_enabled()
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('jwt')
+pytest.importorskip('pydantic_settings')
+
+from cryptography.hazmat.primitives.asymmetric import ed25519  # noqa: E402
+
+from contratrix_api import security  # noqa: E402
+from contratrix_api.utils.token_cache import TokenCache  # noqa: E402
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_entrada_vale_ate_o_exp_do_token():
+    relogio = Relogio()
+    cache = TokenCache(10, clock=relogio)
+    cache.put('token', {'uid': 'x', 'exp': 1060})
+
+    assert cache.get('token') == {'uid': 'x', 'exp': 1060}
+
+    relogio.agora = 1060
+    assert cache.get('token') is None
+
+
+def test_lru_limitado():
+    cache = TokenCache(2, clock=Relogio())
+    cache.put('a', {'exp': 2000})
+    cache.put('b', {'exp': 2000})
+    cache.get('a')
+    cache.put('c', {'exp': 2000})
+
+    assert cache.get('b') is None
+    assert cache.get('a')
+    assert cache.get('c')
+
+
+def test_token_assinado_com_eddsa(monkeypatch):
+    privada = ed25519.Ed25519PrivateKey.generate()
+    # Sem .env: só o que create_access_token lê das configurações
+    monkeypatch.setattr(
+        security,
+        'get_settings',
+        lambda: SimpleNamespace(ACCESS_TOKEN_EXPIRE_MINUTES=30),
+    )
+    monkeypatch.setattr(
+        security,
+        'get_jwt_keys',
+        lambda: security.JwtKeys('EdDSA', privada, privada.public_key()),
+    )
+    monkeypatch.setattr(security, 'get_token_cache', lambda: TokenCache(10))
+
+    token = security.create_access_token({'sub': 'a@b.com'})
+
+    assert security.decode_access_token(token)['sub'] == 'a@b.com'
@@ -0,0 +1,62 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pydantic_settings')
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from contratrix_api.routers import health  # noqa: E402
+from contratrix_api.utils.warmup import Aquecimento  # noqa: E402
+
+
+def test_ready_so_depois_do_aquecimento(monkeypatch):
+    aquecimento = Aquecimento(intervalo_retentativa=0.01)
+    monkeypatch.setattr(health, 'aquecimento', aquecimento)
+
+    tentativas = []
+    falhas_do_banco = 2
+
+    def banco():
+        tentativas.append(1)
+        if len(tentativas) <= falhas_do_banco:
+            raise ConnectionError('banco fora do ar')
+
+    aquecimento.registrar('banco', banco)
+    aquecimento.registrar('imports', lambda: None)
+
+    app = FastAPI()
+    app.include_router(health.router)
+
+    async def cenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://t'
+        ) as c:
+            antes = (
+                (await c.get('/health/live')).status_code,
+                (await c.get('/health/ready')).status_code,
+            )
+
+            aquecimento.start()
+            await asyncio.wait_for(aquecimento._task, 5)
+            depois = (await c.get('/health/ready')).status_code
+
+            await aquecimento.stop()
+            encerrando = (await c.get('/health/ready')).status_code
+
+        return antes, depois, encerrando
+
+    antes, depois, encerrando = asyncio.run(cenario())
+
+    assert antes == (HTTPStatus.OK, HTTPStatus.SERVICE_UNAVAILABLE)
+    assert depois == HTTPStatus.OK
+    assert encerrando == HTTPStatus.SERVICE_UNAVAILABLE
+    assert len(tentativas) == falhas_do_banco + 1
+    assert set(aquecimento.duracoes) == {'banco', 'imports'}
+    assert not aquecimento.falhas